@@ -1,30 +1,165 @@
 # accounts/admin.py
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import UserProfile, ProfileImage, UserSubscription, PaymentTransaction, SubscriptionPlan # Import all your models, including SubscriptionPlan
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from .models import UserProfile, ProfileImage, UserSubscription, PaymentTransaction, SubscriptionPlan, PaystackWebhookEvent # Import all your models, including SubscriptionPlan
+from .models import Like, ModerationJob, Notification
+from . import moderation, search
+
+# --- Scaling helpers for the big tables (users, likes, notifications) ---
+
+ESTIMATE_THRESHOLD = 50_000 # Below this an exact COUNT(*) is cheap enough
+COUNT_LIMIT = 10_000 # Filtered changelists count at most this many rows
+ADMIN_SEARCH_LIMIT = 10_000 # Users a search term resolves to; past this the moderator is asked to narrow it
+
+
+def estimated_row_count(model, using):
+    """Table size without COUNT(*): planner statistics on PostgreSQL, MAX(id) elsewhere. None if unknown."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None # -1: never analyzed
+    # Ids only grow, so MAX(id) (one index probe) over-counts by the rows deleted since.
+    return model._default_manager.using(using).aggregate(top=Max('pk'))['top']
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that never counts a big table. The unfiltered list uses
+    estimated_row_count(). Filtered lists stop counting at COUNT_LIMIT, so the page links
+    end there; narrow the filters to reach older rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+
+def matching_user_ids(search_term, within=None):
+    """
+    Users a moderator's search term points at: an exact email address, otherwise the
+    full-text matches on username, name, location and bio (accounts/search.py), best first
+    and only among `within` (a UserProfile queryset) if given. At most ADMIN_SEARCH_LIMIT + 1
+    ids: one more than the limit means the list was cut off.
+    None when the database has no full-text index.
+    """
+    term = search_term.strip()
+    if '@' in term:
+        return list(UserProfile.objects.filter(email__in={term, term.lower()}).values_list('pk', flat=True))
+    return search.match(term, limit=ADMIN_SEARCH_LIMIT + 1, within=within)
+
+
+def start_moderation_job(modeladmin, request, action, target_ids, skipped=0):
+    """Queues a background ModerationJob for an admin action and links to its progress."""
+    if not target_ids:
+        modeladmin.message_user(request, "Nothing to do (staff accounts are never included).", level='warning')
+        return
+    job = moderation.start_job(action, target_ids, requested_by=request.user)
+    note = f" {skipped} staff account(s) were left out." if skipped else ""
+    modeladmin.message_user(request, format_html(
+        'Queued <a href="{}">{}</a> for {} item(s); it runs in the background.{}',
+        reverse('admin:accounts_moderationjob_change', args=[job.pk]), job.get_action_display(), job.total, note,
+    ))
+
+
+class LargeTableAdminMixin:
+    """
+    For changelists over the big tables: estimated counts, no second COUNT(*) for
+    "N total", a date_hierarchy that doesn't scan the table, and search through indexes
+    instead of icontains scans.
+    `user_search_fields` names the user columns (or 'pk' for the user table itself)
+    that a search term is resolved against.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/accounts/large_change_list.html' # date_hierarchy without SELECT DISTINCT
+    user_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not self.user_search_fields:
+            return super().get_search_results(request, queryset, search_term)
+        within = queryset if queryset.model is UserProfile else None # The user list: match only the filtered users
+        user_ids = matching_user_ids(search_term, within)
+        if user_ids is None: # No full-text index on this backend: Django's search_fields
+            return super().get_search_results(request, queryset, search_term)
+        if len(user_ids) > ADMIN_SEARCH_LIMIT:
+            user_ids = user_ids[:ADMIN_SEARCH_LIMIT]
+            self.message_user(request, (
+                f"More than {ADMIN_SEARCH_LIMIT:,} users match this search; only results for the best "
+                f"{ADMIN_SEARCH_LIMIT:,} matches are listed. Add words or filters to narrow it."
+            ), level=messages.WARNING)
+        condition = Q()
+        for field in self.user_search_fields:
+            condition |= Q(**{f'{field}__in': user_ids})
+        return queryset.filter(condition), False
+
 
 # Custom User Admin
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     # Specify the form to use for adding and changing user instances
     # We might not need a custom form here if UserProfileForm is for frontend only
     # If you have an admin-specific form, define it: form = YourAdminUserChangeForm, add_form = YourAdminUserCreationForm
 
     # The fields to be used in displaying the User model.
     # These override the defaults in UserAdmin.
+    # Kept to columns of the user row itself (no joins); full details are on the change page.
     list_display = (
-        'username', 'email', 'first_name', 'last_name',
-        'is_staff', 'is_active', 'date_joined', 'is_premium',
+        'username', 'email', 'first_name', 'is_active', 'is_premium',
         'looking_for', # Changed 'user_type' to 'looking_for'
-        'gender', 'location', 'phone_number',
+        'gender', 'location', 'date_joined',
     )
+    # Low-cardinality filters only; date_joined is browsed with date_hierarchy (profile_date_joined_idx).
     list_filter = (
-        'is_staff', 'is_active', 'is_superuser', 'is_premium',
+        'is_active', 'is_staff', 'is_premium',
         'gender', 'looking_for', # Changed 'user_type' to 'looking_for'
-        'seeking', 'date_joined',
     )
+    date_hierarchy = 'date_joined'
+    sortable_by = ('username', 'email', 'date_joined') # Indexed columns; sorting on the others sorts the whole table
+    # Searches go to the full-text index (LargeTableAdminMixin); an address containing '@' is matched exactly.
     search_fields = ('username', 'email', 'first_name', 'last_name', 'location')
+    search_help_text = 'Username, name, location or bio words (prefix match), or an exact email address.'
+    user_search_fields = ('pk',)
     ordering = ('-date_joined',)
+    # Bulk moderation runs as a background job (accounts/moderation.py); Django's delete_selected is replaced.
+    actions = ('ban_users', 'delete_users', 'purge_user_images')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None) # Runs the cascade collector in the request; times out on spam waves
+        return actions
+
+    def _moderation_targets(self, request, queryset):
+        """Selected ids minus staff and the moderator themself, and how many were left out."""
+        selected = set(queryset.values_list('pk', flat=True))
+        targets = set(
+            queryset.filter(is_staff=False, is_superuser=False).exclude(pk=request.user.pk).values_list('pk', flat=True)
+        )
+        return targets, len(selected) - len(targets)
+
+    @admin.action(description='Ban selected users (background)', permissions=['change'])
+    def ban_users(self, request, queryset):
+        start_moderation_job(self, request, 'ban', *self._moderation_targets(request, queryset))
+
+    @admin.action(description='Delete selected users (background)', permissions=['delete'])
+    def delete_users(self, request, queryset):
+        start_moderation_job(self, request, 'delete', *self._moderation_targets(request, queryset))
+
+    @admin.action(description="Purge selected users' images (background)", permissions=['change'])
+    def purge_user_images(self, request, queryset):
+        start_moderation_job(self, request, 'purge_images', *self._moderation_targets(request, queryset))
 
     # Fieldsets for editing an existing user
     fieldsets = (
@@ -57,9 +192,20 @@ admin.site.register(UserProfile, CustomUserAdmin)
 class ProfileImageAdmin(admin.ModelAdmin):
     list_display = ('user_profile', 'image', 'is_main', 'order', 'uploaded_at')
     list_filter = ('is_main',)
+    list_select_related = ('user_profile',)
     search_fields = ('user_profile__username',)
-    raw_id_fields = ('user_profile',) # Use raw_id_fields for ForeignKey to show ID, good for large datasets
+    autocomplete_fields = ('user_profile',) # Searches users through CustomUserAdmin's indexed search
     list_editable = ('is_main', 'order') # Allow editing these directly in the list view
+    actions = ('delete_images',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None) # One os.remove per row inside the request
+        return actions
+
+    @admin.action(description='Delete selected images (background)', permissions=['delete'])
+    def delete_images(self, request, queryset):
+        start_moderation_job(self, request, 'delete_images', list(queryset.values_list('pk', flat=True)))
 
 @admin.register(SubscriptionPlan)
 class SubscriptionPlanAdmin(admin.ModelAdmin):
@@ -78,13 +224,64 @@ class UserSubscriptionAdmin(admin.ModelAdmin):
         'user__username', 'plan__name', 'paystack_authorization_code',
         'paystack_subscription_code', 'paystack_email_token' # Added Paystack fields
     )
-    raw_id_fields = ('user', 'plan')
+    list_select_related = ('user', 'plan')
+    autocomplete_fields = ('user', 'plan')
 
 @admin.register(PaymentTransaction)
 class PaymentTransactionAdmin(admin.ModelAdmin):
     list_display = ('user', 'plan', 'amount', 'status', 'reference', 'created_at')
     list_filter = ('status', 'plan')
     search_fields = ('user__username', 'plan__name', 'reference')
-    raw_id_fields = ('user', 'plan')
+    list_select_related = ('user', 'plan')
+    autocomplete_fields = ('user', 'plan')
     readonly_fields = ('created_at', 'updated_at', 'gateway_response')
 
+@admin.register(PaystackWebhookEvent)
+class PaystackWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'reference', 'received_at', 'processed_at', 'error')
+    list_filter = ('event',)
+    search_fields = ('reference',)
+    readonly_fields = ('event', 'reference', 'payload', 'received_at', 'processed_at', 'error') # The inbox is append-only
+
+@admin.register(Like)
+class LikeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('liker', 'liked_user', 'timestamp')
+    list_select_related = ('liker', 'liked_user')
+    date_hierarchy = 'timestamp' # like_timestamp_idx
+    search_fields = ('liker__username', 'liked_user__username')
+    search_help_text = 'Likes given or received by the matching users.'
+    user_search_fields = ('liker', 'liked_user') # Served by the (liker, liked_user) and like_received_idx indexes
+    autocomplete_fields = ('liker', 'liked_user')
+    sortable_by = ('timestamp',)
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('recipient', 'notification_type', 'short_message', 'actor_count', 'is_read', 'created_at')
+    list_filter = ('notification_type', 'is_read')
+    list_select_related = ('recipient',)
+    date_hierarchy = 'created_at' # notif_created_idx
+    search_fields = ('recipient__username', 'sender__username')
+    search_help_text = 'Notifications sent to or by the matching users.'
+    user_search_fields = ('recipient', 'sender')
+    autocomplete_fields = ('recipient', 'sender')
+    sortable_by = ('created_at',)
+
+    @admin.display(description='Message')
+    def short_message(self, obj):
+        return obj.message[:80]
+
+@admin.register(ModerationJob)
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'action', 'status', 'progress', 'requested_by', 'created_at', 'updated_at', 'finished_at')
+    list_filter = ('action', 'status')
+    list_select_related = ('requested_by',)
+    exclude = ('target_ids',) # Can be thousands of ids
+    readonly_fields = ('action', 'status', 'progress', 'total', 'processed', 'error', 'requested_by', 'created_at', 'updated_at', 'finished_at')
+
+    @admin.display(description='Progress')
+    def progress(self, obj):
+        percent = 100 * obj.processed // obj.total if obj.total else 100
+        return f"{obj.processed}/{obj.total} ({percent}%)"
+
+    def has_add_permission(self, request):
+        return False # Jobs are started from the user and image admin actions
@@ -0,0 +1,226 @@
+# accounts/analytics.py
+"""
+Revenue and engagement reporting.
+
+The raw tables (PaymentTransaction, UserSubscription, Like, UserProfile) are aggregated
+in the database with GROUP BY into the daily rollup tables DailyRevenueRollup and
+DailyEngagementRollup. Each run recomputes only the days since the last one (see
+RollupWatermark). Reports then read the small rollup tables and fold days into
+weeks/months, also in SQL. Results are iterated row by row and written out as CSV or JSON
+lines, so a long report never sits in memory (aiter_report does the same for ASGI).
+
+Used by `manage.py analytics` and the staff report page (views.analytics_report_view).
+"""
+
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek, Trim
+from django.utils import timezone
+
+from .models import (
+    DailyEngagementRollup, DailyRevenueRollup, Like, PaymentTransaction, RollupWatermark,
+    SubscriptionPlan, UserProfile, UserSubscription,
+)
+
+PERIODS = ('day', 'week', 'month')
+FORMATS = ('csv', 'jsonl')
+
+
+def day_start(day):
+    """Aware datetime for local midnight at the start of `day`."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _local_date(value):
+    return timezone.localdate(value) if value else None
+
+
+def _city(field):
+    return Coalesce(Trim(field), Value(''))
+
+
+# --- Rollups ---
+
+def rollup_revenue(start, end):
+    """Recomputes DailyRevenueRollup for days start..end (inclusive)."""
+    since, until = day_start(start), day_start(end + timedelta(days=1))
+    rows = {}
+    payments = (
+        PaymentTransaction.objects.filter(status='success', created_at__gte=since, created_at__lt=until)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'plan_id')
+        .annotate(payments=Count('pk'), revenue=Sum('amount'))
+    )
+    for row in payments:
+        rows[(row['day'], row['plan_id'])] = {'payments': row['payments'], 'revenue': row['revenue']}
+
+    # Subscriptions overlapping each day; one small GROUP BY per day (incremental runs cover a day or two).
+    day = start
+    while day <= end:
+        active = (
+            UserSubscription.objects.filter(plan__isnull=False, start_date__lt=day_start(day + timedelta(days=1)), end_date__gt=day_start(day))
+            .values('plan_id')
+            .annotate(subscribers=Count('pk'))
+        )
+        for row in active:
+            rows.setdefault((day, row['plan_id']), {})['subscribers'] = row['subscribers']
+        day += timedelta(days=1)
+
+    plan_names = dict(SubscriptionPlan.objects.values_list('id', 'name'))
+    with transaction.atomic():
+        DailyRevenueRollup.objects.filter(day__gte=start, day__lte=end).delete()
+        DailyRevenueRollup.objects.bulk_create([
+            DailyRevenueRollup(
+                day=day,
+                plan_id=plan_id,
+                plan_name=plan_names.get(plan_id, 'Deleted plan'),
+                payments=values.get('payments', 0),
+                revenue=values.get('revenue') or 0,
+                subscribers=values.get('subscribers', 0),
+            )
+            for (day, plan_id), values in rows.items()
+        ], batch_size=1000)
+    return len(rows)
+
+
+def rollup_engagement(start, end):
+    """Recomputes DailyEngagementRollup for days start..end (inclusive)."""
+    since, until = day_start(start), day_start(end + timedelta(days=1))
+    # A like completes a match if the reverse like already existed.
+    reverse_like_before = Like.objects.filter(
+        liker=OuterRef('liked_user'), liked_user=OuterRef('liker'),
+    ).filter(Q(timestamp__lt=OuterRef('timestamp')) | Q(timestamp=OuterRef('timestamp'), pk__lt=OuterRef('pk')))
+
+    rows = {}
+    likes = (
+        Like.objects.filter(timestamp__gte=since, timestamp__lt=until)
+        .annotate(day=TruncDate('timestamp'), city=_city('liked_user__location'))
+        .values('day', 'city')
+        .annotate(likes=Count('pk'), matches=Count('pk', filter=Exists(reverse_like_before)))
+    )
+    for row in likes:
+        rows[(row['day'], row['city'][:100])] = {'likes': row['likes'], 'matches': row['matches']}
+
+    signups = (
+        UserProfile.objects.filter(date_joined__gte=since, date_joined__lt=until)
+        .annotate(day=TruncDate('date_joined'), city=_city('location'))
+        .values('day', 'city')
+        .annotate(signups=Count('pk'))
+    )
+    for row in signups:
+        rows.setdefault((row['day'], row['city'][:100]), {})['signups'] = row['signups']
+
+    with transaction.atomic():
+        DailyEngagementRollup.objects.filter(day__gte=start, day__lte=end).delete()
+        DailyEngagementRollup.objects.bulk_create([
+            DailyEngagementRollup(day=day, city=city, **values)
+            for (day, city), values in rows.items()
+        ], batch_size=1000)
+    return len(rows)
+
+
+def _earliest_revenue_day():
+    return _local_date(PaymentTransaction.objects.aggregate(first=Min('created_at'))['first'])
+
+
+def _earliest_engagement_day():
+    first_like = Like.objects.aggregate(first=Min('timestamp'))['first']
+    first_signup = UserProfile.objects.aggregate(first=Min('date_joined'))['first']
+    return _local_date(min(filter(None, [first_like, first_signup]), default=None))
+
+
+ROLLUPS = {
+    'revenue': (rollup_revenue, _earliest_revenue_day),
+    'engagement': (rollup_engagement, _earliest_engagement_day),
+}
+
+
+def update_rollups(names=None, rebuild=False, until=None):
+    """
+    Brings the rollups up to date through `until` (default: today).
+    Each restarts from its watermark day (that day may have been partial), or from the
+    first raw row when rebuilding. Returns {name: rows written}.
+    """
+    until = until or timezone.localdate()
+    written = {}
+    for name in names or ROLLUPS:
+        rollup, earliest = ROLLUPS[name]
+        watermark = None if rebuild else RollupWatermark.objects.filter(name=name).first()
+        start = watermark.rolled_through if watermark else earliest()
+        if start is None or start > until:
+            written[name] = 0
+            continue
+        written[name] = rollup(start, until)
+        RollupWatermark.objects.update_or_create(name=name, defaults={'rolled_through': until})
+    return written
+
+
+# --- Reports (read the rollups only) ---
+
+def _period(period):
+    return {'day': F('day'), 'week': TruncWeek('day'), 'month': TruncMonth('day')}[period]
+
+
+def revenue_report(since, until, period='day'):
+    return (
+        DailyRevenueRollup.objects.filter(day__gte=since, day__lte=until)
+        .annotate(period=_period(period))
+        .values('period', 'plan_name')
+        .annotate(payments=Sum('payments'), revenue=Sum('revenue'), subscribers=Max('subscribers'))
+        .order_by('period', 'plan_name')
+    )
+
+
+def engagement_report(since, until, period='day'):
+    return (
+        DailyEngagementRollup.objects.filter(day__gte=since, day__lte=until)
+        .annotate(period=_period(period))
+        .values('period', 'city')
+        .annotate(likes=Sum('likes'), matches=Sum('matches'), signups=Sum('signups'))
+        .order_by('period', 'city')
+    )
+
+
+REPORTS = {
+    'revenue': (revenue_report, ['period', 'plan_name', 'payments', 'revenue', 'subscribers']),
+    'engagement': (engagement_report, ['period', 'city', 'likes', 'matches', 'signups']),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _formatter(fields, output_format):
+    """Returns (header lines, function turning a row into a line) for the output format."""
+    if output_format == 'csv':
+        writer = csv.writer(_Echo())
+        return [writer.writerow(fields)], lambda row: writer.writerow([row[field] for field in fields])
+    return [], lambda row: json.dumps({field: row[field] for field in fields}, cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_report(report, since, until, period='day', output_format='csv'):
+    """Yields the report as text lines (CSV with a header row, or one JSON object per line)."""
+    build, fields = REPORTS[report]
+    header, line = _formatter(fields, output_format)
+    yield from header
+    for row in build(since, until, period).iterator(chunk_size=2000):
+        yield line(row)
+
+
+async def aiter_report(report, since, until, period='day', output_format='csv'):
+    """iter_report for ASGI responses, which buffer a sync iterator whole."""
+    build, fields = REPORTS[report]
+    header, line = _formatter(fields, output_format)
+    for text in header:
+        yield text
+    async for row in build(since, until, period).aiterator(chunk_size=2000):
+        yield line(row)
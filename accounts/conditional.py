@@ -0,0 +1,141 @@
+# accounts/conditional.py
+"""
+Conditional GET for the profile page and the browse page/feed.
+
+A response's ETag is a hash of everything it is rendered from:
+  - the profiles shown: UserProfile.updated_at, which every save bumps and which the
+    receivers below bump on gallery changes. A list uses Count + Max(updated_at) over its
+    candidate set, which changes when a profile joins, leaves or changes.
+  - the viewer's like state: count and latest timestamp of the likes by and of that user,
+    read from the Like table so that every worker computes the same value.
+  - for HTML pages, the per-viewer parts of base.html: unread badge, plan, CSRF cookie.
+A client that sends the ETag back in If-None-Match gets a 304 without a body, and the view
+skips building the cards and rendering the template.
+
+Pages with pending flash messages are always rendered, because rendering them consumes
+the messages.
+"""
+
+import functools
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .entitlements import aget_entitlements, get_entitlements
+from .models import Like, ProfileImage, UserProfile
+from .notifications import get_unread_count
+
+
+def like_state_version(user_id):
+    """
+    (count, latest timestamp) of the likes given and of the likes received by `user_id`.
+    Read from the table, so every worker agrees: a like adds a newer timestamp and an unlike
+    lowers a count. The received half is served by like_received_idx.
+    """
+    return (
+        _like_version(Like.objects.filter(liker_id=user_id).aggregate(count=Count('pk'), latest=Max('timestamp'))),
+        _like_version(Like.objects.filter(liked_user_id=user_id).aggregate(count=Count('pk'), latest=Max('timestamp'))),
+    )
+
+
+async def alike_state_version(user_id):
+    return (
+        _like_version(await Like.objects.filter(liker_id=user_id).aaggregate(count=Count('pk'), latest=Max('timestamp'))),
+        _like_version(await Like.objects.filter(liked_user_id=user_id).aaggregate(count=Count('pk'), latest=Max('timestamp'))),
+    )
+
+
+def _like_version(aggregate):
+    return aggregate['count'], aggregate['latest']
+
+
+@receiver(post_save, sender=ProfileImage, dispatch_uid='conditional_image_saved')
+@receiver(post_delete, sender=ProfileImage, dispatch_uid='conditional_image_deleted')
+def _gallery_changed(sender, instance, **kwargs):
+    # Profile pages and cards show the gallery: the owner's validator has to move with it.
+    UserProfile.objects.filter(pk=instance.user_profile_id).update(updated_at=timezone.now())
+
+
+# --- Validators ---
+
+def candidates_version(queryset):
+    """(count, latest updated_at) of a candidate queryset."""
+    version = queryset.order_by().aggregate(count=Count('pk'), latest=Max('updated_at'))
+    return version['count'], version['latest']
+
+
+async def acandidates_version(queryset):
+    version = await queryset.order_by().aaggregate(count=Count('pk'), latest=Max('updated_at'))
+    return version['count'], version['latest']
+
+
+@functools.cache
+def assets_version():
+    """Hash of the collectstatic manifest (hashed asset names), '' without one. Fixed for the process's lifetime."""
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    return hashlib.md5(repr(sorted(hashed_files.items())).encode()).hexdigest() if hashed_files else ''
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def _common_parts(request):
+    user = request.user
+    return (
+        request.get_full_path(),
+        user.pk, user.updated_at,
+        timezone.localdate(), # Ages on the cards move at midnight
+        assets_version(), # A deploy with new assets changes every page
+    )
+
+
+def page_etag(request, *parts):
+    """ETag of an HTML page for request.user, built from `parts` plus the viewer's state and base.html chrome."""
+    user = request.user
+    entitlements = get_entitlements(request)
+    return make_etag(
+        *_common_parts(request),
+        like_state_version(user.pk),
+        get_unread_count(user.pk),
+        entitlements.is_premium, sorted(entitlements.features),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME), # Forms on the page carry the CSRF token
+        *parts,
+    )
+
+
+async def afeed_etag(request, *parts):
+    """ETag of a JSON feed for request.user (no page chrome)."""
+    entitlements = await aget_entitlements(request)
+    return make_etag(
+        *_common_parts(request),
+        await alike_state_version(request.user.pk),
+        sorted(entitlements.features),
+        *parts,
+    )
+
+
+def not_modified(request, etag, page=True):
+    """
+    A 304 (or 412) response if the client's copy is current, else None: render as usual.
+    page=False for JSON, which doesn't show (or consume) flash messages.
+    """
+    if page and len(get_messages(request)): # len() doesn't mark the messages as read
+        return None
+    response = get_conditional_response(request, etag=etag)
+    return with_validators(response, etag) if response is not None else None
+
+
+def with_validators(response, etag):
+    response['ETag'] = etag
+    # Per-user content: browsers may keep it, but must revalidate before every reuse.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,34 @@
+# accounts/consumers.py
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .notifications import user_group_name
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes like, match and subscription notifications to the logged-in user.
+    Clients only listen; anything they send is ignored.
+    """
+    group_name = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401) # Not logged in
+            return
+
+        self.group_name = user_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        pass
+
+    async def notification_message(self, event):
+        """Handler for {'type': 'notification.message'} events sent by notifications.push_notifications()."""
+        await self.send_json({'type': 'notification', 'notification': event['notification'], 'unread_count': event['unread_count']})
@@ -0,0 +1,28 @@
+# accounts/context_processors.py
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .entitlements import get_entitlements
+from .notifications import get_unread_count
+
+
+def notifications(request):
+    """
+    Exposes the unread badge count to every template.
+    Passed as a callable so pages that don't show the nav never touch the cache.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'unread_notifications_count': 0}
+    return {'unread_notifications_count': lambda: get_unread_count(user.id)}
+
+
+def entitlements(request):
+    """Exposes `entitlements` (see accounts/entitlements.py); resolved only if a template reads it."""
+    return {'entitlements': SimpleLazyObject(lambda: get_entitlements(request))}
+
+
+def static_assets(request):
+    """Whether base.html loads the Tailwind Play CDN or the compiled stylesheet (settings.TAILWIND_PLAY_CDN)."""
+    return {'tailwind_play_cdn': settings.TAILWIND_PLAY_CDN}
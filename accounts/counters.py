@@ -0,0 +1,117 @@
+# accounts/counters.py
+"""
+Denormalized counters on UserProfile: likes_received_count, likes_given_count,
+matches_count and gallery_images_count.
+
+Signal handlers on Like and ProfileImage adjust them with a single F() UPDATE. The
+handlers run inside whatever transaction creates or deletes the row, so a counter commits
+or rolls back with it. Reading a count is then a column read instead of a COUNT(*).
+matches_count is also recounted for both users once the transaction commits: a match made
+by two concurrent likes is invisible to both handlers (see _recount_matches_on_commit).
+Cascade deletes (e.g. deleting an account) go through the same handlers. Anything that
+bypasses signals (raw SQL, bulk_create) can cause drift, which
+`manage.py reconcile_counters` recomputes. Bulk moderation (accounts/moderation.py) deletes
+without signals on purpose and calls recount() for the profiles it touched.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Like, ProfileImage, UserProfile
+
+COUNTER_FIELDS = ('likes_received_count', 'likes_given_count', 'matches_count', 'gallery_images_count')
+
+
+def adjust(user_ids, **deltas):
+    """Adds each delta to the named counters of `user_ids` in one UPDATE, never going below zero."""
+    UserProfile.objects.filter(pk__in=user_ids).update(**{
+        field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()
+    })
+
+
+def _count_of(queryset, field):
+    """Correlated COUNT(*) of `queryset` rows whose `field` is the outer profile."""
+    counted = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def true_counts():
+    """{counter field: expression computing its true value for the outer profile}."""
+    mutual = Like.objects.filter(Exists(Like.objects.filter(liker=OuterRef('liked_user'), liked_user=OuterRef('liker'))))
+    return {
+        'likes_received_count': _count_of(Like.objects.all(), 'liked_user'),
+        'likes_given_count': _count_of(Like.objects.all(), 'liker'),
+        'matches_count': _count_of(mutual, 'liker'), # One mutual pair = one outgoing like in it per side
+        'gallery_images_count': _count_of(ProfileImage.objects.all(), 'user_profile'),
+    }
+
+
+def recount(user_ids, batch_size=1000, fields=COUNTER_FIELDS):
+    """Recomputes the counters `fields` (default: all) of `user_ids` from the tables, one UPDATE per batch."""
+    user_ids = list(user_ids)
+    expressions = {field: expression for field, expression in true_counts().items() if field in fields}
+    for start in range(0, len(user_ids), batch_size):
+        UserProfile.objects.filter(pk__in=user_ids[start:start + batch_size]).update(**expressions)
+
+
+def _is_mutual(like):
+    return Like.objects.filter(liker_id=like.liked_user_id, liked_user_id=like.liker_id).exists()
+
+
+def _recount_matches_on_commit(like):
+    # Two users liking (or unliking) each other at once each miss the other's uncommitted
+    # row, so the match isn't counted (or is ended twice). Whichever commits last recounts
+    # with both rows visible.
+    user_ids = [like.liker_id, like.liked_user_id]
+    transaction.on_commit(lambda: recount(user_ids, fields=['matches_count']))
+
+
+@receiver(post_save, sender=Like)
+def _like_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    adjust([instance.liker_id], likes_given_count=1)
+    adjust([instance.liked_user_id], likes_received_count=1)
+    if _is_mutual(instance): # This like completed a match
+        adjust([instance.liker_id, instance.liked_user_id], matches_count=1)
+    _recount_matches_on_commit(instance)
+
+
+@receiver(pre_delete, sender=Like)
+def _like_deleting(sender, instance, **kwargs):
+    instance._was_mutual = _is_mutual(instance)
+
+
+@receiver(post_delete, sender=Like)
+def _like_deleted(sender, instance, **kwargs):
+    adjust([instance.liker_id], likes_given_count=-1)
+    adjust([instance.liked_user_id], likes_received_count=-1)
+    if getattr(instance, '_was_mutual', False):
+        if _is_mutual(instance):
+            # Unlike: the other half is still there, so the match ends for both sides.
+            adjust([instance.liker_id, instance.liked_user_id], matches_count=-1)
+        else:
+            # Both halves deleted together (account deletion cascades): each half
+            # settles its own liker's side.
+            adjust([instance.liker_id], matches_count=-1)
+    _recount_matches_on_commit(instance)
+
+
+@receiver(post_save, sender=ProfileImage)
+def _gallery_image_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust([instance.user_profile_id], gallery_images_count=1)
+
+
+@receiver(post_delete, sender=ProfileImage)
+def _gallery_image_deleted(sender, instance, **kwargs):
+    adjust([instance.user_profile_id], gallery_images_count=-1)
@@ -0,0 +1,24 @@
+# accounts/decorators.py
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def async_login_required(view_func):
+    """
+    Async counterpart of django.contrib.auth.decorators.login_required.
+
+    The stock decorator (Django 4.2) only wraps sync views. Resolving request.user
+    touches the session and user tables, so it is done once in a worker thread;
+    afterwards request.user is cached on the request and safe to read from the view.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+
+    return _wrapped_view
@@ -0,0 +1,170 @@
+# accounts/entitlements.py
+"""
+What a user's plan lets them do, resolved in one place.
+
+A user's Entitlements (premium or not, plan, expiry, feature keys) are built from
+UserProfile's premium flags, their active UserSubscription and its
+SubscriptionPlan.features. The result is cached per user and memoized on the request,
+so gates in views and templates cost nothing after the first lookup. The cache entry is
+dropped whenever a subscription, plan or the premium flags change.
+
+Gate on a feature key, not on is_premium:
+
+    if get_entitlements(request).has(WHATSAPP_CONTACT): ...
+    {% if entitlements.is_premium %} / {% if 'whatsapp_contact' in entitlements %}
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import SubscriptionPlan, UserProfile, UserSubscription
+
+# Feature keys. Every premium user gets PREMIUM_FEATURES; a plan can grant more by listing
+# the key (or a label that slugifies to it, e.g. "Whatsapp contact") in SubscriptionPlan.features.
+WHATSAPP_CONTACT = 'whatsapp_contact'
+SEE_WHO_LIKED_YOU = 'see_who_liked_you'
+
+PREMIUM_FEATURES = frozenset({WHATSAPP_CONTACT, SEE_WHO_LIKED_YOU})
+
+ENTITLEMENTS_TIMEOUT = 60 * 60 # Upper bound on staleness if an invalidation is ever missed
+
+_REQUEST_ATTR = '_entitlements'
+
+
+def feature_key(label):
+    return slugify(label).replace('-', '_')
+
+
+class Entitlements:
+    """Immutable snapshot of one user's entitlements. Plain values only, so it pickles into the cache."""
+
+    __slots__ = ('is_premium', 'plan_name', 'expires_at', 'features')
+
+    def __init__(self, is_premium=False, plan_name=None, expires_at=None, features=frozenset()):
+        self.is_premium = is_premium
+        self.plan_name = plan_name
+        self.expires_at = expires_at
+        self.features = frozenset(features)
+
+    def __getstate__(self):
+        return (self.is_premium, self.plan_name, self.expires_at, self.features)
+
+    def __setstate__(self, state):
+        self.is_premium, self.plan_name, self.expires_at, self.features = state
+
+    def has(self, feature):
+        return feature in self.features
+
+    def __contains__(self, feature):
+        return self.has(feature)
+
+    @property
+    def is_current(self):
+        """False once the premium period it was built for has run out (the sweeper may not have run yet)."""
+        return self.expires_at is None or self.expires_at > timezone.now()
+
+
+NO_ENTITLEMENTS = Entitlements()
+
+
+def entitlements_key(user_id):
+    return f'entitlements:{user_id}'
+
+
+def resolve(user):
+    """
+    Builds Entitlements from the database: at most one query, for the active subscription and plan.
+    The result is cached, so it is always read from the primary, never from a lagging replica.
+    """
+    now = timezone.now()
+    if user._state.db not in (None, DEFAULT_DB_ALIAS):
+        # request.user came from a replica (see loveny_project/replicas.py); re-read the premium flags.
+        user = UserProfile.objects.using(DEFAULT_DB_ALIAS).only('is_premium', 'premium_expiry_date').get(pk=user.pk)
+    if not user.is_premium or (user.premium_expiry_date and user.premium_expiry_date <= now):
+        return NO_ENTITLEMENTS
+
+    subscription = (
+        UserSubscription.objects.using(DEFAULT_DB_ALIAS)
+        .filter(user_id=user.pk, is_active=True, end_date__gt=now)
+        .values('plan__name', 'plan__features', 'end_date')
+        .first()
+    )
+    features = set(PREMIUM_FEATURES)
+    plan_name = None
+    expires_at = user.premium_expiry_date
+    if subscription:
+        plan_name = subscription['plan__name']
+        features.update(feature_key(label) for label in subscription['plan__features'] or [] if isinstance(label, str))
+        expires_at = min(filter(None, [expires_at, subscription['end_date']]))
+    return Entitlements(True, plan_name, expires_at, features)
+
+
+def for_user(user):
+    """Cached Entitlements for `user` (anonymous users get none)."""
+    if not user.is_authenticated:
+        return NO_ENTITLEMENTS
+    entitlements = cache.get(entitlements_key(user.pk))
+    if entitlements is None or not entitlements.is_current:
+        entitlements = resolve(user)
+        cache.set(entitlements_key(user.pk), entitlements, ENTITLEMENTS_TIMEOUT)
+    return entitlements
+
+
+async def afor_user(user):
+    if not user.is_authenticated:
+        return NO_ENTITLEMENTS
+    entitlements = await cache.aget(entitlements_key(user.pk))
+    if entitlements is None or not entitlements.is_current:
+        entitlements = await sync_to_async(resolve)(user)
+        await cache.aset(entitlements_key(user.pk), entitlements, ENTITLEMENTS_TIMEOUT)
+    return entitlements
+
+
+def get_entitlements(request):
+    """Entitlements of request.user, resolved at most once per request."""
+    entitlements = getattr(request, _REQUEST_ATTR, None)
+    if entitlements is None:
+        entitlements = for_user(request.user)
+        setattr(request, _REQUEST_ATTR, entitlements)
+    return entitlements
+
+
+async def aget_entitlements(request):
+    entitlements = getattr(request, _REQUEST_ATTR, None)
+    if entitlements is None:
+        entitlements = await afor_user(request.user)
+        setattr(request, _REQUEST_ATTR, entitlements)
+    return entitlements
+
+
+# --- Invalidation ---
+
+def invalidate(user_ids):
+    """Drops cached entitlements for `user_ids` once the current transaction commits."""
+    keys = [entitlements_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def _subscription_changed(sender, instance, **kwargs):
+    invalidate([instance.user_id])
+
+
+@receiver(post_save, sender=UserProfile)
+def _profile_changed(sender, instance, update_fields=None, **kwargs):
+    # Most profile saves (last_login, bio, ...) don't touch the premium flags.
+    if update_fields is None or {'is_premium', 'premium_expiry_date'} & set(update_fields):
+        invalidate([instance.pk])
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(pre_delete, sender=SubscriptionPlan) # Before delete, while subscriptions still point at it
+def _plan_changed(sender, instance, **kwargs):
+    invalidate(UserSubscription.objects.filter(plan_id=instance.pk).values_list('user_id', flat=True))
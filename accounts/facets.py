@@ -0,0 +1,101 @@
+# accounts/facets.py
+"""
+Filter facet counts for the browse UI: how many candidates each gender, looking_for, age
+bucket and location (the most common TOP_LOCATIONS) would return.
+
+Each facet is counted under every filter except its own, so the options of a facet that is
+already filtered on still show what choosing them would return: the gender facet ignores the
+viewer's seeking, the age facet the age range, the location facet the chosen location.
+
+All four facets come from one grouped aggregate (GROUP BY gender, looking_for, age bucket,
+location, plus one boolean column per facet filter telling whether the group passes it),
+folded into per-facet counts in Python, instead of a COUNT(*) per option. The result is
+cached per filter signature, i.e. the viewer's looking_for/seeking plus the request's
+filters, for FACETS_TIMEOUT seconds. Viewers with the same preferences and filters share one
+query. Counts are for that shared candidate set, so they can include the viewer and lag real
+changes by up to FACETS_TIMEOUT.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, Value, When
+from django.utils import timezone
+
+from .models import AGE_BUCKETS, GENDER_CHOICES, LOOKING_FOR_CHOICES
+
+FACETS_TIMEOUT = 60
+TOP_LOCATIONS = 10
+FACETS = ('gender', 'looking_for', 'age_bucket', 'location')
+
+
+def facets_key(looking_for, seeking, filters):
+    """Cache key for one filter signature. `filters` holds plain JSON values (ages, location, attributes)."""
+    signature = json.dumps([looking_for, seeking, str(timezone.localdate()), filters], sort_keys=True) # Buckets move at midnight
+    return 'facets:' + hashlib.md5(signature.encode()).hexdigest()
+
+
+def _choice_counts(counts, choices):
+    return [{'value': value, 'label': label, 'count': counts.get(value, 0)} for value, label in choices]
+
+
+def passes_flag(facet):
+    return f'passes_{facet}'
+
+
+def _passes(row, facets):
+    """Whether a grouped row passes the filters of `facets` (a facet without a filter always passes)."""
+    return all(row.get(passes_flag(facet), True) for facet in facets)
+
+
+def fold(rows):
+    """
+    Per-facet counts from the grouped rows (dicts with the four group keys, `n` and the
+    passes_<facet> flags). Each facet counts the rows passing every other facet's filter.
+    """
+    totals = {facet: {} for facet in FACETS}
+    for row in rows:
+        for facet, counts in totals.items():
+            if not _passes(row, [other for other in FACETS if other != facet]):
+                continue
+            value = row[facet]
+            if facet == 'location':
+                value = (value or '').strip().title() # "lagos " and "Lagos" are one option (the filter is iexact)
+            if value:
+                counts[value] = counts.get(value, 0) + row['n']
+    locations = sorted(totals['location'].items(), key=lambda item: (-item[1], item[0]))[:TOP_LOCATIONS]
+    return {
+        'total': sum(row['n'] for row in rows if _passes(row, FACETS)),
+        'gender': _choice_counts(totals['gender'], GENDER_CHOICES),
+        'looking_for': _choice_counts(totals['looking_for'], LOOKING_FOR_CHOICES),
+        'age_bucket': _choice_counts(totals['age_bucket'], [(label, label) for label, _, _ in AGE_BUCKETS]),
+        'location': [{'value': value, 'label': value, 'count': count} for value, count in locations],
+    }
+
+
+def grouped(queryset, conditions):
+    """
+    The single grouped aggregate behind the facets. `conditions` maps a facet to the Q of its
+    filter (None or an empty Q for no filter); each becomes a passes_<facet> column.
+    """
+    flags = {
+        passes_flag(facet): Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+        for facet, condition in conditions.items()
+        if condition
+    }
+    return (
+        queryset.with_age_bucket()
+        .annotate(**flags)
+        .values(*FACETS, *flags)
+        .annotate(n=Count('pk'))
+        .order_by() # No ordering columns in the GROUP BY
+    )
+
+
+async def aget_facets(queryset, conditions, key):
+    facets = await cache.aget(key)
+    if facets is None:
+        facets = fold([row async for row in grouped(queryset, conditions)])
+        await cache.aset(key, facets, FACETS_TIMEOUT)
+    return facets
@@ -0,0 +1,55 @@
+# accounts/management/commands/analytics.py
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        'Updates the daily analytics rollups and streams a report as CSV or JSON lines. '
+        'e.g. "analytics revenue --period week --since 2025-01-01" or "analytics rollup" (from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=['rollup', *analytics.REPORTS])
+        parser.add_argument('--period', choices=analytics.PERIODS, default='day')
+        parser.add_argument('--since', type=date.fromisoformat, help='First day (YYYY-MM-DD). Default: 30 days ago.')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day (YYYY-MM-DD). Default: today.')
+        parser.add_argument('--format', dest='output_format', choices=analytics.FORMATS, default='csv')
+        parser.add_argument('--output', help='Write to this file instead of stdout.')
+        parser.add_argument(
+            '--no-rollup',
+            action='store_true',
+            help='Report from the rollups as they are, without bringing them up to date first.'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute the rollups from the first raw row instead of from the last run.'
+        )
+
+    def handle(self, *args, **options):
+        report = options['report']
+        until = options['until'] or timezone.localdate()
+        since = options['since'] or until - timedelta(days=30)
+        if since > until:
+            raise CommandError("--since must not be after --until.")
+
+        if report == 'rollup' or not options['no_rollup']:
+            names = None if report == 'rollup' else [report]
+            written = analytics.update_rollups(names, rebuild=options['rebuild'])
+            self.stderr.write(', '.join(f"{name}: {count} rollup row(s)" for name, count in written.items()))
+        if report == 'rollup':
+            return
+
+        lines = analytics.iter_report(report, since, until, options['period'], options['output_format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
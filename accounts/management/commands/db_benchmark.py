@@ -0,0 +1,149 @@
+# accounts/management/commands/db_benchmark.py
+
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.models import Like, UserProfile
+from accounts.views import _browse_queryset, _toggle_like
+from loveny_project.database import is_locked_error
+
+BENCH_PREFIX = 'dbbench_'
+SCRATCH_MARKERS = ('bench', 'scratch', 'test')
+
+
+def is_scratch_database(settings_dict):
+    """True for an in-memory SQLite database, one in the temp directory, or one whose name says it's disposable."""
+    name = str(settings_dict.get('NAME') or '')
+    if settings_dict['ENGINE'] == 'django.db.backends.sqlite3':
+        if name == ':memory:' or 'mode=memory' in name:
+            return True
+        if os.path.abspath(name).startswith(os.path.abspath(tempfile.gettempdir()) + os.sep):
+            return True
+        name = os.path.splitext(os.path.basename(name))[0]
+    return any(marker in name.lower() for marker in SCRATCH_MARKERS)
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs concurrent browse readers and like/unlike writers against the configured database '
+        'and reports throughput, latency and lock errors. Creates and removes its own dbbench_* users, '
+        'so it only runs against a scratch database unless --allow-live is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--users', type=int, default=200, help='Benchmark users to create (default: 200).')
+        parser.add_argument(
+            '--allow-live', action='store_true',
+            help='Run against a database that does not look like a scratch copy (the benchmark writes to it).',
+        )
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        if not options['allow_live'] and not is_scratch_database(settings_dict):
+            raise CommandError(
+                f"Refusing to benchmark {settings_dict['NAME']!r}: it creates and deletes users and likes. "
+                "Point DATABASE_URL at a scratch database (in-memory, in the temp directory, or with "
+                "'bench', 'scratch' or 'test' in its name), or pass --allow-live."
+            )
+        self.stdout.write(f"Engine: {settings_dict['ENGINE']}, OPTIONS: {settings_dict.get('OPTIONS')}")
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = {}
+                for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size'):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    pragmas[pragma] = cursor.fetchone()[0]
+            self.stdout.write(f"SQLite pragmas: {pragmas}")
+
+        users = self.create_users(options['users'])
+        try:
+            results = self.run(users, options['readers'], options['writers'], options['seconds'])
+        finally:
+            UserProfile.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+        for role, stats in results.items():
+            latencies = sorted(stats['latencies'])
+            if latencies:
+                p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+                summary = (
+                    f"{len(latencies) / options['seconds']:.1f} ops/s, "
+                    f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms"
+                )
+            else:
+                summary = "no successful operations"
+            self.stdout.write(f"{role:>7}: {summary}, {stats['locked']} locked, {stats['errors']} other errors")
+
+    def create_users(self, count):
+        UserProfile.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                username=f'{BENCH_PREFIX}{i}',
+                email=f'{BENCH_PREFIX}{i}@example.invalid',
+                gender='M' if i % 2 else 'F',
+                seeking='A',
+                looking_for='DATING',
+                location='Lagos',
+                date_of_birth=date(1990, 1, 1) + timedelta(days=i),
+                profile_picture=f'{BENCH_PREFIX}{i}.jpg', # Visible to browse; the file never needs to exist
+            )
+            for i in range(count)
+        ], batch_size=500)
+        return list(UserProfile.objects.filter(username__startswith=BENCH_PREFIX))
+
+    def run(self, users, readers, writers, seconds):
+        stop = threading.Event()
+        results = {role: {'latencies': [], 'locked': 0, 'errors': 0} for role in ('reader', 'writer')}
+        lock = threading.Lock()
+
+        def reader(index):
+            viewer = users[index % len(users)]
+            return lambda: list(_browse_queryset(viewer).order_by('-last_login')[:50])
+
+        def writer(index):
+            counter = [index]
+
+            def operation():
+                counter[0] += 1
+                liker = users[counter[0] % len(users)]
+                liked_user = users[(counter[0] * 7 + 1) % len(users)]
+                if liker != liked_user:
+                    _toggle_like(liker, liked_user)
+            return operation
+
+        def loop(role, operation):
+            stats = results[role]
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        operation()
+                    except Exception as e:
+                        with lock:
+                            stats['locked' if is_locked_error(e) else 'errors'] += 1
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        stats['latencies'].append(elapsed)
+            finally:
+                connection.close() # Each thread has its own connection
+
+        threads = [threading.Thread(target=loop, args=('reader', reader(i))) for i in range(readers)]
+        threads += [threading.Thread(target=loop, args=('writer', writer(i))) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        Like.objects.filter(liker__username__startswith=BENCH_PREFIX).delete()
+        return results
@@ -0,0 +1,125 @@
+# accounts/management/commands/expire_subscriptions.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import entitlements
+from accounts.models import Notification, UserProfile, UserSubscription
+from accounts.notifications import bulk_create_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivates expired subscriptions, clears is_premium for their users and sends '
+        'upcoming-expiry reminders. Run from cron every few minutes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows per UPDATE/INSERT batch, to keep each transaction and its locks short (default: 500).'
+        )
+        parser.add_argument(
+            '--remind-days',
+            type=int,
+            default=3,
+            help='Send the reminder this many days before end_date (default: 3).'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        chunk_size = options['chunk_size']
+
+        expired = self.expire_subscriptions(now, chunk_size)
+        demoted = self.expire_premium_flags(now, chunk_size)
+        reminded = self.send_reminders(now, now + timedelta(days=options['remind_days']), chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deactivated {expired} subscription(s), cleared premium on {demoted} profile(s), sent {reminded} reminder(s)."
+        ))
+
+    def expire_subscriptions(self, now, chunk_size):
+        """is_active -> False for subscriptions past end_date, and is_premium -> False for their users."""
+        total = 0
+        while True:
+            # Each pass re-runs the same index range scan; rows updated in the previous pass no longer match.
+            rows = list(
+                UserSubscription.objects.filter(is_active=True, end_date__lte=now)
+                .order_by('end_date')
+                .values_list('id', 'user_id')[:chunk_size]
+            )
+            if not rows:
+                return total
+            subscription_ids = [row[0] for row in rows]
+            user_ids = [row[1] for row in rows]
+            # The date conditions are repeated so a renewal that commits between the SELECT and
+            # the UPDATE (new end_date) is left alone.
+            with transaction.atomic():
+                total += UserSubscription.objects.filter(
+                    id__in=subscription_ids, is_active=True, end_date__lte=now,
+                ).update(is_active=False, updated_at=timezone.now())
+                # updated_at moves the profile's ETag (accounts/conditional.py): the premium badge changes.
+                UserProfile.objects.filter(id__in=user_ids, is_premium=True).filter(
+                    Q(premium_expiry_date__isnull=True) | Q(premium_expiry_date__lte=now)
+                ).update(is_premium=False, updated_at=timezone.now())
+                entitlements.invalidate(user_ids) # .update() sends no signals
+
+    def expire_premium_flags(self, now, chunk_size):
+        """
+        Catches is_premium flags whose own premium_expiry_date passed without a matching
+        subscription row, e.g. premium granted by hand in the admin.
+        """
+        total = 0
+        while True:
+            user_ids = list(
+                UserProfile.objects.filter(is_premium=True, premium_expiry_date__lte=now)
+                .order_by('premium_expiry_date')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                return total
+            total += UserProfile.objects.filter(
+                id__in=user_ids, is_premium=True, premium_expiry_date__lte=now,
+            ).update(is_premium=False, updated_at=timezone.now())
+            entitlements.invalidate(user_ids)
+
+    def send_reminders(self, now, remind_before, chunk_size):
+        """One subscription_reminder per subscription and end date, inserted in bulk."""
+        plans_url = reverse('accounts:choose_plan')
+        total = 0
+        while True:
+            subscriptions = list(
+                UserSubscription.objects.filter(
+                    is_active=True,
+                    end_date__gt=now,
+                    end_date__lte=remind_before,
+                    expiry_reminder_sent_at__isnull=True,
+                )
+                .select_related('plan')
+                .only('id', 'user_id', 'end_date', 'plan__name')
+                .order_by('end_date')[:chunk_size]
+            )
+            if not subscriptions:
+                return total
+            with transaction.atomic():
+                bulk_create_notifications([
+                    Notification(
+                        recipient_id=subscription.user_id,
+                        notification_type='subscription_reminder',
+                        message=(
+                            f"Your {subscription.plan.name if subscription.plan else 'premium'} plan expires on "
+                            f"{timezone.localtime(subscription.end_date):%d %b %Y}. Renew to keep your premium features."
+                        ),
+                        link=plans_url,
+                    )
+                    for subscription in subscriptions
+                ])
+                UserSubscription.objects.filter(id__in=[s.id for s in subscriptions]).update(expiry_reminder_sent_at=now)
+            total += len(subscriptions)
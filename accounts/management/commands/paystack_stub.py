@@ -0,0 +1,50 @@
+# accounts/management/commands/paystack_stub.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.paystack_stub import StubServer
+
+
+class Command(BaseCommand):
+    help = 'Runs a local Paystack stub (initialize/verify/checkout) for offline payment testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0,
+            help='Seconds to wait before answering API calls (to exercise read timeouts).'
+        )
+        parser.add_argument(
+            '--fail-rate',
+            type=float,
+            default=0,
+            help='Fraction (0-1) of API calls answered with HTTP 503 (to exercise retries and the circuit breaker).'
+        )
+        parser.add_argument(
+            '--webhook-url',
+            help='Where to POST signed charge.* events, e.g. http://127.0.0.1:8000/accounts/paystack/webhook/.'
+        )
+
+    def handle(self, *args, **options):
+        server = StubServer(
+            (options['host'], options['port']),
+            delay=options['delay'],
+            fail_rate=options['fail_rate'],
+            webhook_url=options['webhook_url'],
+            secret_key=settings.PAYSTACK_SECRET_KEY or '', # Sign with the key the app verifies with
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Paystack stub listening on {server.public_url}. "
+            f"Set PAYSTACK_BASE_URL={server.public_url} to use it."
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping Paystack stub.")
+        finally:
+            server.server_close()
@@ -0,0 +1,38 @@
+# accounts/management/commands/process_webhook_events.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import PaystackWebhookEvent
+from accounts.payments import process_webhook_event
+
+
+class Command(BaseCommand):
+    help = 'Applies Paystack webhook events that were stored but never processed (e.g. the worker restarted). Run from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60,
+            help='Only pick up events older than this many seconds, leaving fresh ones to the web worker (default: 60).'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        pending = PaystackWebhookEvent.objects.filter(
+            processed_at__isnull=True, received_at__lte=cutoff,
+        ).order_by('received_at').values_list('pk', flat=True)
+
+        processed = failed = 0
+        for event_id in pending.iterator():
+            try:
+                process_webhook_event(event_id)
+                processed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Event {event_id} failed: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} webhook event(s), {failed} failed."))
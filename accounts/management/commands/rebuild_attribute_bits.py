@@ -0,0 +1,20 @@
+# accounts/management/commands/rebuild_attribute_bits.py
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts.models import UserProfile, attribute_bits_expression
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes UserProfile.attribute_bits for every profile with one UPDATE. '
+        'Run it after changing ATTRIBUTE_FILTERS or any of its choices, or after bulk edits that bypass save().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        updated = UserProfile.objects.using(options['database']).update(attribute_bits=attribute_bits_expression())
+        self.stdout.write(f"Updated {updated} profile(s).")
@@ -0,0 +1,17 @@
+# accounts/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text profile search index (accounts/search.py) from the profile table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild_index(using=options['database'])
+        self.stdout.write(f"Indexed {indexed} profile(s).")
@@ -0,0 +1,40 @@
+# accounts/management/commands/reconcile_counters.py
+
+from django.core.management.base import BaseCommand
+
+from accounts.counters import true_counts
+from accounts.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized like/match/gallery counters on UserProfile and fixes any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Profiles per UPDATE batch (default: 1000).')
+
+    def handle(self, *args, **options):
+        expressions = true_counts()
+
+        chunk_size = options['chunk_size']
+        fixed = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                UserProfile.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            # Only profiles whose stored value differs get written.
+            drifted = (
+                UserProfile.objects.filter(pk__in=pks)
+                .annotate(**{f'true_{field}': expression for field, expression in expressions.items()})
+                .values('pk', *expressions, *[f'true_{field}' for field in expressions])
+            )
+            for row in drifted:
+                changes = {field: row[f'true_{field}'] for field in expressions if row[field] != row[f'true_{field}']}
+                if changes:
+                    UserProfile.objects.filter(pk=row['pk']).update(**changes)
+                    fixed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters; {fixed} profile(s) corrected."))
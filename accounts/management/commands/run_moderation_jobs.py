@@ -0,0 +1,34 @@
+# accounts/management/commands/run_moderation_jobs.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import ModerationJob
+from accounts.moderation import run_job
+
+
+class Command(BaseCommand):
+    help = 'Resumes bulk moderation jobs that were queued or interrupted (e.g. the worker restarted). Run from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=300,
+            help='Only pick up jobs without progress for this many seconds, leaving live ones to the web worker (default: 300).'
+        )
+        parser.add_argument('--include-failed', action='store_true', help='Retry failed jobs too.')
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'running'] + (['failed'] if options['include_failed'] else [])
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        stalled = ModerationJob.objects.filter(status__in=statuses, updated_at__lte=cutoff).order_by('created_at')
+
+        for job_id in stalled.values_list('pk', flat=True):
+            try:
+                run_job(job_id)
+                self.stdout.write(f"Job {job_id} done.")
+            except Exception as e:
+                self.stderr.write(f"Job {job_id} failed: {e}")
@@ -0,0 +1,41 @@
+# accounts/management/commands/sync_sqlite_replica.py
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from loveny_project.replicas import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Copies the SQLite primary into the SQLite replica file(s) from DATABASE_REPLICA_URLS. '
+        'For trying the replica router locally; each run simulates replication catching up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Replica aliases to refresh (default: all).')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        aliases = options['aliases'] or replica_aliases(settings.DATABASES)
+        if not aliases:
+            raise CommandError("No replicas configured; set DATABASE_REPLICA_URLS.")
+        for alias in aliases:
+            replica = settings.DATABASES.get(alias)
+            if replica is None or alias == DEFAULT_DB_ALIAS:
+                raise CommandError(f"Unknown replica alias '{alias}'.")
+            if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+                raise CommandError("Only SQLite primaries and replicas can be copied; real replicas replicate themselves.")
+
+            # The online backup API copies a consistent snapshot, even while the primary is being written.
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(f"{alias}: copied {primary['NAME']} -> {replica['NAME']}")
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_alter_userprofile_looking_for_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionplan',
+            name='paystack_plan_code',
+            field=models.CharField(blank=True, help_text='Paystack plan code for recurring subscriptions', max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='usersubscription',
+            name='paystack_authorization_code',
+            field=models.CharField(blank=True, help_text='Authorization code from Paystack for recurring payments', max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='usersubscription',
+            name='paystack_email_token',
+            field=models.CharField(blank=True, help_text='Email token from Paystack for re-authorization if needed', max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='usersubscription',
+            name='paystack_subscription_code',
+            field=models.CharField(blank=True, help_text='Subscription code from Paystack for managing the subscription', max_length=100, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('like', 'New Like'), ('match', 'New Match'), ('subscription_reminder', 'Subscription Reminder'), ('system', 'System Message')], help_text='The type of notification (e.g., like, match, subscription_reminder).', max_length=50)),
+                ('message', models.TextField(help_text='The custom message for the notification.')),
+                ('link', models.URLField(blank=True, help_text='Optional URL for the user to navigate to when clicking the notification.', max_length=500, null=True)),
+                ('is_read', models.BooleanField(default=False, help_text='Indicates if the user has read this notification.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='The date and time when the notification was created.')),
+                ('recipient', models.ForeignKey(help_text='The user who receives this notification.', on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(blank=True, help_text='The user who triggered the notification (if any, e.g., the liker). Null for system notifications.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sent_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notification',
+                'verbose_name_plural': 'Notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_subscriptionplan_paystack_plan_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('like', 'New Like'), ('match', 'New Match'), ('subscription_reminder', 'Subscription Reminder'), ('subscription', 'Subscription Update'), ('system', 'System Message')], help_text='The type of notification (e.g., like, match, subscription_reminder).', max_length=50),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_notification_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1, help_text="How many distinct users this notification stands for (e.g. 'X and 42 others liked you' = 43)."),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, help_text='The date and time when the notification was created. For coalesced likes, the time of the latest like folded in.'),
+        ),
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='accounts.notification')),
+                ('recipient', models.ForeignKey(help_text='Denormalized from the notification so the dedup check is a single index probe.', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notification Actor',
+                'verbose_name_plural': 'Notification Actors',
+                'indexes': [models.Index(fields=['recipient', 'actor', 'created_at'], name='notif_actor_dedup_idx')],
+                'unique_together': {('notification', 'actor')},
+            },
+        ),
+    ]
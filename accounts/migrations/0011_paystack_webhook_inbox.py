@@ -0,0 +1,31 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaystackWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(help_text='Paystack event name, e.g. charge.success', max_length=50)),
+                ('reference', models.CharField(blank=True, db_index=True, help_text='data.reference from the payload', max_length=100)),
+                ('payload', models.JSONField(help_text='The full event body as delivered')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, help_text='Why processing failed or was skipped, if it did')),
+            ],
+            options={
+                'verbose_name': 'Paystack Webhook Event',
+                'verbose_name_plural': 'Paystack Webhook Events',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['processed_at', 'received_at'], name='webhook_pending_idx')],
+            },
+        ),
+    ]
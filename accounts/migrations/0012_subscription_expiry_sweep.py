@@ -0,0 +1,26 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_paystack_webhook_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersubscription',
+            name='expiry_reminder_sent_at',
+            field=models.DateTimeField(blank=True, help_text='When the upcoming-expiry reminder went out for the current end_date (cleared on renewal)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['is_premium', 'premium_expiry_date'], name='profile_premium_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(fields=['is_active', 'end_date'], name='subscription_active_end_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:35
+
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_payloads_to_archive(apps, schema_editor):
+    PaymentTransaction = apps.get_model('accounts', 'PaymentTransaction')
+    PaymentGatewayPayload = apps.get_model('accounts', 'PaymentGatewayPayload')
+    batch = []
+    rows = PaymentTransaction.objects.exclude(gateway_response__isnull=True).values_list('pk', 'gateway_response')
+    for pk, response in rows.iterator(chunk_size=1000):
+        raw = json.dumps(response, separators=(',', ':'), cls=DjangoJSONEncoder).encode()
+        batch.append(PaymentGatewayPayload(payment_id=pk, encoding='zlib', data=zlib.compress(raw)))
+        if len(batch) >= 1000:
+            PaymentGatewayPayload.objects.bulk_create(batch)
+            batch = []
+    PaymentGatewayPayload.objects.bulk_create(batch)
+
+
+def restore_payloads(apps, schema_editor):
+    PaymentTransaction = apps.get_model('accounts', 'PaymentTransaction')
+    PaymentGatewayPayload = apps.get_model('accounts', 'PaymentGatewayPayload')
+    for payload in PaymentGatewayPayload.objects.iterator(chunk_size=1000):
+        raw = bytes(payload.data)
+        if payload.encoding == 'zlib':
+            raw = zlib.decompress(raw)
+        PaymentTransaction.objects.filter(pk=payload.payment_id).update(gateway_response=json.loads(raw))
+
+
+# The schema change on accounts_paymenttransaction is in 0013_slim_payment_transaction: on
+# PostgreSQL the rows inserted here leave pending deferred-FK trigger events, and the same
+# transaction couldn't ALTER the referenced table.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_subscription_expiry_sweep'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentGatewayPayload',
+            fields=[
+                ('payment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='gateway_payload', serialize=False, to='accounts.paymenttransaction')),
+                ('encoding', models.CharField(choices=[('json', 'JSON'), ('zlib', 'zlib-compressed JSON')], default='zlib', max_length=10)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Payment Gateway Payload',
+                'verbose_name_plural': 'Payment Gateway Payloads',
+            },
+        ),
+        migrations.RunPython(move_payloads_to_archive, restore_payloads),
+    ]
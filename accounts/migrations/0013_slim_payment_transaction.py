@@ -0,0 +1,25 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_archive_gateway_payloads'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='paymenttransaction',
+            name='gateway_response',
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['user', 'created_at'], name='payment_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_slim_payment_transaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEngagementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('signups', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Engagement Rollup',
+                'verbose_name_plural': 'Daily Engagement Rollups',
+                'ordering': ['day', 'city'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('plan_name', models.CharField(help_text='Plan name at rollup time (kept if the plan is deleted)', max_length=100)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('subscribers', models.PositiveIntegerField(default=0, help_text='Subscriptions on this plan that were active at some point in the day')),
+            ],
+            options={
+                'verbose_name': 'Daily Revenue Rollup',
+                'verbose_name_plural': 'Daily Revenue Rollups',
+                'ordering': ['day', 'plan_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('rolled_through', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['timestamp'], name='like_timestamp_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyrevenuerollup',
+            name='plan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='accounts.subscriptionplan'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyengagementrollup',
+            unique_together={('day', 'city')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyrevenuerollup',
+            unique_together={('day', 'plan')},
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:39
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    Like = apps.get_model('accounts', 'Like')
+    ProfileImage = apps.get_model('accounts', 'ProfileImage')
+
+    def count_of(queryset, field):
+        counted = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('pk')).values('n')
+        return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+    mutual = Like.objects.filter(Exists(Like.objects.filter(liker=OuterRef('liked_user'), liked_user=OuterRef('liker'))))
+    UserProfile.objects.update(
+        likes_received_count=count_of(Like.objects.all(), 'liked_user'),
+        likes_given_count=count_of(Like.objects.all(), 'liker'),
+        matches_count=count_of(mutual, 'liker'),
+        gallery_images_count=count_of(ProfileImage.objects.all(), 'user_profile'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='gallery_images_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='likes_given_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='likes_received_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='matches_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_profile_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['liked_user', 'timestamp', 'liker'], name='like_received_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Full-text search index for accounts/search.py: FTS5 on SQLite, a weighted tsvector on PostgreSQL.
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # prefix='2 3': short prefix queries ("ad*") read precomputed prefix entries instead of scanning terms.
+    "CREATE VIRTUAL TABLE IF NOT EXISTS accounts_profile_fts USING fts5("
+    "username, first_name, location, bio, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO accounts_profile_fts (rowid, username, first_name, location, bio) "
+    "SELECT id, username, first_name, location, bio FROM accounts_userprofile",
+]
+SQLITE_REVERSE = ["DROP TABLE IF EXISTS accounts_profile_fts"]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE IF NOT EXISTS accounts_profile_search ("
+    "profile_id bigint PRIMARY KEY REFERENCES accounts_userprofile (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS profile_search_document_idx ON accounts_profile_search USING GIN (document)",
+    "INSERT INTO accounts_profile_search (profile_id, document) "
+    "SELECT id, setweight(to_tsvector('simple', coalesce(username, '') || ' ' || coalesce(first_name, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(location, '')), 'B')"
+    " || setweight(to_tsvector('simple', coalesce(bio, '')), 'C') FROM accounts_userprofile",
+]
+POSTGRES_REVERSE = ["DROP TABLE IF EXISTS accounts_profile_search"]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_like_received_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_account_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('date_of_birth__isnull', False), ('is_active', True), ('is_staff', False), ('profile_picture__gt', '')), fields=['looking_for', 'gender', '-last_login'], name='profile_visible_login_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('date_of_birth__isnull', False), ('is_active', True), ('is_staff', False), ('profile_picture__gt', '')), fields=['looking_for', 'date_of_birth'], name='profile_visible_dob_idx'),
+        ),
+    ]
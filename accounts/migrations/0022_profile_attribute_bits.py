@@ -0,0 +1,52 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:56
+
+from django.db import migrations, models
+from django.db.models import Case, ExpressionWrapper, Value, When
+
+# accounts.models.ATTRIBUTE_FILTERS as of this migration: (field, choice values), in bit order.
+# Frozen here so later changes to the live helpers don't change what this backfill writes.
+ATTRIBUTE_FILTERS = [
+    ('body_type', ['SLIM', 'ATHLETIC', 'AVERAGE', 'CURVY', 'MUSCULAR', 'PLUS_SIZE']),
+    ('ethnicity', ['CAUCASIAN', 'AFRICAN', 'ASIAN', 'HISPANIC', 'MIXED', 'OTHER']),
+    ('religion', ['CHRISTIANITY', 'ISLAM', 'HINDUISM', 'BUDDHISM', 'ATHEIST', 'OTHER']),
+    ('marital_status', ['SINGLE', 'DIVORCED', 'WIDOWED', 'SEPARATED', 'IN_RELATIONSHIP']),
+    ('education', ['HIGH_SCHOOL', 'SOME_COLLEGE', 'ASSOCIATES', 'BACHELORS', 'MASTERS', 'PHD']),
+    ('occupation', ['STUDENT', 'EMPLOYED', 'SELF_EMPLOYED', 'UNEMPLOYED', 'RETIRED']),
+    ('drinking_habits', ['NEVER', 'SOCIALLY', 'FREQUENTLY', 'HEAVILY']),
+    ('smoking_habits', ['NON_SMOKER', 'OCCASIONALLY', 'REGULARLY', 'HEAVILY']),
+    ('has_children', [True, False]),
+]
+
+
+def attribute_bits_expression():
+    """Copy of accounts.models.attribute_bits_expression() over the frozen ATTRIBUTE_FILTERS."""
+    expression = Value(0)
+    position = 0
+    for field, values in ATTRIBUTE_FILTERS:
+        whens = []
+        for value in values:
+            whens.append(When(**{field: value}, then=Value(1 << position)))
+            position += 1
+        expression += Case(*whens, default=Value(0))
+    return ExpressionWrapper(expression, output_field=models.BigIntegerField())
+
+
+def fill_attribute_bits(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    UserProfile.objects.using(schema_editor.connection.alias).update(attribute_bits=attribute_bits_expression())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_visible_profile_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='attribute_bits',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_attribute_bits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_profile_attribute_bits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profileimage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -4,8 +4,11 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db.models.signals import post_delete, pre_save
 from django.dispatch import receiver
+import json
 import os
-from datetime import date, timedelta
+import zlib
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
@@ -13,6 +16,9 @@ from django.conf import settings
 from uuid import uuid4
 from django.utils import timezone
 from django.db.models import TextChoices # Added explicitly for clarity if you decide to use it later
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
+from django.db.models.lookups import GreaterThan
+from django.db.models.functions import ExtractYear
 
 
 # --- Custom Validators ---
@@ -98,8 +104,135 @@ DRINKING_CHOICES = [('NEVER', 'Never'), ('SOCIALLY', 'Socially'), ('FREQUENTLY',
 SMOKING_CHOICES = [('NON_SMOKER', 'Non-Smoker'), ('OCCASIONALLY', 'Occasionally'), ('REGULARLY', 'Regularly'), ('HEAVILY', 'Heavily')]
 
 
+# --- Age ---
+# Age filters compare birth dates against exact birthday boundaries: someone is at least N on
+# `today` iff they were born on or before the same calendar day N years earlier. That keeps the
+# filters plain range conditions on date_of_birth, which its indexes can serve.
+AGE_BUCKETS = [ # (label, min age, max age), both inclusive; None = no upper bound
+    ('18-24', 18, 24),
+    ('25-34', 25, 34),
+    ('35-44', 35, 44),
+    ('45-54', 45, 54),
+    ('55+', 55, None),
+]
+
+
+def years_before(day, years):
+    """The same calendar day `years` earlier; 29 February becomes the 28th in a common year."""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def age_on(date_of_birth, today):
+    """Age in whole years on `today`."""
+    return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+
+
+def age_range_q(min_age=None, max_age=None, today=None):
+    """A Q matching birth dates whose age on `today` is within [min_age, max_age] (either may be None)."""
+    today = today or timezone.localdate()
+    condition = Q()
+    if min_age is not None:
+        condition &= Q(date_of_birth__lte=years_before(today, min_age))
+    if max_age is not None:
+        condition &= Q(date_of_birth__gt=years_before(today, max_age + 1)) # Not yet max_age + 1
+    return condition
+
+
+# --- Attribute bitsets ---
+# The categorical profile fields below are packed into UserProfile.attribute_bits, one bit per
+# choice value, so a stack of multi-select filters ("religion in {A, B} and smoking = non-smoker")
+# becomes one integer AND per attribute on each candidate row instead of a string comparison per value.
+# Bits are assigned in this order: after adding or reordering choices, run `manage.py rebuild_attribute_bits`.
+ATTRIBUTE_FILTERS = [
+    ('body_type', BODY_TYPE_CHOICES),
+    ('ethnicity', ETHNICITY_CHOICES),
+    ('religion', RELIGION_CHOICES),
+    ('marital_status', MARITAL_STATUS_CHOICES),
+    ('education', EDUCATION_CHOICES),
+    ('occupation', OCCUPATION_CHOICES),
+    ('drinking_habits', DRINKING_CHOICES),
+    ('smoking_habits', SMOKING_CHOICES),
+    ('has_children', [(True, 'Yes'), (False, 'No')]),
+]
+ATTRIBUTE_FIELDS = [field for field, _ in ATTRIBUTE_FILTERS]
+ATTRIBUTE_BITS = { # (field, choice value) -> bit
+    key: 1 << position
+    for position, key in enumerate((field, value) for field, choices in ATTRIBUTE_FILTERS for value, _ in choices)
+}
+assert len(ATTRIBUTE_BITS) < 63, "attribute_bits is a signed 64-bit column"
+
+
+def attribute_bits_for(profile):
+    """The bitset of `profile`'s current attribute values."""
+    return sum(ATTRIBUTE_BITS.get((field, getattr(profile, field)), 0) for field in ATTRIBUTE_FIELDS)
+
+
+def attribute_bits_expression():
+    """The same bitset as a database expression, for recomputing every row with one UPDATE."""
+    expression = Value(0)
+    for field, choices in ATTRIBUTE_FILTERS:
+        expression += Case(
+            *[When(**{field: value}, then=Value(ATTRIBUTE_BITS[(field, value)])) for value, _ in choices],
+            default=Value(0),
+        )
+    return ExpressionWrapper(expression, output_field=models.BigIntegerField())
+
+
+def attribute_mask(field, values):
+    """The bits of the selected choice `values` of `field` (compared as strings, as they come from a query string)."""
+    values = {str(value) for value in values}
+    return sum(bit for (bit_field, value), bit in ATTRIBUTE_BITS.items() if bit_field == field and str(value) in values)
+
+
+# Profiles the discovery pages (browse, swipe, search) may show: live, non-staff accounts with
+# a picture and a date of birth. The partial indexes on UserProfile use the same condition, so
+# it must stay a plain AND of simple terms for SQLite to match the query against the index.
+VISIBLE_PROFILE = Q(
+    is_active=True,
+    is_staff=False,
+    profile_picture__gt='', # Neither NULL nor empty
+    date_of_birth__isnull=False,
+)
+
+
+class UserProfileQuerySet(models.QuerySet):
+    def visible(self):
+        """Profiles that can appear in discovery (see VISIBLE_PROFILE)."""
+        return self.filter(VISIBLE_PROFILE).exclude(username='')
+
+    def with_attributes(self, selected):
+        """
+        Profiles matching every attribute in `selected` ({field: [values]}), i.e. having one of the
+        selected values of each. Unknown fields and values are ignored.
+        """
+        queryset = self
+        for field, values in selected.items():
+            mask = attribute_mask(field, values)
+            if mask:
+                queryset = queryset.filter(GreaterThan(F('attribute_bits').bitand(mask), 0))
+        return queryset
+
+    def age_between(self, min_age=None, max_age=None, today=None):
+        return self.filter(age_range_q(min_age, max_age, today))
+
+    def with_age(self, today=None):
+        """Annotates `age`, computed by the database (None without a date of birth)."""
+        today = today or timezone.localdate()
+        birthday_ahead = Q(date_of_birth__month__gt=today.month) | Q(date_of_birth__month=today.month, date_of_birth__day__gt=today.day)
+        return self.annotate(age=today.year - ExtractYear('date_of_birth') - Case(When(birthday_ahead, then=1), default=0))
+
+    def with_age_bucket(self, today=None):
+        """Annotates `age_bucket` with the AGE_BUCKETS label, e.g. '25-34' (None under 18 or without a date of birth)."""
+        today = today or timezone.localdate()
+        buckets = [When(age_range_q(low, high, today), then=Value(label)) for label, low, high in AGE_BUCKETS]
+        return self.annotate(age_bucket=Case(*buckets, default=None, output_field=models.CharField()))
+
+
 # --- Custom User Manager (for UserProfile, which is now AbstractUser) ---
-class UserProfileManager(BaseUserManager):
+class UserProfileManager(BaseUserManager.from_queryset(UserProfileQuerySet)):
     def create_user(self, email, username, password=None, **extra_fields):
         if not email:
             raise ValueError(_('The Email field must be set'))
@@ -120,6 +253,13 @@ class UserProfileManager(BaseUserManager):
             raise ValueError(_('Superuser must have is_superuser=True.'))
         return self.create_user(email, username, password, **extra_fields)
 
+
+class VisibleProfileManager(models.Manager.from_queryset(UserProfileQuerySet)):
+    """UserProfile.visible: only the profiles discovery may show. Never the default manager (auth and the admin need every account)."""
+
+    def get_queryset(self):
+        return super().get_queryset().visible()
+
 # --- Custom UserProfile model extending Django's AbstractUser ---
 class UserProfile(AbstractUser):
     # Overriding default AbstractUser fields if needed, or adding new ones
@@ -179,6 +319,23 @@ class UserProfile(AbstractUser):
     is_premium = models.BooleanField(default=False)
     premium_expiry_date = models.DateTimeField(null=True, blank=True)
 
+    # Denormalized counters, kept in step by accounts/counters.py (repair with `manage.py reconcile_counters`).
+    likes_received_count = models.PositiveIntegerField(default=0)
+    likes_given_count = models.PositiveIntegerField(default=0)
+    matches_count = models.PositiveIntegerField(default=0)
+    gallery_images_count = models.PositiveIntegerField(default=0)
+
+    # Tombstone: set (with is_active=False) when the user deletes their account. The rows are
+    # purged in the background (accounts/moderation.py); until then the account is hidden everywhere.
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    # ATTRIBUTE_FILTERS values packed one bit per choice; kept in step by save().
+    attribute_bits = models.BigIntegerField(default=0, editable=False)
+
+    # Last change to anything the profile pages show (validators for conditional GET, accounts/conditional.py).
+    # Bumped by every save(), and by accounts/conditional.py when a gallery image changes.
+    updated_at = models.DateTimeField(auto_now=True)
+
     # Detailed profile information (add/remove as per your design)
     height = models.CharField(max_length=10, choices=HEIGHT_CHOICES, blank=True, null=True)
     body_type = models.CharField(max_length=20, choices=BODY_TYPE_CHOICES, blank=True, null=True)
@@ -193,6 +350,7 @@ class UserProfile(AbstractUser):
 
     # Custom manager for UserProfile
     objects = UserProfileManager()
+    visible = VisibleProfileManager()
 
     USERNAME_FIELD = 'email' # Use email as the unique identifier for login
     REQUIRED_FIELDS = ['username'] # Required when creating a user via createsuperuser, etc.
@@ -200,24 +358,32 @@ class UserProfile(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'updated_at'} # auto_now is only written when listed
+        if update_fields is None or update_fields & set(ATTRIBUTE_FIELDS):
+            self.attribute_bits = attribute_bits_for(self)
+            if update_fields is not None:
+                update_fields.add('attribute_bits')
+        super().save(*args, **kwargs)
+
     def clean(self):
         super().clean()
         if self.date_of_birth:
-            today = date.today()
-            age = today.year - self.date_of_birth.year - ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
-            if age < 18:
+            if age_on(self.date_of_birth, timezone.localdate()) < 18:
                 raise ValidationError({'date_of_birth': _('You must be at least 18 years old.')})
 
     @property
     def get_age(self):
         """
         Calculates and returns the user's age based on their date of birth.
+        Rows loaded with UserProfileQuerySet.with_age() already carry it.
         """
+        if 'age' in self.__dict__:
+            return self.age
         if self.date_of_birth:
-            today = date.today()
-            age = today.year - self.date_of_birth.year - \
-                    ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
-            return age
+            return age_on(self.date_of_birth, timezone.localdate())
         return None
 
     @property
@@ -236,6 +402,19 @@ class UserProfile(AbstractUser):
         verbose_name = _("User Profile")
         verbose_name_plural = _("User Profiles")
         ordering = ['username'] # Inherited from AbstractUser, good to keep
+        indexes = [
+            # expire_subscriptions: premium users whose expiry date has passed.
+            models.Index(fields=['is_premium', 'premium_expiry_date'], name='profile_premium_expiry_idx'),
+            # Admin changelist: default ordering and date_hierarchy
+            models.Index(fields=['date_joined'], name='profile_date_joined_idx'),
+            # Tombstoned accounts still waiting for their purge
+            models.Index(fields=['deleted_at'], name='profile_deleted_idx'),
+            # Discovery (UserProfile.visible): partial, so they only hold the live candidates.
+            # Browse and swipe, newest logins first within a looking_for/gender:
+            models.Index(fields=['looking_for', 'gender', '-last_login'], name='profile_visible_login_idx', condition=VISIBLE_PROFILE),
+            # Age-range filters within a looking_for:
+            models.Index(fields=['looking_for', 'date_of_birth'], name='profile_visible_dob_idx', condition=VISIBLE_PROFILE),
+        ]
 
 # --- NEW Model for additional profile images ---
 class ProfileImage(models.Model):
@@ -257,6 +436,7 @@ class ProfileImage(models.Model):
     is_main = models.BooleanField(default=False) # Indicates if this image is the primary one
     order = models.PositiveIntegerField(default=0, blank=True, null=True, db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', '-uploaded_at']
@@ -395,6 +575,11 @@ class Like(models.Model):
     class Meta:
         unique_together = ('liker', 'liked_user')
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp'], name='like_timestamp_idx'), # Date-range scans for the analytics rollups
+            # "Who liked me": filter on liked_user, keyset on timestamp, liker read from the index itself.
+            models.Index(fields=['liked_user', 'timestamp', 'liker'], name='like_received_idx'),
+        ]
         verbose_name = "Like"
         verbose_name_plural = "Likes"
 
@@ -439,12 +624,17 @@ class UserSubscription(models.Model):
     paystack_authorization_code = models.CharField(max_length=100, blank=True, null=True, help_text="Authorization code from Paystack for recurring payments")
     paystack_subscription_code = models.CharField(max_length=100, blank=True, null=True, unique=True, help_text="Subscription code from Paystack for managing the subscription")
     paystack_email_token = models.CharField(max_length=100, blank=True, null=True, help_text="Email token from Paystack for re-authorization if needed")
+    expiry_reminder_sent_at = models.DateTimeField(null=True, blank=True, help_text="When the upcoming-expiry reminder went out for the current end_date (cleared on renewal)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "User Subscription"
         verbose_name_plural = "User Subscriptions"
+        indexes = [
+            # expire_subscriptions: active subscriptions by end date (expired ones and those due a reminder).
+            models.Index(fields=['is_active', 'end_date'], name='subscription_active_end_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username}'s subscription to {self.plan.name if self.plan else 'N/A'}"
@@ -477,17 +667,81 @@ class PaymentTransaction(models.Model):
         ],
         default='pending'
     )
-    gateway_response = models.JSONField(blank=True, null=True, help_text="Full response from payment gateway")
+    # The full gateway response lives in PaymentGatewayPayload, off this hot table; see gateway_response.
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Payment Transaction"
         verbose_name_plural = "Payment Transactions"
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='payment_user_created_idx'), # Per-user payment history
+            models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'), # Admin status filter, reconciliation
+        ]
 
     def __str__(self):
         return f"Transaction {self.reference} for {self.user.username} - {self.status}"
 
+    @property
+    def gateway_response(self):
+        """Full response from payment gateway, loaded from the archive on first access (one query)."""
+        try:
+            return self.gateway_payload.load()
+        except PaymentGatewayPayload.DoesNotExist:
+            return None
+
+    def archive_gateway_response(self, data):
+        """Stores (or replaces) the gateway response for this transaction."""
+        self.gateway_payload = PaymentGatewayPayload.store(self, data)
+
+
+class PaymentGatewayPayload(models.Model):
+    """
+    Raw gateway JSON for a PaymentTransaction, one row per transaction, kept out of the
+    transaction table so list and history scans don't drag multi-KB blobs along.
+    Compressed with zlib unless settings.GATEWAY_PAYLOAD_COMPRESSION is off.
+    """
+    ENCODING_CHOICES = [
+        ('json', 'JSON'),
+        ('zlib', 'zlib-compressed JSON'),
+    ]
+
+    payment = models.OneToOneField(
+        PaymentTransaction,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='gateway_payload',
+    )
+    encoding = models.CharField(max_length=10, choices=ENCODING_CHOICES, default='zlib')
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Payment Gateway Payload"
+        verbose_name_plural = "Payment Gateway Payloads"
+
+    def __str__(self):
+        return f"Gateway payload for transaction {self.payment_id}"
+
+    @staticmethod
+    def encode(data):
+        raw = json.dumps(data, separators=(',', ':'), cls=DjangoJSONEncoder).encode()
+        if settings.GATEWAY_PAYLOAD_COMPRESSION:
+            return 'zlib', zlib.compress(raw)
+        return 'json', raw
+
+    @classmethod
+    def store(cls, payment, data):
+        encoding, blob = cls.encode(data)
+        payload, _ = cls.objects.update_or_create(payment=payment, defaults={'encoding': encoding, 'data': blob})
+        return payload
+
+    def load(self):
+        raw = bytes(self.data)
+        if self.encoding == 'zlib':
+            raw = zlib.decompress(raw)
+        return json.loads(raw)
+
 
 # --- NEW: Notification Model ---
 class Notification(models.Model):
@@ -498,6 +752,7 @@ class Notification(models.Model):
         ('like', 'New Like'),
         ('match', 'New Match'),
         ('subscription_reminder', 'Subscription Reminder'),
+        ('subscription', 'Subscription Update'), # Plan activated / renewed
         ('system', 'System Message'), # For general site announcements/alerts
         # Add more types as needed (e.g., 'message', 'profile_view')
     ]
@@ -536,14 +791,179 @@ class Notification(models.Model):
     )
     created_at = models.DateTimeField(
         auto_now_add=True,
-        help_text="The date and time when the notification was created."
+        help_text="The date and time when the notification was created. For coalesced likes, the time of the latest like folded in."
+    )
+    actor_count = models.PositiveIntegerField(
+        default=1,
+        help_text="How many distinct users this notification stands for (e.g. 'X and 42 others liked you' = 43)."
     )
 
     class Meta:
         ordering = ['-created_at'] # Latest notifications first
+        indexes = [
+            # Unread badge counts and "unread only" inbox pages
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notif_recipient_unread_idx'),
+            # Inbox cursor pagination: newest first per recipient
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_recipient_created_idx'),
+            # Admin changelist across all recipients: ordering and date_hierarchy
+            models.Index(fields=['created_at'], name='notif_created_idx'),
+        ]
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
 
     def __str__(self):
         # Note: get_notification_type_display() uses the 'display' part of the choices tuple
-        return f"[{self.get_notification_type_display()}] for {self.recipient.username}: {self.message[:50]}"
\ No newline at end of file
+        return f"[{self.get_notification_type_display()}] for {self.recipient.username}: {self.message[:50]}"
+
+class NotificationActor(models.Model):
+    """
+    One row per distinct user folded into a coalesced notification.
+    Used to deduplicate repeat likes (like/unlike/like) from the same sender within the window.
+    """
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='actors',
+    )
+    recipient = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Denormalized from the notification so the dedup check is a single index probe."
+    )
+    actor = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('notification', 'actor')
+        indexes = [
+            models.Index(fields=['recipient', 'actor', 'created_at'], name='notif_actor_dedup_idx'),
+        ]
+        verbose_name = "Notification Actor"
+        verbose_name_plural = "Notification Actors"
+
+    def __str__(self):
+        return f"{self.actor_id} -> notification {self.notification_id}"
+
+
+class PaystackWebhookEvent(models.Model):
+    """
+    Append-only inbox of Paystack webhook deliveries. Each verified delivery is stored as
+    received before anything else happens, then processed in the background
+    (accounts/payments.py). Duplicate deliveries get their own rows; processing is idempotent.
+    """
+    event = models.CharField(max_length=50, help_text="Paystack event name, e.g. charge.success")
+    reference = models.CharField(max_length=100, blank=True, db_index=True, help_text="data.reference from the payload")
+    payload = models.JSONField(help_text="The full event body as delivered")
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, help_text="Why processing failed or was skipped, if it did")
+
+    class Meta:
+        ordering = ['-received_at']
+        indexes = [
+            # process_webhook_events picks up rows that were never processed.
+            models.Index(fields=['processed_at', 'received_at'], name='webhook_pending_idx'),
+        ]
+        verbose_name = "Paystack Webhook Event"
+        verbose_name_plural = "Paystack Webhook Events"
+
+    def __str__(self):
+        return f"{self.event} {self.reference} ({'processed' if self.processed_at else 'pending'})"
+
+
+# --- Analytics rollups (filled by accounts/analytics.py) ---
+
+class DailyRevenueRollup(models.Model):
+    """Successful payments per plan per day, so revenue reports don't rescan PaymentTransaction."""
+    day = models.DateField()
+    plan = models.ForeignKey(SubscriptionPlan, on_delete=models.SET_NULL, null=True, blank=True)
+    plan_name = models.CharField(max_length=100, help_text="Plan name at rollup time (kept if the plan is deleted)")
+    payments = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    subscribers = models.PositiveIntegerField(default=0, help_text="Subscriptions on this plan that were active at some point in the day")
+
+    class Meta:
+        unique_together = ('day', 'plan')
+        ordering = ['day', 'plan_name']
+        verbose_name = "Daily Revenue Rollup"
+        verbose_name_plural = "Daily Revenue Rollups"
+
+    def __str__(self):
+        return f"{self.day} {self.plan_name}: {self.revenue}"
+
+
+class DailyEngagementRollup(models.Model):
+    """Likes, new matches and sign-ups per city per day (city = UserProfile.location of the liked user / new user)."""
+    day = models.DateField()
+    city = models.CharField(max_length=100, blank=True)
+    likes = models.PositiveIntegerField(default=0)
+    matches = models.PositiveIntegerField(default=0)
+    signups = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'city')
+        ordering = ['day', 'city']
+        verbose_name = "Daily Engagement Rollup"
+        verbose_name_plural = "Daily Engagement Rollups"
+
+    def __str__(self):
+        return f"{self.day} {self.city or 'Unknown'}: {self.likes} likes"
+
+
+class RollupWatermark(models.Model):
+    """Last day each rollup was computed through; the next run recomputes from that day on."""
+    name = models.CharField(max_length=50, primary_key=True)
+    rolled_through = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} through {self.rolled_through}"
+
+
+# --- Bulk moderation (run in the background by accounts/moderation.py) ---
+
+class ModerationJob(models.Model):
+    """
+    A bulk admin action (ban, delete, purge images) over many rows, processed in chunks in
+    the background. `processed` counts the targets done so far; a restarted job resumes from there.
+    """
+    ACTION_CHOICES = [
+        ('ban', 'Ban users'),
+        ('delete', 'Delete users'),
+        ('purge_images', 'Purge users\' images'),
+        ('delete_images', 'Delete images'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    target_ids = models.JSONField(default=list, help_text="UserProfile ids (ProfileImage ids for delete_images), in processing order")
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last progress update; a stale running job was interrupted")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # run_moderation_jobs picks up unfinished jobs.
+            models.Index(fields=['status', 'updated_at'], name='moderation_job_status_idx'),
+        ]
+        verbose_name = "Moderation Job"
+        verbose_name_plural = "Moderation Jobs"
+
+    def __str__(self):
+        return f"{self.get_action_display()} #{self.pk} ({self.processed}/{self.total}, {self.status})"
@@ -0,0 +1,163 @@
+# accounts/moderation.py
+"""
+Bulk moderation (ban, delete, purge images) as chunked background jobs.
+
+The admin actions only record a ModerationJob and enqueue it on the background pool
+(accounts/tasks.py). Self-service account deletion (views.account_delete) tombstones the
+account and starts the same 'delete' job. The job works through its targets MODERATION_CHUNK_SIZE at a time.
+Each chunk is its own short transaction, so locks on the hot tables are held briefly and
+the progress survives a crash: `manage.py run_moderation_jobs` resumes an interrupted job
+from the last finished chunk.
+
+Deleting users bypasses Django's per-row cascade collector where it hurts. Likes,
+notifications and gallery images go with one DELETE per table per chunk, no signals run,
+and the counters of the other side of every deleted like are recomputed in bulk
+(counters.recount). Coalesced like notifications of other users stop naming deleted
+senders (notifications.trim_like_notifications). Image files are removed together after the chunk commits, so a
+rollback never leaves rows pointing at deleted files.
+"""
+
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from loveny_project.database import retry_on_locked
+
+from . import counters, tasks
+from .models import Like, ModerationJob, Notification, NotificationActor, ProfileImage, UserProfile
+from .notifications import trim_like_notifications
+
+logger = logging.getLogger(__name__)
+
+
+def remove_files(names):
+    """Deletes stored files by name; a file that is already gone (or fails) is logged and skipped."""
+    for name in names:
+        if not name or name.endswith(settings.DEFAULT_PROFILE_PICTURE_PATH): # Never the shared default avatar
+            continue
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete %s", name, exc_info=True)
+
+
+def _user_files(user_ids):
+    """Names of every file owned by `user_ids`: profile pictures and gallery images."""
+    names = set(UserProfile.objects.filter(pk__in=user_ids).exclude(profile_picture='').values_list('profile_picture', flat=True))
+    names.update(ProfileImage.objects.filter(user_profile_id__in=user_ids).values_list('image', flat=True))
+    names.discard(None)
+    return names
+
+
+# --- Chunk handlers: each takes a list of target ids and is safe to run twice ---
+
+@retry_on_locked
+def ban_users(user_ids):
+    # The auth backend refuses inactive users, so their sessions stop working on the next request.
+    UserProfile.objects.filter(pk__in=user_ids).update(is_active=False, updated_at=timezone.now())
+
+
+@retry_on_locked
+def delete_users(user_ids):
+    with transaction.atomic():
+        files = _user_files(user_ids)
+        likes = Like.objects.filter(Q(liker_id__in=user_ids) | Q(liked_user_id__in=user_ids))
+        neighbours = (
+            set(likes.values_list('liker_id', flat=True)) | set(likes.values_list('liked_user_id', flat=True))
+        ) - set(user_ids)
+
+        # One DELETE per table instead of the collector's per-row signals (QuerySet._raw_delete
+        # is what the collector itself uses for its fast path).
+        likes._raw_delete(likes.db)
+        # Other users' coalesced like notifications that name these users are rebuilt below.
+        named_in = set(
+            NotificationActor.objects.filter(actor_id__in=user_ids)
+            .exclude(recipient_id__in=user_ids)
+            .values_list('notification_id', flat=True)
+        )
+        actors = NotificationActor.objects.filter(Q(actor_id__in=user_ids) | Q(recipient_id__in=user_ids))
+        actors._raw_delete(actors.db)
+        notifications = Notification.objects.filter(recipient_id__in=user_ids)
+        notifications._raw_delete(notifications.db)
+        Notification.objects.filter(sender_id__in=user_ids).update(sender=None)
+        trim_like_notifications(named_in)
+        UserProfile.objects.filter(pk__in=user_ids).update(profile_picture=None, main_additional_image=None)
+        images = ProfileImage.objects.filter(user_profile_id__in=user_ids)
+        images._raw_delete(images.db)
+
+        # What is left per user is small (subscription, payments, admin log, group links).
+        UserProfile.objects.filter(pk__in=user_ids).delete()
+
+        counters.recount(neighbours)
+        transaction.on_commit(partial(remove_files, files))
+
+
+@retry_on_locked
+def purge_user_images(user_ids):
+    with transaction.atomic():
+        files = _user_files(user_ids)
+        UserProfile.objects.filter(pk__in=user_ids).update(
+            profile_picture=None, main_additional_image=None, gallery_images_count=0, updated_at=timezone.now(),
+        )
+        images = ProfileImage.objects.filter(user_profile_id__in=user_ids)
+        images._raw_delete(images.db)
+        transaction.on_commit(partial(remove_files, files))
+
+
+@retry_on_locked
+def delete_images(image_ids):
+    with transaction.atomic():
+        images = ProfileImage.objects.filter(pk__in=image_ids)
+        rows = list(images.values_list('user_profile_id', 'image'))
+        owners = {owner for owner, _ in rows}
+        files = {name for _, name in rows}
+        UserProfile.objects.filter(main_additional_image_id__in=image_ids).update(main_additional_image=None)
+        UserProfile.objects.filter(pk__in=owners, profile_picture__in=files).update(profile_picture=None) # The main picture shares the image's file
+        UserProfile.objects.filter(pk__in=owners).update(updated_at=timezone.now()) # _raw_delete skips the gallery receivers
+        images._raw_delete(images.db)
+        counters.recount(owners)
+        transaction.on_commit(partial(remove_files, files))
+
+
+HANDLERS = {
+    'ban': ban_users,
+    'delete': delete_users,
+    'purge_images': purge_user_images,
+    'delete_images': delete_images,
+}
+
+
+# --- Jobs ---
+
+def start_job(action, target_ids, requested_by=None):
+    """Records a job over `target_ids` and runs it in the background once the caller commits."""
+    target_ids = sorted(set(target_ids))
+    job = ModerationJob.objects.create(
+        action=action, target_ids=target_ids, total=len(target_ids), requested_by=requested_by,
+    )
+    tasks.enqueue_on_commit(run_job, job.pk)
+    return job
+
+
+def run_job(job_id):
+    """Processes a job's remaining targets chunk by chunk, recording progress after each one."""
+    job = ModerationJob.objects.get(pk=job_id)
+    if job.status == 'done':
+        return
+    handler = HANDLERS[job.action]
+    chunk_size = settings.MODERATION_CHUNK_SIZE
+    ModerationJob.objects.filter(pk=job_id).update(status='running', error='', updated_at=timezone.now())
+    try:
+        for start in range(job.processed, job.total, chunk_size):
+            chunk = job.target_ids[start:start + chunk_size]
+            handler(chunk)
+            ModerationJob.objects.filter(pk=job_id).update(processed=start + len(chunk), updated_at=timezone.now())
+    except Exception as e:
+        ModerationJob.objects.filter(pk=job_id).update(status='failed', error=str(e), updated_at=timezone.now())
+        raise
+    ModerationJob.objects.filter(pk=job_id).update(status='done', finished_at=timezone.now(), updated_at=timezone.now())
@@ -0,0 +1,278 @@
+# accounts/notifications.py
+"""
+Creating, counting and delivering Notification rows.
+
+Unread counts are served from a per-user counter in the shared cache (settings.CACHES:
+sweeps run as separate processes and must reach the web workers' counters). It is adjusted when
+notifications are created (after commit) and marked read, and recounted only on a miss,
+so the nav badge on every page doesn't cost a COUNT(*).
+
+Likes are coalesced: all likes a user receives within LIKE_COALESCE_WINDOW fold into one
+unread row ("X and 42 others liked your profile!"), and a sender is only counted once per
+window however often they toggle. Table growth follows what the inbox shows, not raw clicks.
+
+Realtime delivery goes over the channel layer: every connected browser tab joins the
+group for its user (see consumers.py). Pushes are only sent once the transaction that
+created the rows has committed, so a client never hears about a like that was rolled back.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from loveny_project.database import retry_on_locked
+
+from .models import Notification, NotificationActor
+
+logger = logging.getLogger(__name__)
+
+UNREAD_COUNT_TIMEOUT = 60 * 60 * 24 # Recount at least once a day even if nothing changes
+LIKE_COALESCE_WINDOW = timedelta(hours=24)
+
+# --- Unread counter ---
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user_id):
+    """
+    Cached unread count; one COUNT(*) on the index after a cache miss, none afterwards.
+    Counted on the primary: a lagging replica's count would stay in the cache.
+    """
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.using(DEFAULT_DB_ALIAS).filter(recipient_id=user_id, is_read=False).count()
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+async def aget_unread_count(user_id):
+    key = unread_count_key(user_id)
+    count = await cache.aget(key)
+    if count is None:
+        count = await Notification.objects.using(DEFAULT_DB_ALIAS).filter(recipient_id=user_id, is_read=False).acount()
+        await cache.aadd(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Applies `delta` to the cached counter if it is there. A missing key is left
+    missing: the next read recounts, which is always correct.
+    """
+    key = unread_count_key(user_id)
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        elif delta < 0 and cache.decr(key, -delta) < 0:
+            cache.delete(key)
+    except ValueError: # Key not cached
+        pass
+
+
+def create_notification(recipient, notification_type, message, sender=None, link=None):
+    """Creates a Notification and bumps the recipient's unread counter once it commits."""
+    notification = Notification.objects.create(
+        recipient=recipient,
+        sender=sender,
+        notification_type=notification_type,
+        message=message,
+        link=link,
+    )
+    recipient_id = notification.recipient_id
+    transaction.on_commit(lambda: adjust_unread_count(recipient_id, 1))
+    return notification
+
+
+def bulk_create_notifications(notifications):
+    """
+    Inserts unsaved Notification objects in one batched INSERT (for sweeps and announcements).
+    The recipients' cached counters are dropped after commit and recounted on next read.
+    Nothing is pushed in realtime: clients pick these up on the next poll or page load.
+    """
+    created = Notification.objects.bulk_create(notifications, batch_size=500)
+    keys = {unread_count_key(notification.recipient_id) for notification in created}
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(list(keys)))
+    return created
+
+
+def like_message(sender_username, actor_count):
+    if actor_count <= 1:
+        return f"{sender_username} liked your profile!"
+    others = actor_count - 1
+    return f"{sender_username} and {others} other{'s' if others > 1 else ''} liked your profile!"
+
+
+def record_like_notification(recipient, sender):
+    """
+    Folds a like into the recipient's open like notification, or starts a new one.
+    Must run inside the transaction that created the Like.
+
+    Returns the new or updated Notification, or None when `sender` was already counted
+    for this recipient within the window (nothing to show or push).
+    """
+    now = timezone.now()
+    since = now - LIKE_COALESCE_WINDOW
+
+    if NotificationActor.objects.filter(recipient=recipient, actor=sender, created_at__gte=since).exists():
+        return None
+
+    aggregate = (
+        Notification.objects.select_for_update()
+        .filter(recipient=recipient, notification_type='like', is_read=False, created_at__gte=since)
+        .order_by('-created_at')
+        .first()
+    )
+    if aggregate is None:
+        notification = create_notification(recipient, 'like', like_message(sender.username, 1), sender=sender)
+        NotificationActor.objects.create(notification=notification, recipient=recipient, actor=sender)
+        return notification
+
+    # Already unread, so the unread counter doesn't change.
+    NotificationActor.objects.create(notification=aggregate, recipient=recipient, actor=sender)
+    aggregate.actor_count += 1 # Row is locked, so this is the value the UPDATE below produces
+    aggregate.sender = sender
+    aggregate.message = like_message(sender.username, aggregate.actor_count)
+    aggregate.created_at = now # Bubble the row back to the top of the inbox
+    Notification.objects.filter(pk=aggregate.pk).update(
+        actor_count=F('actor_count') + 1,
+        sender=sender,
+        message=aggregate.message,
+        created_at=now,
+    )
+    return aggregate
+
+
+def trim_like_notifications(notification_ids):
+    """
+    Rebuilds coalesced like notifications after some of their NotificationActor rows were
+    deleted (account deletion, accounts/moderation.py), so they stop naming removed senders:
+    count, sender and message follow the actors that are left, and a notification with none
+    left is deleted. Must run inside the transaction that deleted the actors.
+    """
+    actors = {}
+    rows = (
+        NotificationActor.objects.filter(notification_id__in=notification_ids)
+        .order_by('created_at', 'pk')
+        .values_list('notification_id', 'actor_id', 'actor__username')
+    )
+    for notification_id, actor_id, username in rows:
+        actors.setdefault(notification_id, []).append((actor_id, username))
+
+    rebuilt = []
+    for notification in Notification.objects.filter(pk__in=list(actors)):
+        latest_id, latest_username = actors[notification.pk][-1]
+        notification.actor_count = len(actors[notification.pk])
+        notification.sender_id = latest_id
+        notification.message = like_message(latest_username, notification.actor_count)
+        rebuilt.append(notification)
+    Notification.objects.bulk_update(rebuilt, ['actor_count', 'sender', 'message'], batch_size=500)
+
+    emptied = Notification.objects.filter(pk__in=notification_ids).exclude(pk__in=list(actors))
+    keys = {unread_count_key(recipient_id) for recipient_id in emptied.filter(is_read=False).values_list('recipient_id', flat=True)}
+    emptied.delete()
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(list(keys)))
+
+
+@retry_on_locked
+def mark_read(user_id, ids=None):
+    """
+    Marks the user's unread notifications (all of them, or just `ids`) as read with a
+    single UPDATE and returns how many rows changed.
+    """
+    queryset = Notification.objects.filter(recipient_id=user_id, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    updated = queryset.update(is_read=True)
+    if updated:
+        transaction.on_commit(lambda: adjust_unread_count(user_id, -updated))
+    return updated
+
+
+# --- Realtime delivery ---
+
+# Strong references to in-flight fire-and-forget pushes (the event loop only keeps weak ones).
+_background_pushes = set()
+
+
+def user_group_name(user_id):
+    """Channel-layer group that all of a user's open sockets join."""
+    return f'notifications.user.{user_id}'
+
+
+def notification_payload(notification):
+    """JSON-safe dict sent to the client for one Notification."""
+    return {
+        'id': notification.id,
+        'recipient_id': notification.recipient_id,
+        'type': notification.notification_type,
+        'message': notification.message,
+        'link': notification.link,
+        'sender': notification.sender.username if notification.sender_id else None,
+        'actor_count': notification.actor_count,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+async def push_notifications(payloads):
+    """
+    Sends each payload to its recipient's group, with the recipient's unread count so the
+    badge can be set rather than guessed: a coalesced like updates a row that may already be
+    unread. Delivery is best effort: failures are logged, never raised.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for payload in payloads:
+        try:
+            await channel_layer.group_send(
+                user_group_name(payload['recipient_id']),
+                {
+                    'type': 'notification.message',
+                    'notification': payload,
+                    'unread_count': await aget_unread_count(payload['recipient_id']), # Sent after commit: includes this one
+                },
+            )
+        except Exception:
+            logger.exception("Failed to push notification %s", payload.get('id'))
+
+
+async def push_in_background(request, payloads):
+    """
+    For async views, after the writing transaction has returned. Under ASGI the push is
+    scheduled on the server's event loop without awaiting it, so the response goes out
+    without waiting on the channel layer. Under WSGI the view runs in async_to_sync, whose
+    loop is closed, and any task still on it cancelled, once the request finishes; there the
+    push is awaited instead.
+    """
+    if not payloads:
+        return
+    if not isinstance(request, ASGIRequest):
+        await push_notifications(payloads)
+        return
+    task = asyncio.get_running_loop().create_task(push_notifications(payloads))
+    _background_pushes.add(task)
+    task.add_done_callback(_background_pushes.discard)
+
+
+def push_on_commit(notifications):
+    """
+    For sync code paths (payment activation, management commands): pushes the given
+    notifications once the current transaction commits, or right away in autocommit mode.
+    """
+    payloads = [notification_payload(notification) for notification in notifications]
+    if payloads:
+        transaction.on_commit(lambda: async_to_sync(push_notifications)(payloads))
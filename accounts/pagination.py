@@ -0,0 +1,53 @@
+# accounts/pagination.py
+"""
+Keyset ("cursor") pagination helpers for feeds ordered newest-first.
+
+Unlike OFFSET paging, each page is a range scan starting right after the last row the
+client saw, so page 500 costs the same as page 1 and rows inserted meanwhile don't shift
+the pages. The cursor is an opaque, URL-safe token of (timestamp, pk).
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns (timestamp, pk), or None for a missing or malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Parses a ?limit= value, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def after_cursor(queryset, cursor, field):
+    """
+    Restricts a queryset ordered by (-field, -pk) to the rows after `cursor`.
+    Order the queryset with order_by(f'-{field}', '-pk') so an index on (..., field) serves it.
+    """
+    position = decode_cursor(cursor)
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk}))
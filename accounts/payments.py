@@ -0,0 +1,154 @@
+# accounts/payments.py
+"""
+Applying payment outcomes to PaymentTransaction / UserSubscription.
+
+Outcomes come from two places, which can race or arrive in any order: the user's
+redirect back from checkout (verify_payment_view) and Paystack's webhooks. Every
+function here locks the PaymentTransaction row first and checks its current status,
+so a second delivery of the same outcome is a no-op. A late failure never overwrites
+a success.
+"""
+
+import hashlib
+import hmac
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from loveny_project.database import retry_on_locked
+
+from .models import PaymentTransaction, PaystackWebhookEvent, UserSubscription
+from .notifications import create_notification, push_on_commit
+
+logger = logging.getLogger(__name__)
+
+FAILED_STATUSES = ('failed', 'abandoned')
+
+
+def verify_webhook_signature(body, signature):
+    """Checks Paystack's x-paystack-signature (HMAC-SHA512 of the raw body) in constant time."""
+    if not signature or not settings.PAYSTACK_SECRET_KEY:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def amount_in_kobo(payment):
+    return int(payment.amount * Decimal('100'))
+
+
+@retry_on_locked
+def activate_subscription(payment_id, gateway_data):
+    """
+    Marks the payment successful and grants its plan to the user, once.
+    Renewals extend from the current end date if the subscription is still running.
+    Returns False if the payment had already been applied.
+    """
+    with transaction.atomic():
+        payment = PaymentTransaction.objects.select_for_update().select_related('plan', 'user').get(pk=payment_id)
+        if payment.status == 'success':
+            return False
+
+        payment.status = 'success'
+        payment.save(update_fields=['status', 'updated_at'])
+        payment.archive_gateway_response(gateway_data)
+
+        plan = payment.plan
+        user = payment.user
+        now = timezone.now()
+        subscription = UserSubscription.objects.filter(user=user).first()
+        if subscription and subscription.is_active and subscription.end_date and subscription.end_date > now:
+            starts_from = subscription.end_date
+        else:
+            starts_from = now
+        if subscription is None:
+            subscription = UserSubscription(user=user)
+        subscription.plan = plan
+        subscription.end_date = starts_from + timedelta(days=plan.duration_days)
+        subscription.is_active = True
+        subscription.expiry_reminder_sent_at = None # New end date, new reminder
+        subscription.save()
+
+        user.is_premium = True
+        user.premium_expiry_date = subscription.end_date
+        user.save(update_fields=['is_premium', 'premium_expiry_date'])
+
+        notification = create_notification(
+            recipient=user,
+            notification_type='subscription',
+            message=f"Your {plan.name} plan is active until {timezone.localtime(subscription.end_date):%d %b %Y}.",
+            link=reverse('accounts:profile'),
+        )
+        push_on_commit([notification])
+    return True
+
+
+@retry_on_locked
+def mark_payment(payment_id, status, gateway_data=None):
+    """Records a failed/abandoned outcome unless the payment already succeeded. Returns whether it changed."""
+    with transaction.atomic():
+        payment = PaymentTransaction.objects.select_for_update().get(pk=payment_id)
+        if payment.status == 'success' or payment.status == status:
+            return False
+        payment.status = status
+        payment.save(update_fields=['status', 'updated_at'])
+        if gateway_data is not None:
+            payment.archive_gateway_response(gateway_data)
+    return True
+
+
+def apply_gateway_result(payment, gateway_data):
+    """
+    Applies a transaction `data` dict from Paystack (verify response or charge.* webhook).
+    Only 'success' activates and only FAILED_STATUSES fail the payment. Anything else
+    (ongoing, pending, queued, processing...) isn't final yet: the payment stays as it is,
+    for a later verify or webhook to settle. Returns the resulting payment status.
+    """
+    status = gateway_data.get('status')
+    paid_in_full = gateway_data.get('amount') == amount_in_kobo(payment)
+    if status == 'success' and paid_in_full and payment.plan_id:
+        activate_subscription(payment.pk, gateway_data)
+        return 'success'
+    if status in FAILED_STATUSES:
+        mark_payment(payment.pk, status, gateway_data)
+        return status
+    if status == 'success':
+        # Charged, but not what we asked for. Keep it out of 'success' for a human to look at.
+        logger.warning("Payment %s: amount %s doesn't match %s", payment.reference, gateway_data.get('amount'), amount_in_kobo(payment))
+    else:
+        logger.info("Payment %s: gateway status %r is not final, leaving it %s", payment.reference, status, payment.status)
+    return payment.status
+
+
+@retry_on_locked
+def process_webhook_event(event_id):
+    """
+    Applies one inbox row. Safe to run more than once and concurrently for the same row or
+    the same reference: the row is locked and skipped once processed_at is set.
+    """
+    with transaction.atomic():
+        event = PaystackWebhookEvent.objects.select_for_update().get(pk=event_id)
+        if event.processed_at:
+            return
+
+        data = event.payload.get('data') or {}
+        error = ''
+        if event.event in ('charge.success', 'charge.failed'):
+            payment = PaymentTransaction.objects.select_related('plan').filter(reference=event.reference).first()
+            if payment is None:
+                error = "Unknown reference"
+            else:
+                if event.event == 'charge.failed' and data.get('status') not in FAILED_STATUSES:
+                    data = {**data, 'status': 'failed'}
+                apply_gateway_result(payment, data)
+        else:
+            error = "Event type not handled"
+
+        event.processed_at = timezone.now()
+        event.error = error
+        event.save(update_fields=['processed_at', 'error'])
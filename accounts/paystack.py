@@ -0,0 +1,170 @@
+# accounts/paystack.py
+"""
+Paystack REST client.
+
+One process-wide keep-alive requests.Session, so repeat calls skip the TCP + TLS
+handshake. Every call has separate connect and read timeouts. Calls that are safe to
+repeat are retried with exponential backoff. A circuit breaker fails fast while Paystack
+is down, so request threads don't pile up waiting on it.
+
+Point PAYSTACK_BASE_URL at the local stub (`python manage.py paystack_stub`, see
+paystack_stub.py) to run the whole checkout flow offline.
+"""
+
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class PaystackError(Exception):
+    """Raised when Paystack cannot be reached or rejects a request."""
+
+
+class PaystackUnavailable(PaystackError):
+    """Raised without calling out while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. While open, calls fail immediately. After
+    `reset_timeout` seconds one trial call is let through (half-open). If it succeeds the
+    breaker closes again; if it fails the breaker stays open for another `reset_timeout`.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise PaystackUnavailable("Paystack is temporarily unavailable. Please try again shortly.")
+            self._trial_in_flight = True # Half-open: this caller is the trial
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning("Paystack circuit breaker opened after %s failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+breaker = CircuitBreaker(
+    threshold=settings.PAYSTACK_BREAKER_THRESHOLD,
+    reset_timeout=settings.PAYSTACK_BREAKER_RESET_TIMEOUT,
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The shared Session, created on first use (after settings are final)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=settings.PAYSTACK_MAX_RETRIES,
+                    # Connect errors mean the request never reached Paystack, so they are
+                    # retried for every method, including POST /transaction/initialize.
+                    connect=settings.PAYSTACK_MAX_RETRIES,
+                    # Read errors and 5xx/429 only for idempotent GETs (verify).
+                    read=settings.PAYSTACK_MAX_RETRIES,
+                    status=settings.PAYSTACK_MAX_RETRIES,
+                    allowed_methods=frozenset({'GET'}),
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    backoff_factor=0.3, # 0s, 0.6s, 1.2s, ...
+                    respect_retry_after_header=True,
+                    raise_on_status=False, # Hand the last response back so we can read its message
+                )
+                # pool_maxsize bounds keep-alive sockets per host, one per concurrent executor thread.
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter) # The local stub
+                session.headers.update({
+                    'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}',
+                    'Content-Type': 'application/json',
+                })
+                _session = session
+    return _session
+
+
+def _call(method, path, payload=None):
+    """Blocking call to the Paystack REST API. Returns the decoded JSON body."""
+    breaker.before_call()
+    try:
+        response = get_session().request(
+            method,
+            f'{settings.PAYSTACK_BASE_URL}{path}',
+            json=payload,
+            timeout=(settings.PAYSTACK_CONNECT_TIMEOUT, settings.PAYSTACK_READ_TIMEOUT),
+        )
+    except requests.RequestException as e:
+        breaker.record_failure()
+        raise PaystackError(f"Could not reach Paystack: {e}") from e
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        # A 4xx is Paystack answering (bad reference, invalid key, ...), not Paystack being down.
+        breaker.record_success()
+
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise PaystackError(f"Paystack returned an invalid response (HTTP {response.status_code})") from e
+
+    if not response.ok or not data.get('status'):
+        raise PaystackError(data.get('message') or f"Paystack returned HTTP {response.status_code}")
+    return data
+
+
+# `requests` has no async API, so the blocking call runs in the default executor
+# (thread_sensitive=False) instead of the event loop or the single shared sync thread.
+# The calling view stays a coroutine and the worker keeps serving other clients meanwhile.
+_acall = sync_to_async(_call, thread_sensitive=False)
+
+
+async def initialize_transaction(email, amount_kobo, reference, callback_url):
+    """Starts a Paystack checkout. Returns the `data` dict (authorization_url, access_code, reference)."""
+    body = await _acall('POST', '/transaction/initialize', {
+        'email': email,
+        'amount': amount_kobo,
+        'reference': reference,
+        'callback_url': callback_url,
+    })
+    return body['data']
+
+
+async def verify_transaction(reference):
+    """Fetches the final state of a transaction. Returns the `data` dict from Paystack."""
+    body = await _acall('GET', f'/transaction/verify/{reference}')
+    return body['data']
@@ -0,0 +1,214 @@
+# accounts/paystack_stub.py
+"""
+A local stand-in for the parts of the Paystack API the app uses, for offline development
+and testing. Run it with `python manage.py paystack_stub` and set
+PAYSTACK_BASE_URL=http://127.0.0.1:8765.
+
+    POST /transaction/initialize     -> authorization_url pointing at /checkout/<reference>
+    GET  /checkout/<reference>       -> a page with "Pay" / "Cancel" buttons
+    GET  /checkout/<reference>/<outcome>
+                                     -> records the outcome, redirects to callback_url like Paystack
+    GET  /transaction/verify/<ref>   -> the transaction as Paystack reports it
+
+With a webhook URL configured, a checkout outcome also POSTs a signed charge.success /
+charge.failed event to it, like Paystack does.
+
+State lives in memory and is lost on restart. `delay` and `fail_rate` simulate a slow or
+flaky gateway, to exercise the client's timeouts, retries and circuit breaker.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+import requests
+from django.utils import timezone
+from django.utils.html import escape
+
+OUTCOMES = ('success', 'failed', 'abandoned')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'PaystackStub/1.0'
+
+    # --- helpers ---
+
+    def _send_json(self, status_code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_html(self, html):
+        payload = html.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _simulate_gateway(self):
+        """Applies the configured delay and random failures. Returns False if the request was failed."""
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.fail_rate and random.random() < self.server.fail_rate:
+            self._send_json(503, {'status': False, 'message': 'Service unavailable (stub)'})
+            return False
+        return True
+
+    def _authorized(self):
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._send_json(401, {'status': False, 'message': 'No Authorization header was found'})
+            return False
+        return True
+
+    def log_message(self, format, *args):
+        self.server.log(f"{self.command} {self.path} -> {format % args}")
+
+    # --- routes ---
+
+    def do_POST(self):
+        if self.path != '/transaction/initialize':
+            return self._send_json(404, {'status': False, 'message': 'Not found'})
+        if not self._authorized() or not self._simulate_gateway():
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'status': False, 'message': 'Invalid JSON'})
+
+        reference = body.get('reference') or uuid.uuid4().hex
+        if not body.get('email') or not str(body.get('amount', '')).isdigit():
+            return self._send_json(400, {'status': False, 'message': 'email and amount (in kobo) are required'})
+
+        with self.server.lock:
+            if reference in self.server.transactions:
+                return self._send_json(400, {'status': False, 'message': 'Duplicate Transaction Reference'})
+            self.server.transactions[reference] = {
+                'reference': reference,
+                'amount': int(body['amount']),
+                'currency': 'NGN',
+                'status': 'ongoing',
+                'gateway_response': 'Pending',
+                'paid_at': None,
+                'customer': {'email': body['email']},
+                'callback_url': body.get('callback_url'),
+            }
+
+        self._send_json(200, {
+            'status': True,
+            'message': 'Authorization URL created',
+            'data': {
+                'authorization_url': f"{self.server.public_url}/checkout/{reference}",
+                'access_code': uuid.uuid4().hex[:15],
+                'reference': reference,
+            },
+        })
+
+    def do_GET(self):
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+
+        if parts[:2] == ['transaction', 'verify'] and len(parts) == 3:
+            if not self._authorized() or not self._simulate_gateway():
+                return
+            transaction = self.server.transactions.get(parts[2])
+            if transaction is None:
+                return self._send_json(400, {'status': False, 'message': 'Transaction reference not found'})
+            data = {key: value for key, value in transaction.items() if key != 'callback_url'}
+            return self._send_json(200, {'status': True, 'message': 'Verification successful', 'data': data})
+
+        if parts[:1] == ['checkout'] and len(parts) in (2, 3):
+            transaction = self.server.transactions.get(parts[1])
+            if transaction is None:
+                return self._send_json(404, {'status': False, 'message': 'Transaction reference not found'})
+
+            if len(parts) == 2:
+                reference = escape(parts[1])
+                return self._send_html(
+                    f"<h1>Paystack stub checkout</h1>"
+                    f"<p>{escape(transaction['customer']['email'])} &middot; "
+                    f"NGN {transaction['amount'] / 100:.2f} &middot; {reference}</p>"
+                    f"<p><a href='/checkout/{reference}/success'>Pay</a> | "
+                    f"<a href='/checkout/{reference}/failed'>Decline card</a> | "
+                    f"<a href='/checkout/{reference}/abandoned'>Cancel</a></p>"
+                )
+
+            outcome = parts[2]
+            if outcome not in OUTCOMES:
+                return self._send_json(400, {'status': False, 'message': f'Outcome must be one of {OUTCOMES}'})
+            with self.server.lock:
+                transaction['status'] = outcome
+                transaction['gateway_response'] = {'success': 'Successful', 'failed': 'Declined'}.get(outcome, 'Abandoned')
+                transaction['paid_at'] = timezone.now().isoformat() if outcome == 'success' else None
+
+            if outcome != 'abandoned':
+                self.server.send_webhook(f'charge.{outcome}', transaction)
+
+            # Like Paystack, send the browser back to the callback with the reference.
+            query = urlencode({'trxref': transaction['reference'], 'reference': transaction['reference']})
+            self.send_response(302)
+            self.send_header('Location', f"{transaction['callback_url']}?{query}")
+            self.end_headers()
+            return
+
+        self._send_json(404, {'status': False, 'message': 'Not found'})
+
+
+def sign(body, secret_key):
+    """The x-paystack-signature Paystack sends with a webhook: HMAC-SHA512 of the raw body."""
+    return hmac.new(secret_key.encode(), body, hashlib.sha512).hexdigest()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, delay=0, fail_rate=0, webhook_url=None, secret_key='', log=print):
+        super().__init__(address, StubHandler)
+        host, port = self.server_address[:2]
+        self.public_url = f"http://{host}:{port}"
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.log = log
+        self.lock = threading.Lock()
+        self.transactions = {}
+        self.webhook_url = webhook_url
+        self.secret_key = secret_key
+
+    def send_webhook(self, event, transaction):
+        """Posts a signed event to webhook_url on a separate thread, after the redirect has gone out."""
+        if not self.webhook_url:
+            return
+        data = {key: value for key, value in transaction.items() if key != 'callback_url'}
+        body = json.dumps({'event': event, 'data': data}).encode()
+        signature = sign(body, self.secret_key)
+
+        def deliver():
+            try:
+                response = requests.post(
+                    self.webhook_url,
+                    data=body,
+                    headers={'Content-Type': 'application/json', 'X-Paystack-Signature': signature},
+                    timeout=10,
+                )
+                self.log(f"Webhook {event} {data['reference']} -> HTTP {response.status_code}")
+            except requests.RequestException as e:
+                self.log(f"Webhook {event} {data['reference']} failed: {e}")
+
+        threading.Thread(target=deliver, daemon=True).start()
+
+
+def start_in_thread(host='127.0.0.1', port=0, **options):
+    """Starts a stub on a background thread (port 0 picks a free one). Call .shutdown() when done."""
+    server = StubServer((host, port), log=lambda message: None, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
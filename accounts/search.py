@@ -0,0 +1,185 @@
+# accounts/search.py
+"""
+Full-text profile search over username, first name, location and bio.
+
+The text lives in a separate full-text index keyed by profile id:
+  - SQLite: the FTS5 table accounts_profile_fts (rowid = profile id), ranked with bm25().
+  - PostgreSQL: accounts_profile_search, a weighted tsvector per profile with a GIN
+    index, ranked with ts_rank().
+Both are created by migration 0017. Other backends fall back to icontains.
+
+A profile's row is rewritten in the same transaction as the profile save that changed one
+of the SEARCH_FIELDS, and removed with the profile. `manage.py rebuild_search_index`
+rebuilds it from scratch.
+
+Every search term is a prefix match, and all terms must match. The caller's queryset (e.g.
+the browse rules) is applied inside the full-text query as an id subquery, so ranking,
+limit and offset only ever see profiles the caller may show.
+"""
+
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+SEARCH_FIELDS = ('username', 'first_name', 'location', 'bio')
+SEARCH_CANDIDATES = 1000 # Default cap on the ids match() returns
+MAX_TERMS = 8
+
+SQLITE_TABLE = 'accounts_profile_fts'
+POSTGRES_TABLE = 'accounts_profile_search'
+
+# Name matches outrank location matches, which outrank the bio.
+SQLITE_RANK = f'bm25({SQLITE_TABLE}, 10.0, 10.0, 4.0, 1.0)' # One weight per column, in SEARCH_FIELDS order
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(%s, '') || ' ' || coalesce(%s, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(%s, '')), 'B')"
+    " || setweight(to_tsvector('simple', coalesce(%s, '')), 'C')"
+)
+
+
+def search_terms(query):
+    """Lower-cased word tokens of a user's query; punctuation and operators are dropped."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def _sqlite_match(terms):
+    return ' '.join(f'"{term}"*' for term in terms) # Quoted, so words like AND/NEAR aren't operators
+
+
+def _postgres_match(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+# --- Keeping the index up to date ---
+
+def index_profile(profile, using='default'):
+    connection = connections[using]
+    values = [getattr(profile, field) or '' for field in SEARCH_FIELDS]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [profile.pk])
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)',
+                [profile.pk, *values],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_TABLE} (profile_id, document) VALUES (%s, {POSTGRES_DOCUMENT}) '
+                f'ON CONFLICT (profile_id) DO UPDATE SET document = EXCLUDED.document',
+                [profile.pk, *values],
+            )
+
+
+def unindex_profile(profile_id, using='default'):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [profile_id])
+        # PostgreSQL: the row goes with the profile (ON DELETE CASCADE).
+
+
+def rebuild_index(using='default'):
+    """Rebuilds the whole index with one INSERT ... SELECT. Returns the number of profiles indexed."""
+    connection = connections[using]
+    columns = ', '.join(SEARCH_FIELDS)
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+            cursor.execute(f'INSERT INTO {SQLITE_TABLE} (rowid, {columns}) SELECT id, {columns} FROM accounts_userprofile')
+            indexed = cursor.rowcount
+            cursor.execute(f"INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}) VALUES ('optimize')") # Merge the index segments
+        else:
+            cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_TABLE} (profile_id, document) '
+                f'SELECT id, {POSTGRES_DOCUMENT % tuple(SEARCH_FIELDS)} FROM accounts_userprofile'
+            )
+            indexed = cursor.rowcount
+    return indexed
+
+
+@receiver(post_save, sender=UserProfile, dispatch_uid='search_index_profile')
+def _profile_saved(sender, instance, created, update_fields=None, using='default', **kwargs):
+    # Saves that only touch other fields (last_login on every login, premium flags...) leave the index alone.
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_profile(instance, using)
+
+
+@receiver(post_delete, sender=UserProfile, dispatch_uid='search_unindex_profile')
+def _profile_deleted(sender, instance, using='default', **kwargs):
+    unindex_profile(instance.pk, using)
+
+
+# --- Searching ---
+
+def _within_sql(queryset, column, connection):
+    """` AND <column> IN (<queryset's ids>)` and its params, or ('', []) without a queryset."""
+    if queryset is None:
+        return '', []
+    sql, params = queryset.order_by().values('pk').query.get_compiler(connection=connection).as_sql()
+    return f' AND {column} IN ({sql})', list(params)
+
+
+def match(query, limit=SEARCH_CANDIDATES, offset=0, within=None, using='default'):
+    """
+    Ids of the profiles matching every term of `query`, best match first: at most `limit`
+    of them, starting at `offset`. With `within` (a UserProfile queryset), only profiles in
+    that queryset are matched, ranked and counted towards the offset.
+    Returns None when the backend has no full-text index (see search()).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    connection = connections[using]
+    try:
+        return _match(terms, limit, offset, within, connection)
+    except EmptyResultSet: # `within` can match nothing
+        return []
+
+
+def _match(terms, limit, offset, within, connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            within_sql, within_params = _within_sql(within, 'rowid', connection)
+            cursor.execute(
+                f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s{within_sql} '
+                f'ORDER BY {SQLITE_RANK} LIMIT %s OFFSET %s',
+                [_sqlite_match(terms), *within_params, limit, offset],
+            )
+        elif connection.vendor == 'postgresql':
+            within_sql, within_params = _within_sql(within, 'profile_id', connection)
+            cursor.execute(
+                f"SELECT profile_id FROM {POSTGRES_TABLE}, to_tsquery('simple', %s) query "
+                f"WHERE document @@ query{within_sql} "
+                f"ORDER BY ts_rank(document, query) DESC LIMIT %s OFFSET %s",
+                [_postgres_match(terms), *within_params, limit, offset],
+            )
+        else:
+            return None
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(queryset, query, limit, offset=0):
+    """
+    Profiles from `queryset` matching `query`, best match first: a list of at most `limit`
+    profiles starting at `offset` among the ranked matches.
+    """
+    page = match(query, limit, offset, within=queryset, using=queryset.db)
+    if page is None:
+        # No full-text index on this backend: a plain (unranked) scan.
+        condition = Q()
+        for term in search_terms(query):
+            condition &= Q(username__icontains=term) | Q(first_name__icontains=term) | Q(location__icontains=term) | Q(bio__icontains=term)
+        return list(queryset.filter(condition).order_by('-last_login')[offset:offset + limit])
+
+    profiles = queryset.in_bulk(page)
+    return [profiles[pk] for pk in page if pk in profiles]
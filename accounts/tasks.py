@@ -0,0 +1,49 @@
+# accounts/tasks.py
+"""
+In-process background execution for work that shouldn't hold up a response.
+
+Jobs run on a small thread pool in the same worker process. Nothing is persisted here:
+callers keep their own durable record (a table row with a "processed" marker) so a
+management command can pick up anything lost to a restart.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix='loveny-tasks',
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__name__', func))
+    finally:
+        # Pool threads are long-lived; don't leave a connection open between jobs.
+        connection.close()
+
+
+def enqueue(func, *args, **kwargs):
+    """Runs func(*args, **kwargs) on the background pool. Safe to call from sync or async code."""
+    _get_executor().submit(_run, func, args, kwargs)
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    """Like enqueue(), but waits for the current transaction to commit so the job sees its writes."""
+    transaction.on_commit(lambda: enqueue(func, *args, **kwargs))
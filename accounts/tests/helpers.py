@@ -0,0 +1,39 @@
+# accounts/tests/helpers.py
+"""Shared fixtures for the accounts tests."""
+
+import itertools
+from datetime import date
+
+from django.conf import settings
+from django.test import override_settings
+
+from accounts.models import UserProfile
+
+_serial = itertools.count(1)
+
+
+def profile_fields(**fields):
+    """Field values for a profile browse would show (active, picture, date of birth), overridden by `fields`."""
+    n = next(_serial)
+    values = {
+        'username': f'user{n}',
+        'email': f'user{n}@example.com',
+        'profile_picture': f'profile_pictures/user_{n}/photo.jpg',
+        'date_of_birth': date(1995, 1, 1),
+        'gender': 'F',
+        'looking_for': 'DATING',
+        'seeking': 'M',
+    }
+    values.update(fields)
+    return values
+
+
+def make_user(**fields):
+    return UserProfile.objects.create_user(password='x', **profile_fields(**fields))
+
+
+# Page tests don't run collectstatic, so they use plain static names (test_static.py covers the manifest).
+plain_static = override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
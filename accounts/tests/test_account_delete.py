@@ -0,0 +1,73 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import moderation
+from accounts.models import Like, ModerationJob, UserProfile
+
+from .helpers import make_user, plain_static
+
+
+@plain_static
+class AccountDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user(gender='M', seeking='F', is_premium=True, premium_expiry_date=timezone.now() + timedelta(days=30))
+        cls.leaving = make_user(gender='F', bio='Keen sailor')
+        cls.staying = make_user(gender='F', bio='Keen sailor')
+        for admirer in (cls.leaving, cls.staying):
+            Like.objects.create(liker=admirer, liked_user=cls.viewer)
+
+    def setUp(self):
+        cache.clear()
+
+    def delete_account(self):
+        self.client.force_login(self.leaving)
+        with mock.patch('accounts.tasks.enqueue') as enqueue, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('accounts:account_delete'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        return enqueue
+
+    def usernames(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        if 'categories' in data:
+            return {card['username'] for category in data['categories'] for card in category['profiles']}
+        if 'admirers' in data:
+            return {admirer['username'] for admirer in data['admirers']}
+        return {card['username'] for card in data['profiles']}
+
+    def test_tombstone_hides_the_account_before_the_purge_runs(self):
+        enqueue = self.delete_account()
+        self.leaving.refresh_from_db()
+        self.assertFalse(self.leaving.is_active)
+        self.assertIsNotNone(self.leaving.deleted_at)
+        self.assertNotIn('_auth_user_id', self.client.session) # Logged out
+        job = ModerationJob.objects.get()
+        self.assertEqual((job.action, job.target_ids), ('delete', [self.leaving.pk]))
+        enqueue.assert_called_once_with(moderation.run_job, job.pk)
+
+        self.client.force_login(self.viewer)
+        leaving, staying = self.leaving.username, self.staying.username
+        self.assertEqual(self.usernames('accounts:browse_profiles_feed'), {staying})
+        self.assertEqual(self.usernames('accounts:search_profiles', q='sailor'), {staying})
+        self.assertEqual(self.usernames('accounts:likes_you_feed'), {staying})
+        self.assertEqual(self.client.get(reverse('accounts:view_user_profile', args=[leaving])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('accounts:like_user', args=[leaving])).status_code, 404)
+
+    def test_tombstoned_account_cannot_log_in(self):
+        self.delete_account()
+        self.assertFalse(self.client.login(username=self.leaving.username, password='x'))
+
+    def test_purge_job_removes_the_account(self):
+        self.delete_account()
+        moderation.run_job(ModerationJob.objects.get().pk)
+        self.assertFalse(UserProfile.objects.filter(pk=self.leaving.pk).exists())
+        self.assertEqual(list(Like.objects.values_list('liker', flat=True)), [self.staying.pk])
+        self.viewer.refresh_from_db()
+        self.assertEqual(self.viewer.likes_received_count, 1)
@@ -0,0 +1,131 @@
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.messages import get_messages
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import admin as accounts_admin
+from accounts.models import Like, UserProfile
+
+from .helpers import make_user, plain_static
+
+
+@plain_static
+class AdminTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moderator = UserProfile.objects.create_superuser(email='mod@example.com', username='mod', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.moderator)
+
+    def changelist(self, model, **params):
+        response = self.client.get(reverse(f'admin:accounts_{model}_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def result_pks(self, response):
+        return {obj.pk for obj in response.context['cl'].result_list}
+
+    def warnings(self, response):
+        return [str(message) for message in get_messages(response.wsgi_request) if message.level_tag == 'warning']
+
+
+class AdminSearchTests(AdminTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sailors = [make_user(bio='Keen sailor', is_premium=index < 2) for index in range(5)]
+        cls.other = make_user(bio='Gardener')
+        for sailor in cls.sailors:
+            Like.objects.create(liker=cls.other, liked_user=sailor)
+
+    def test_search_within_the_limit_lists_every_match(self):
+        response = self.changelist('userprofile', q='sailor')
+        self.assertEqual(self.result_pks(response), {user.pk for user in self.sailors})
+        self.assertEqual(self.warnings(response), [])
+
+    def test_truncated_search_warns_the_moderator(self):
+        with mock.patch.object(accounts_admin, 'ADMIN_SEARCH_LIMIT', 3):
+            response = self.changelist('like', q='sailor')
+            self.assertEqual(len(self.result_pks(response)), 3)
+            [warning] = self.warnings(response)
+        self.assertIn('More than 3 users match', warning)
+
+    def test_user_search_matches_within_the_filtered_list(self):
+        # Only the two premium sailors are candidates, so the limit isn't reached
+        with mock.patch.object(accounts_admin, 'ADMIN_SEARCH_LIMIT', 3):
+            response = self.changelist('userprofile', q='sailor', is_premium__exact='1')
+        self.assertEqual(self.result_pks(response), {user.pk for user in self.sailors[:2]})
+        self.assertEqual(self.warnings(response), [])
+
+    def test_exact_email(self):
+        response = self.changelist('userprofile', q=self.other.email.upper())
+        self.assertEqual(self.result_pks(response), {self.other.pk})
+
+
+class EstimatedCountPaginatorTests(AdminTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.users = [make_user() for _ in range(6)]
+
+    def paginator(self, queryset):
+        return accounts_admin.EstimatedCountPaginator(queryset, 2)
+
+    def test_small_tables_are_counted_exactly(self):
+        self.users[0].delete()
+        self.assertEqual(self.paginator(UserProfile.objects.all()).count, UserProfile.objects.count())
+
+    def test_big_unfiltered_tables_are_estimated_without_a_count(self):
+        self.users[0].delete() # MAX(id) doesn't notice deletions
+        top = UserProfile.objects.order_by('-pk')[0].pk
+        with mock.patch.object(accounts_admin, 'ESTIMATE_THRESHOLD', 1), self.assertNumQueries(1):
+            self.assertEqual(self.paginator(UserProfile.objects.all()).count, top)
+
+    def test_filtered_counts_stop_at_the_limit(self):
+        with mock.patch.object(accounts_admin, 'ESTIMATE_THRESHOLD', 1), mock.patch.object(accounts_admin, 'COUNT_LIMIT', 4):
+            self.assertEqual(self.paginator(UserProfile.objects.filter(is_staff=False)).count, 4)
+            self.assertEqual(self.paginator(UserProfile.objects.filter(pk=self.users[0].pk)).count, 1)
+
+    def test_changelist_renders_with_the_estimate(self):
+        with mock.patch.object(accounts_admin, 'ESTIMATE_THRESHOLD', 1):
+            response = self.changelist('userprofile')
+        self.assertEqual(response.context['cl'].result_count, UserProfile.objects.order_by('-pk')[0].pk)
+
+
+class IndexedDateHierarchyTests(AdminTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        dates = [datetime(2024, 3, 5, 12), datetime(2026, 2, 10, 12), datetime(2026, 2, 12, 12), datetime(2026, 4, 1, 12)]
+        for day in dates:
+            user = make_user()
+            UserProfile.objects.filter(pk=user.pk).update(date_joined=timezone.make_aware(day))
+        UserProfile.objects.filter(pk=cls.moderator.pk).update(date_joined=timezone.make_aware(datetime(2026, 4, 1, 9)))
+
+    def hierarchy_links(self, **params):
+        content = self.changelist('userprofile', **params).content.decode()
+        start = content.index('<nav class="toplinks">')
+        return content[start:content.index('</nav>', start)].replace('&amp;', '&')
+
+    def test_years_span_first_to_last_value(self):
+        links = self.hierarchy_links()
+        for year in (2024, 2025, 2026):
+            self.assertIn(f'?date_joined__year={year}', links)
+        self.assertNotIn('date_joined__year=2023', links)
+
+    def test_months_of_a_year(self):
+        links = self.hierarchy_links(date_joined__year=2026)
+        for month in (2, 3, 4):
+            self.assertIn(f'date_joined__month={month}', links)
+        self.assertNotIn('date_joined__month=1&', links)
+        self.assertNotIn('date_joined__month=5', links)
+
+    def test_days_of_a_month(self):
+        links = self.hierarchy_links(date_joined__year=2026, date_joined__month=2)
+        self.assertIn('date_joined__day=10', links)
+        self.assertIn('date_joined__day=12', links)
+        self.assertNotIn('date_joined__day=13', links)
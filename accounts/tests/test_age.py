@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from accounts.models import UserProfile, age_on, years_before
+
+from .helpers import make_user
+
+
+class AgeArithmeticTests(SimpleTestCase):
+    def test_years_before(self):
+        self.assertEqual(years_before(date(2026, 10, 19), 30), date(1996, 10, 19))
+        self.assertEqual(years_before(date(2024, 2, 29), 1), date(2023, 2, 28))
+        self.assertEqual(years_before(date(2024, 2, 29), 4), date(2020, 2, 29))
+
+    def test_age_turns_on_the_birthday(self):
+        born = date(2000, 6, 15)
+        self.assertEqual(age_on(born, date(2030, 6, 14)), 29)
+        self.assertEqual(age_on(born, date(2030, 6, 15)), 30)
+        self.assertEqual(age_on(born, date(2030, 6, 16)), 30)
+
+    def test_leap_day_birthday_counts_from_the_first_of_march_in_common_years(self):
+        born = date(2000, 2, 29)
+        self.assertEqual(age_on(born, date(2023, 2, 28)), 22)
+        self.assertEqual(age_on(born, date(2023, 3, 1)), 23)
+        self.assertEqual(age_on(born, date(2024, 2, 29)), 24)
+
+
+class DatabaseAgeTests(TestCase):
+    """The database filters and annotations agree with age_on() on and around every boundary."""
+
+    @classmethod
+    def setUpTestData(cls):
+        births = [
+            date(2000, 6, 14), date(2000, 6, 15), date(2000, 6, 16), # Around a 30th birthday on 2030-06-15
+            date(2000, 2, 29), date(2000, 2, 28), date(2000, 3, 1),
+            date(2001, 3, 1), date(2001, 2, 28),
+            date(2012, 6, 16), date(2012, 6, 15), # 17 and 18 on 2030-06-15
+        ]
+        cls.users = [make_user(date_of_birth=born) for born in births]
+
+    def ages(self, today):
+        return dict(UserProfile.objects.with_age(today).values_list('date_of_birth', 'age'))
+
+    def matching(self, today, min_age=None, max_age=None):
+        return set(UserProfile.objects.age_between(min_age, max_age, today).values_list('date_of_birth', flat=True))
+
+    def expected(self, today, min_age=None, max_age=None):
+        return {
+            user.date_of_birth for user in self.users
+            if (min_age is None or age_on(user.date_of_birth, today) >= min_age)
+            and (max_age is None or age_on(user.date_of_birth, today) <= max_age)
+        }
+
+    def test_annotated_age_matches_python(self):
+        for today in (date(2030, 6, 14), date(2030, 6, 15), date(2023, 2, 28), date(2023, 3, 1), date(2024, 2, 29)):
+            with self.subTest(today=today):
+                self.assertEqual(self.ages(today), {user.date_of_birth: age_on(user.date_of_birth, today) for user in self.users})
+
+    def test_min_and_max_age_are_inclusive(self):
+        today = date(2030, 6, 15)
+        self.assertEqual(self.matching(today, min_age=30), self.expected(today, min_age=30))
+        self.assertIn(date(2000, 6, 15), self.matching(today, min_age=30)) # 30 today
+        self.assertNotIn(date(2000, 6, 16), self.matching(today, min_age=30)) # 30 tomorrow
+        self.assertIn(date(2000, 6, 14), self.matching(today, max_age=30)) # 30 since yesterday
+        self.assertEqual(self.matching(today, 30, 30), self.expected(today, 30, 30))
+        self.assertNotIn(date(2000, 6, 16), self.matching(today, 30, 30))
+        self.assertEqual(self.matching(today, min_age=18), self.expected(today, min_age=18))
+        self.assertNotIn(date(2012, 6, 16), self.matching(today, min_age=18))
+
+    def test_leap_day_boundaries(self):
+        for today in (date(2023, 2, 28), date(2023, 3, 1), date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1)):
+            for low, high in ((22, 22), (23, 23), (23, None), (None, 22), (24, 24)):
+                with self.subTest(today=today, min_age=low, max_age=high):
+                    self.assertEqual(self.matching(today, low, high), self.expected(today, low, high))
+        self.assertNotIn(date(2000, 2, 29), self.matching(date(2023, 2, 28), min_age=23))
+        self.assertIn(date(2000, 2, 29), self.matching(date(2023, 3, 1), min_age=23))
+
+    def test_age_bucket_edges(self):
+        today = date(2030, 6, 15)
+        buckets = dict(UserProfile.objects.with_age_bucket(today).values_list('date_of_birth', 'age_bucket'))
+        self.assertEqual(buckets[date(2012, 6, 15)], '18-24')
+        self.assertIsNone(buckets[date(2012, 6, 16)]) # Under 18
+        self.assertEqual(buckets[date(2000, 6, 15)], '25-34')
@@ -0,0 +1,160 @@
+import csv
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import analytics
+from accounts.models import (
+    DailyEngagementRollup, DailyRevenueRollup, Like, PaymentTransaction, RollupWatermark, SubscriptionPlan, UserProfile,
+)
+
+from .helpers import make_user
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plan = SubscriptionPlan.objects.create(name='Gold', price=Decimal('2500.00'), duration_days=30)
+        cls.user = make_user()
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.payments = 0
+
+    def pay(self, day, amount='2500.00', status='success'):
+        self.payments += 1
+        payment = PaymentTransaction.objects.create(
+            user=self.user, plan=self.plan, amount=Decimal(amount), status=status, reference=f'LOVENY-{self.payments}',
+        )
+        PaymentTransaction.objects.filter(pk=payment.pk).update(created_at=analytics.day_start(day) + timedelta(hours=12))
+
+    def revenue(self, day):
+        return DailyRevenueRollup.objects.values_list('payments', 'revenue').get(day=day, plan=self.plan)
+
+    def test_incremental_run_recomputes_from_the_watermark_day(self):
+        yesterday = self.today - timedelta(days=1)
+        self.pay(yesterday)
+        self.pay(self.today)
+        self.pay(self.today, status='failed')
+        analytics.update_rollups(['revenue'])
+        self.assertEqual(self.revenue(self.today), (1, Decimal('2500.00')))
+        self.assertEqual(RollupWatermark.objects.get(name='revenue').rolled_through, self.today)
+
+        # Mark yesterday's row: a rerun must leave days before the watermark alone.
+        DailyRevenueRollup.objects.filter(day=yesterday).update(payments=99)
+        self.pay(self.today, amount='1000.00') # Today was still partial
+        analytics.update_rollups(['revenue'])
+        self.assertEqual(self.revenue(self.today), (2, Decimal('3500.00')))
+        self.assertEqual(self.revenue(yesterday)[0], 99)
+
+        analytics.update_rollups(['revenue'], rebuild=True)
+        self.assertEqual(self.revenue(yesterday), (1, Decimal('2500.00')))
+
+    def test_watermark_in_the_future_writes_nothing(self):
+        RollupWatermark.objects.create(name='revenue', rolled_through=self.today + timedelta(days=1))
+        self.pay(self.today)
+        self.assertEqual(analytics.update_rollups(['revenue']), {'revenue': 0})
+        self.assertFalse(DailyRevenueRollup.objects.exists())
+
+    def test_engagement_counts_likes_matches_and_signups_per_city(self):
+        lagos = make_user(location=' Lagos ')
+        abuja = make_user(location='Abuja')
+        Like.objects.create(liker=self.user, liked_user=lagos)
+        Like.objects.create(liker=lagos, liked_user=self.user) # Completes a match
+        Like.objects.create(liker=self.user, liked_user=abuja)
+        UserProfile.objects.update(date_joined=analytics.day_start(self.today) + timedelta(hours=1))
+        analytics.update_rollups(['engagement'])
+        rows = {
+            row.city: (row.likes, row.matches, row.signups)
+            for row in DailyEngagementRollup.objects.filter(day=self.today)
+        }
+        # The like back lands in self.user's (blank) city and is the one that completes the match
+        self.assertEqual(rows, {'': (1, 1, 1), 'Lagos': (1, 0, 1), 'Abuja': (1, 0, 1)})
+
+
+class ReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Monday 2024-01-29 to Sunday 2024-02-04: one week, two months
+        for offset in range(7):
+            day = date(2024, 1, 29) + timedelta(days=offset)
+            DailyRevenueRollup.objects.create(day=day, plan_name='Gold', payments=1, revenue=Decimal('10.00'), subscribers=offset + 1)
+            DailyEngagementRollup.objects.create(day=day, city='Lagos', likes=2, matches=1, signups=offset % 2)
+        cls.since, cls.until = date(2024, 1, 29), date(2024, 2, 4)
+
+    def report(self, report, period):
+        return list(analytics.REPORTS[report][0](self.since, self.until, period))
+
+    def test_week_folds_the_days(self):
+        [week] = self.report('revenue', 'week')
+        self.assertEqual(week['period'], date(2024, 1, 29))
+        self.assertEqual((week['payments'], week['revenue'], week['subscribers']), (7, Decimal('70.00'), 7)) # Peak, not a sum
+
+    def test_month_splits_at_the_month_boundary(self):
+        january, february = self.report('engagement', 'month')
+        self.assertEqual((january['period'], january['likes'], january['matches'], january['signups']), (date(2024, 1, 1), 6, 3, 1))
+        self.assertEqual((february['period'], february['likes'], february['matches'], february['signups']), (date(2024, 2, 1), 8, 4, 2))
+
+    def test_day_is_one_row_per_day(self):
+        self.assertEqual(len(self.report('revenue', 'day')), 7)
+
+    def test_csv_output(self):
+        lines = list(analytics.iter_report('revenue', self.since, self.until, 'month', 'csv'))
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[0], ['period', 'plan_name', 'payments', 'revenue', 'subscribers'])
+        # SUM() of a decimal keeps its scale on PostgreSQL but not on SQLite ('30' rather than '30.00')
+        self.assertEqual(
+            [[*row[:3], Decimal(row[3]), row[4]] for row in rows[1:]],
+            [['2024-01-01', 'Gold', '3', Decimal('30'), '3'], ['2024-02-01', 'Gold', '4', Decimal('40'), '7']],
+        )
+
+    def test_jsonl_output(self):
+        lines = list(analytics.iter_report('engagement', self.since, self.until, 'week', 'jsonl'))
+        self.assertTrue(all(line.endswith('\n') for line in lines))
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'period': '2024-01-29', 'city': 'Lagos', 'likes': 14, 'matches': 7, 'signups': 3}],
+        )
+
+    async def test_async_output_matches(self):
+        for output_format in analytics.FORMATS:
+            lines = [line async for line in analytics.aiter_report('revenue', self.since, self.until, 'day', output_format)]
+            expected = await sync_to_async(list)(analytics.iter_report('revenue', self.since, self.until, 'day', output_format))
+            self.assertEqual(lines, expected)
+
+
+class AnalyticsReportViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        DailyRevenueRollup.objects.create(day=date(2024, 1, 29), plan_name='Gold', payments=1, revenue=Decimal('10.00'))
+        cls.staff = make_user(is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.async_client.cookies = self.client.cookies
+        self.params = {'report': 'revenue', 'since': '2024-01-01', 'until': '2024-01-31', 'format': 'csv'}
+
+    async def test_asgi_download_streams_an_async_iterator(self):
+        response = await self.async_client.get(reverse('accounts:analytics_report'), self.params)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('revenue-2024-01-01-2024-01-31.csv', response['Content-Disposition'])
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        period, plan_name, payments, revenue, subscribers = body.splitlines()[1].split(',')
+        self.assertEqual((period, plan_name, payments, Decimal(revenue), subscribers), ('2024-01-29', 'Gold', '1', Decimal('10'), '0'))
+
+    def test_wsgi_download_streams_a_sync_iterator(self):
+        response = self.client.get(reverse('accounts:analytics_report'), {**self.params, 'format': 'jsonl'})
+        self.assertFalse(response.is_async)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(Decimal(json.loads(b''.join(response.streaming_content))['revenue']), Decimal('10'))
+
+    def test_staff_only(self):
+        self.client.force_login(make_user())
+        response = self.client.get(reverse('accounts:analytics_report'), self.params)
+        self.assertEqual(response.status_code, 302)
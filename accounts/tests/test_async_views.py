@@ -0,0 +1,146 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.shortcuts import resolve_url
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts import paystack
+from accounts.models import Like, PaymentTransaction, SubscriptionPlan
+
+from .helpers import make_user, plain_static
+
+
+class AsyncViewTestCase(TestCase):
+    """Drives the async views through AsyncClient, logged in as `viewer`."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user(gender='M', seeking='F')
+        cls.other = make_user(gender='F', seeking='M')
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+        self.async_client.cookies = self.client.cookies
+
+    async def assertLoginRequired(self, method, url):
+        self.async_client.cookies.clear()
+        response = await getattr(self.async_client, method)(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(resolve_url(settings.LOGIN_URL)))
+
+
+class LikeViewTests(AsyncViewTestCase):
+    def url(self, user):
+        return reverse('accounts:like_user', args=[user.username])
+
+    async def like(self, user):
+        with mock.patch('accounts.tasks.enqueue'):
+            response = await self.async_client.post(self.url(user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_like_toggles(self):
+        liked = await self.like(self.other)
+        self.assertEqual((liked['status'], liked['action'], liked['has_liked'], liked['is_matched']), ('ok', 'liked', True, False))
+        self.assertTrue(await Like.objects.filter(liker=self.viewer, liked_user=self.other).aexists())
+        unliked = await self.like(self.other)
+        self.assertEqual((unliked['action'], unliked['has_liked']), ('unliked', False))
+        self.assertFalse(await Like.objects.filter(liker=self.viewer, liked_user=self.other).aexists())
+
+    async def test_liking_back_is_a_match(self):
+        await Like.objects.acreate(liker=self.other, liked_user=self.viewer)
+        liked = await self.like(self.other)
+        self.assertTrue(liked['is_matched'])
+        self.assertIsNone(liked['whatsapp_link']) # Not premium
+
+    async def test_get_is_a_json_405(self):
+        response = await self.async_client.get(self.url(self.other))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.json()['status'], 'error')
+
+    async def test_own_profile_is_a_json_error(self):
+        data = await self.like(self.viewer)
+        self.assertEqual(data, {'status': 'error', 'message': 'Cannot like your own profile.'})
+        self.assertFalse(await Like.objects.aexists())
+
+    async def test_unknown_user_is_a_404(self):
+        response = await self.async_client.post(reverse('accounts:like_user', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_login_required(self):
+        await self.assertLoginRequired('post', self.url(self.other))
+        self.assertFalse(await Like.objects.aexists())
+
+
+@plain_static
+class SwipeViewTests(AsyncViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.unseen = make_user(gender='F', seeking='M')
+
+    async def test_deck_leaves_out_liked_profiles(self):
+        await Like.objects.acreate(liker=self.viewer, liked_user=self.other)
+        response = await self.async_client.get(reverse('accounts:swipe_profiles'))
+        self.assertEqual(response.status_code, 200)
+        deck = json.loads(response.context['profiles_json'])
+        self.assertEqual([card['username'] for card in deck], [self.unseen.username])
+
+    async def test_login_required(self):
+        await self.assertLoginRequired('get', reverse('accounts:swipe_profiles'))
+
+
+class PaymentViewTests(AsyncViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.plan = SubscriptionPlan.objects.create(name='Gold', price=Decimal('2500.00'), duration_days=30)
+
+    def initiate_url(self, plan_id=None):
+        return reverse('accounts:initiate_payment', args=[plan_id or self.plan.pk])
+
+    async def test_initiate_redirects_to_checkout(self):
+        checkout = {'authorization_url': 'https://checkout.example/abc'}
+        with mock.patch.object(paystack, 'initialize_transaction', mock.AsyncMock(return_value=checkout)) as initialize:
+            response = await self.async_client.get(self.initiate_url())
+        self.assertRedirects(response, checkout['authorization_url'], fetch_redirect_response=False)
+        payment = await PaymentTransaction.objects.aget(user=self.viewer)
+        self.assertEqual((payment.status, payment.amount), ('pending', self.plan.price))
+        self.assertEqual(initialize.call_args.kwargs['amount_kobo'], 250000)
+        self.assertEqual(initialize.call_args.kwargs['reference'], payment.reference)
+
+    async def test_gateway_error_fails_the_payment(self):
+        with mock.patch.object(paystack, 'initialize_transaction', mock.AsyncMock(side_effect=paystack.PaystackError('down'))):
+            response = await self.async_client.get(self.initiate_url())
+        self.assertRedirects(response, reverse('accounts:payment_failed'), fetch_redirect_response=False)
+        self.assertEqual((await PaymentTransaction.objects.aget(user=self.viewer)).status, 'failed')
+
+    async def test_inactive_plan_is_a_404(self):
+        self.plan.is_active = False
+        await self.plan.asave()
+        response = await self.async_client.get(self.initiate_url())
+        self.assertEqual(response.status_code, 404)
+
+    async def test_verify_activates_the_plan(self):
+        payment = await PaymentTransaction.objects.acreate(user=self.viewer, plan=self.plan, amount=self.plan.price, reference='LOVENY-verify')
+        gateway_data = {'reference': payment.reference, 'status': 'success', 'amount': 250000}
+        with mock.patch.object(paystack, 'verify_transaction', mock.AsyncMock(return_value=gateway_data)):
+            response = await self.async_client.get(reverse('accounts:verify_payment'), {'reference': payment.reference})
+        self.assertRedirects(response, reverse('accounts:payment_success'), fetch_redirect_response=False)
+        await payment.arefresh_from_db()
+        self.assertEqual(payment.status, 'success')
+
+    async def test_verify_without_a_reference_or_with_someone_elses(self):
+        response = await self.async_client.get(reverse('accounts:verify_payment'))
+        self.assertRedirects(response, reverse('accounts:payment_failed'), fetch_redirect_response=False)
+        payment = await PaymentTransaction.objects.acreate(user=self.other, plan=self.plan, amount=self.plan.price, reference='LOVENY-other')
+        response = await self.async_client.get(reverse('accounts:verify_payment'), {'reference': payment.reference})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_login_required(self):
+        await self.assertLoginRequired('get', self.initiate_url())
+        await self.assertLoginRequired('get', reverse('accounts:verify_payment') + '?reference=LOVENY-x')
+        self.assertFalse(await PaymentTransaction.objects.aexists())
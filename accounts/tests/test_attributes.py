@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import UserProfile, attribute_bits_for
+
+from .helpers import make_user
+
+
+class AttributeBitsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.muslim_smoker = make_user(religion='ISLAM', smoking_habits='REGULARLY', has_children=True)
+        cls.muslim_non_smoker = make_user(religion='ISLAM', smoking_habits='NON_SMOKER', has_children=False)
+        cls.christian_non_smoker = make_user(religion='CHRISTIANITY', smoking_habits='NON_SMOKER')
+        cls.atheist = make_user(religion='ATHEIST')
+        cls.unset = make_user()
+
+    def stored_bits(self, user):
+        return UserProfile.objects.values_list('attribute_bits', flat=True).get(pk=user.pk)
+
+    def matching(self, selected):
+        return set(UserProfile.objects.with_attributes(selected).values_list('pk', flat=True))
+
+    def test_save_with_update_fields_on_an_attribute_refreshes_the_bits(self):
+        user = UserProfile.objects.get(pk=self.atheist.pk)
+        user.religion = 'BUDDHISM'
+        user.smoking_habits = 'OCCASIONALLY'
+        user.save(update_fields=['religion', 'smoking_habits'])
+        self.assertEqual(self.stored_bits(user), attribute_bits_for(user))
+        self.assertEqual(self.matching({'religion': ['BUDDHISM'], 'smoking_habits': ['OCCASIONALLY']}), {user.pk})
+        self.assertEqual(self.matching({'religion': ['ATHEIST']}), set())
+
+    def test_save_with_other_update_fields_leaves_the_bits_alone(self):
+        UserProfile.objects.filter(pk=self.atheist.pk).update(attribute_bits=0) # Marker: not rewritten by the save below
+        user = UserProfile.objects.get(pk=self.atheist.pk)
+        user.bio = 'Hello'
+        user.save(update_fields=['bio'])
+        self.assertEqual(self.stored_bits(user), 0)
+
+    def test_full_save_refreshes_the_bits(self):
+        user = UserProfile.objects.get(pk=self.unset.pk)
+        user.has_children = False
+        user.save()
+        self.assertEqual(self.matching({'has_children': ['False']}), {self.muslim_non_smoker.pk, user.pk})
+
+    def test_values_of_one_field_are_ored(self):
+        self.assertEqual(
+            self.matching({'religion': ['ISLAM', 'ATHEIST']}),
+            {self.muslim_smoker.pk, self.muslim_non_smoker.pk, self.atheist.pk},
+        )
+
+    def test_fields_are_anded(self):
+        self.assertEqual(self.matching({'religion': ['ISLAM'], 'smoking_habits': ['NON_SMOKER']}), {self.muslim_non_smoker.pk})
+        self.assertEqual(
+            self.matching({'religion': ['ISLAM', 'CHRISTIANITY'], 'smoking_habits': ['NON_SMOKER']}),
+            {self.muslim_non_smoker.pk, self.christian_non_smoker.pk},
+        )
+        self.assertEqual(self.matching({'religion': ['ATHEIST'], 'smoking_habits': ['NON_SMOKER']}), set())
+
+    def test_boolean_values_come_as_strings(self):
+        self.assertEqual(self.matching({'has_children': ['True']}), {self.muslim_smoker.pk})
+
+    def test_unknown_fields_and_values_are_ignored(self):
+        everyone = set(UserProfile.objects.values_list('pk', flat=True))
+        self.assertEqual(self.matching({'religion': ['PASTAFARIAN']}), everyone)
+        self.assertEqual(self.matching({'shoe_size': ['42']}), everyone)
+
+    def test_rebuild_matches_save(self):
+        expected = {user.pk: attribute_bits_for(user) for user in UserProfile.objects.all()}
+        UserProfile.objects.update(attribute_bits=0) # As after a bulk edit that bypassed save()
+        call_command('rebuild_attribute_bits', stdout=StringIO())
+        self.assertEqual(dict(UserProfile.objects.values_list('pk', 'attribute_bits')), expected)
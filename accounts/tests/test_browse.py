@@ -0,0 +1,69 @@
+
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.views import BROWSE_STREAM_BATCH
+from loveny_project import replicas
+
+from .helpers import make_user, plain_static
+
+
+@plain_static
+class BrowseStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user(looking_for='DATING', seeking='F', gender='M')
+        cls.count = BROWSE_STREAM_BATCH + 6 # Two batches
+        for _ in range(cls.count):
+            make_user(looking_for='DATING', gender='F')
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+        self.async_client.cookies = self.client.cookies
+
+    async def stream(self, path):
+        response = await self.async_client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return [chunk.decode() async for chunk in response.streaming_content]
+
+    async def test_asgi_streams_shell_then_card_batches(self):
+        chunks = await self.stream(reverse('accounts:browse_profiles'))
+        head, *batches, tail = chunks
+        self.assertIn('Filter Profiles', head)
+        self.assertNotIn('class="profile-card ', head)
+        self.assertEqual([batch.count('class="profile-card ') for batch in batches], [BROWSE_STREAM_BATCH, 6])
+        self.assertIn('Dating Profiles', batches[0])
+        self.assertNotIn('Dating Profiles', batches[1]) # One heading per category
+        self.assertIn('csrfmiddlewaretoken', batches[0])
+        self.assertIn('</html>', tail)
+
+    async def test_asgi_stream_without_results_shows_the_empty_state(self):
+        chunks = await self.stream(reverse('accounts:browse_profiles') + '?min_age=90')
+        html = ''.join(chunks)
+        self.assertIn('No profiles found', html)
+        self.assertNotIn('class="profile-card ', html)
+
+    def test_wsgi_renders_the_whole_page(self):
+        response = self.client.get(reverse('accounts:browse_profiles'))
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content.decode().count('class="profile-card '), self.count)
+
+
+class KeepRoutingTests(TestCase):
+    async def test_stream_steps_see_the_request_routing_state(self):
+        state = replicas.RoutingState()
+        seen = []
+
+        async def stream():
+            for _ in range(2):
+                seen.append(replicas._state.get())
+                yield b''
+
+        token = replicas._state.set(state)
+        wrapped = replicas.keep_routing(stream())
+        replicas._state.reset(token) # As the middleware does when the view returns
+        chunks = [chunk async for chunk in wrapped]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(seen, [state, state])
+        self.assertIsNone(replicas._state.get())
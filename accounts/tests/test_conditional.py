@@ -0,0 +1,72 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import moderation
+from accounts.models import Like, UserSubscription
+
+from .helpers import make_user, plain_static
+
+
+@plain_static
+class ValidatorTests(TestCase):
+    """Bulk updates that change what a page shows must change its ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user(looking_for='DATING', seeking='F', gender='M')
+        cls.other = make_user(looking_for='DATING', gender='F')
+        cls.premium = make_user(
+            looking_for='DATING', gender='F', is_premium=True, premium_expiry_date=timezone.now() - timedelta(hours=1),
+        )
+        UserSubscription.objects.create(user=cls.premium, is_active=True, end_date=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.viewer)
+        self.client.get(reverse('accounts:browse_profiles')) # Sets the CSRF cookie, which is part of the ETag
+
+    def etag(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        return response['ETag']
+
+    def assertChanged(self, path, etag):
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_subscription_expiry_changes_profile_and_browse_etags(self):
+        profile_path = reverse('accounts:view_user_profile', args=[self.premium.username])
+        browse_path = reverse('accounts:browse_profiles')
+        profile_etag, browse_etag = self.etag(profile_path), self.etag(browse_path)
+        call_command('expire_subscriptions', stdout=StringIO())
+        self.premium.refresh_from_db()
+        self.assertFalse(self.premium.is_premium)
+        self.assertChanged(profile_path, profile_etag)
+        self.assertChanged(browse_path, browse_etag)
+
+    def test_ban_moves_updated_at(self):
+        browse_path = reverse('accounts:browse_profiles')
+        browse_etag = self.etag(browse_path)
+        before = self.other.updated_at
+        moderation.ban_users([self.other.pk])
+        self.other.refresh_from_db()
+        self.assertGreater(self.other.updated_at, before)
+        self.assertChanged(browse_path, browse_etag)
+
+    def test_like_and_unlike_change_the_etag_without_any_cache_bump(self):
+        # Rows written directly, as another worker would: no on-commit hook runs in this process
+        profile_path = reverse('accounts:view_user_profile', args=[self.other.username])
+        etag = self.etag(profile_path)
+        like = Like.objects.create(liker=self.viewer, liked_user=self.other)
+        self.assertChanged(profile_path, etag)
+        etag = self.etag(profile_path)
+        like.delete()
+        self.assertChanged(profile_path, etag)
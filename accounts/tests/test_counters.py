@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from accounts import counters
+from accounts.models import Like, ProfileImage, UserProfile
+from accounts.views import _toggle_like
+
+from .helpers import make_user
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = make_user(username='alice')
+        cls.bob = make_user(username='bob')
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return {field: getattr(user, field) for field in counters.COUNTER_FIELDS}
+
+    def assertCounts(self, user, **expected):
+        self.assertEqual(self.counts(user), {field: expected.get(field, 0) for field in counters.COUNTER_FIELDS})
+
+    def test_like_and_unlike(self):
+        _toggle_like(self.alice, self.bob)
+        self.assertCounts(self.alice, likes_given_count=1)
+        self.assertCounts(self.bob, likes_received_count=1)
+        _toggle_like(self.alice, self.bob)
+        self.assertCounts(self.alice)
+        self.assertCounts(self.bob)
+
+    def test_match_and_unmatch(self):
+        _toggle_like(self.alice, self.bob)
+        _toggle_like(self.bob, self.alice)
+        self.assertCounts(self.alice, likes_given_count=1, likes_received_count=1, matches_count=1)
+        self.assertCounts(self.bob, likes_given_count=1, likes_received_count=1, matches_count=1)
+        _toggle_like(self.bob, self.alice) # Unlike ends the match for both
+        self.assertCounts(self.alice, likes_given_count=1, matches_count=0)
+        self.assertCounts(self.bob, likes_received_count=1, matches_count=0)
+
+    def test_concurrent_likes_still_make_a_match(self):
+        # On PostgreSQL two users liking each other at once can't see each other's uncommitted row.
+        with mock.patch.object(counters, '_is_mutual', return_value=False), self.captureOnCommitCallbacks(execute=True):
+            _toggle_like(self.alice, self.bob)
+            _toggle_like(self.bob, self.alice)
+        self.assertCounts(self.alice, likes_given_count=1, likes_received_count=1, matches_count=1)
+        self.assertCounts(self.bob, likes_given_count=1, likes_received_count=1, matches_count=1)
+
+    def test_concurrent_unlikes_end_the_match_once(self):
+        carol = make_user()
+        for liker, liked_user in ((self.alice, self.bob), (self.bob, self.alice), (self.alice, carol), (carol, self.alice)):
+            _toggle_like(liker, liked_user)
+        self.assertCounts(self.alice, likes_given_count=2, likes_received_count=2, matches_count=2)
+        # Each deletion still sees the other half, so both end the same match.
+        with mock.patch.object(counters, '_is_mutual', return_value=True), self.captureOnCommitCallbacks(execute=True):
+            _toggle_like(self.alice, self.bob)
+            _toggle_like(self.bob, self.alice)
+        self.assertCounts(self.alice, likes_given_count=1, likes_received_count=1, matches_count=1)
+
+    def test_deleting_an_account_settles_the_other_side(self):
+        _toggle_like(self.alice, self.bob)
+        _toggle_like(self.bob, self.alice)
+        self.bob.delete() # Both halves of the match cascade
+        self.assertCounts(self.alice)
+
+    def test_gallery_images(self):
+        image = ProfileImage.objects.create(user_profile=self.alice, image='profile_pictures/gallery/a.jpg')
+        self.assertCounts(self.alice, gallery_images_count=1)
+        image.delete()
+        self.assertCounts(self.alice)
+
+    def test_adjust_never_goes_below_zero(self):
+        counters.adjust([self.alice.pk], likes_received_count=-3, matches_count=-1)
+        self.assertCounts(self.alice)
+        counters.adjust([self.alice.pk, self.bob.pk], likes_received_count=2)
+        counters.adjust([self.alice.pk], likes_received_count=-5)
+        self.assertCounts(self.alice)
+        self.assertCounts(self.bob, likes_received_count=2)
+
+    def test_recount_repairs_drift(self):
+        _toggle_like(self.alice, self.bob)
+        _toggle_like(self.bob, self.alice)
+        Like.objects.bulk_create([Like(liker=make_user(), liked_user=self.alice)]) # No signals
+        ProfileImage.objects.bulk_create([ProfileImage(user_profile=self.alice, image='profile_pictures/gallery/b.jpg')])
+        UserProfile.objects.filter(pk=self.bob.pk).update(likes_given_count=7, matches_count=0)
+        counters.recount([self.alice.pk, self.bob.pk])
+        self.assertCounts(self.alice, likes_given_count=1, likes_received_count=2, matches_count=1, gallery_images_count=1)
+        self.assertCounts(self.bob, likes_given_count=1, likes_received_count=1, matches_count=1)
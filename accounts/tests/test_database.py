@@ -0,0 +1,83 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+
+from accounts.management.commands.db_benchmark import is_scratch_database
+from accounts.models import UserProfile
+from loveny_project import database
+
+
+# SimpleTestCase: TestCase's surrounding atomic() would turn every retry off.
+@mock.patch.object(database, 'LOCKED_RETRIES', 3)
+@mock.patch('loveny_project.database.time.sleep')
+class RetryOnLockedTests(SimpleTestCase):
+    def failing(self, *errors, result='done'):
+        calls = mock.Mock(side_effect=[*errors, result])
+        calls.__qualname__ = 'unit_of_work'
+        return calls, database.retry_on_locked(calls)
+
+    def test_retries_until_the_lock_clears(self, sleep):
+        calls, wrapped = self.failing(OperationalError('database is locked'), OperationalError('database is locked'))
+        self.assertEqual(wrapped(), 'done')
+        self.assertEqual(calls.call_count, 3)
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertGreaterEqual(first, database.LOCKED_BACKOFF)
+        self.assertGreaterEqual(second, 2 * database.LOCKED_BACKOFF) # Backs off
+
+    def test_reraises_once_the_retries_are_used_up(self, sleep):
+        calls, wrapped = self.failing(*[OperationalError('database is locked')] * 4)
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            wrapped()
+        self.assertEqual(calls.call_count, 4) # The first try and three retries
+        self.assertEqual(sleep.call_count, 3)
+
+    def test_other_errors_are_not_retried(self, sleep):
+        calls, wrapped = self.failing(OperationalError('no such table: accounts_like'))
+        with self.assertRaises(OperationalError):
+            wrapped()
+        self.assertEqual(calls.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_not_retried_inside_an_outer_transaction(self, sleep):
+        calls, wrapped = self.failing(OperationalError('database is locked'))
+        with mock.patch.object(connection, 'in_atomic_block', True):
+            with self.assertRaises(OperationalError):
+                wrapped()
+        self.assertEqual(calls.call_count, 1)
+        sleep.assert_not_called()
+
+
+class DbBenchmarkTests(TestCase):
+    def test_scratch_databases(self):
+        sqlite = 'django.db.backends.sqlite3'
+        postgres = 'django.db.backends.postgresql'
+        for engine, name, scratch in (
+            (sqlite, ':memory:', True),
+            (sqlite, 'file:memorydb_default?mode=memory&cache=shared', True),
+            (sqlite, '/tmp/loveny.sqlite3', True),
+            (sqlite, '/srv/loveny/bench.sqlite3', True),
+            (sqlite, '/srv/loveny/db.sqlite3', False),
+            (postgres, 'loveny_scratch', True),
+            (postgres, 'test_loveny', True),
+            (postgres, 'loveny', False),
+        ):
+            with self.subTest(engine=engine, name=name):
+                self.assertIs(is_scratch_database({'ENGINE': engine, 'NAME': name}), scratch)
+
+    def test_refuses_a_live_database(self):
+        with mock.patch.dict(connection.settings_dict, NAME='/srv/loveny/db.sqlite3'):
+            with self.assertRaisesMessage(CommandError, '--allow-live'):
+                call_command('db_benchmark', stdout=StringIO())
+        self.assertFalse(UserProfile.objects.filter(username__startswith='dbbench_').exists())
+
+    def test_allow_live_overrides_the_check(self):
+        out = StringIO()
+        with mock.patch.dict(connection.settings_dict, NAME='/srv/loveny/db.sqlite3'), \
+                mock.patch('accounts.management.commands.db_benchmark.Command.run', return_value={}) as run:
+            call_command('db_benchmark', '--allow-live', '--users', '3', stdout=out)
+        self.assertEqual(len(run.call_args.args[0]), 3)
+        self.assertFalse(UserProfile.objects.filter(username__startswith='dbbench_').exists()) # Cleaned up
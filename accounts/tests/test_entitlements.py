@@ -0,0 +1,145 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from accounts import entitlements
+from accounts.entitlements import (
+    NO_ENTITLEMENTS,
+    SEE_WHO_LIKED_YOU,
+    WHATSAPP_CONTACT,
+    aget_entitlements,
+    entitlements_key,
+    for_user,
+    get_entitlements,
+)
+from accounts.models import SubscriptionPlan, UserProfile, UserSubscription
+
+from .helpers import make_user
+
+
+class EntitlementsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plan = SubscriptionPlan.objects.create(
+            name='Gold', price=Decimal('2500.00'), duration_days=30, features=['Video calls', 'Ad-free experience'],
+        )
+        end = timezone.now() + timedelta(days=10)
+        cls.premium = make_user(is_premium=True, premium_expiry_date=end)
+        cls.subscription = UserSubscription.objects.create(user=cls.premium, plan=cls.plan, is_active=True, end_date=end)
+        cls.free = make_user()
+
+    def setUp(self):
+        cache.clear()
+
+    def fresh(self, user):
+        return UserProfile.objects.get(pk=user.pk)
+
+    def resolving(self):
+        """Patches resolve() with a spy, to tell cache hits from database lookups."""
+        return mock.patch.object(entitlements, 'resolve', wraps=entitlements.resolve)
+
+    def cached(self, user):
+        return cache.get(entitlements_key(user.pk))
+
+
+class ResolveTests(EntitlementsTestCase):
+    def test_premium_user_gets_premium_and_plan_features(self):
+        granted = for_user(self.premium)
+        self.assertTrue(granted.is_premium)
+        self.assertEqual(granted.plan_name, 'Gold')
+        self.assertEqual(granted.features, {WHATSAPP_CONTACT, SEE_WHO_LIKED_YOU, 'video_calls', 'ad_free_experience'})
+        self.assertEqual(granted.expires_at, self.subscription.end_date)
+
+    def test_free_and_lapsed_users_get_nothing(self):
+        self.assertIs(for_user(self.free), NO_ENTITLEMENTS)
+        UserProfile.objects.filter(pk=self.premium.pk).update(premium_expiry_date=timezone.now() - timedelta(minutes=1))
+        self.assertIs(for_user(self.fresh(self.premium)), NO_ENTITLEMENTS) # Expired, though the sweeper hasn't run
+
+    def test_second_lookup_is_a_cache_hit(self):
+        with self.resolving() as resolve:
+            first = for_user(self.premium)
+            second = for_user(self.fresh(self.premium))
+        self.assertEqual(resolve.call_count, 1)
+        self.assertEqual(second.features, first.features)
+
+    async def test_async_lookup_shares_the_cache(self):
+        with self.resolving() as resolve:
+            first = await entitlements.afor_user(self.premium)
+            second = await entitlements.afor_user(self.premium)
+        self.assertEqual(resolve.call_count, 1)
+        self.assertTrue(first.is_premium and second.is_premium)
+
+    def test_cached_entitlements_past_their_expiry_are_resolved_again(self):
+        self.assertTrue(for_user(self.premium).is_premium)
+        later = self.subscription.end_date + timedelta(minutes=1)
+        with mock.patch('django.utils.timezone.now', return_value=later), self.resolving() as resolve:
+            self.assertFalse(self.cached(self.premium).is_current)
+            self.assertIs(for_user(self.premium), NO_ENTITLEMENTS) # Not the stale premium entry
+        self.assertEqual(resolve.call_count, 1)
+
+    def test_request_memoizes(self):
+        request = RequestFactory().get('/')
+        request.user = self.premium
+        with self.resolving() as resolve:
+            self.assertIs(get_entitlements(request), get_entitlements(request))
+            cache.clear()
+            self.assertIs(get_entitlements(request), get_entitlements(request))
+        self.assertEqual(resolve.call_count, 1)
+
+    async def test_async_request_memoizes(self):
+        request = RequestFactory().get('/')
+        request.user = self.free
+        self.assertIs(await aget_entitlements(request), await aget_entitlements(request))
+
+
+class InvalidationTests(EntitlementsTestCase):
+    def setUp(self):
+        super().setUp()
+        for_user(self.premium)
+        for_user(self.free)
+
+    def assertDroppedOnCommit(self, user, change):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            change()
+            self.assertIsNotNone(self.cached(user)) # Still cached until the transaction commits
+        self.assertTrue(callbacks)
+        self.assertIsNone(self.cached(user))
+
+    def test_subscription_save_and_delete(self):
+        def cancel():
+            self.subscription.is_active = False
+            self.subscription.save()
+        self.assertDroppedOnCommit(self.premium, cancel)
+        self.assertFalse('video_calls' in for_user(self.fresh(self.premium)))
+        self.assertDroppedOnCommit(self.premium, self.subscription.delete)
+
+    def test_plan_change_drops_every_subscriber(self):
+        def add_feature():
+            self.plan.features = [*self.plan.features, 'Boosts']
+            self.plan.save()
+        self.assertDroppedOnCommit(self.premium, add_feature)
+        self.assertIn('boosts', for_user(self.premium))
+        self.assertIsNotNone(self.cached(self.free)) # Not a subscriber: untouched
+
+    def test_plan_delete(self):
+        self.assertDroppedOnCommit(self.premium, self.plan.delete)
+
+    def test_premium_flag_changes(self):
+        def upgrade():
+            user = self.fresh(self.free)
+            user.is_premium = True
+            user.premium_expiry_date = timezone.now() + timedelta(days=1)
+            user.save(update_fields=['is_premium', 'premium_expiry_date'])
+        self.assertDroppedOnCommit(self.free, upgrade)
+        self.assertTrue(for_user(self.fresh(self.free)).is_premium)
+
+    def test_unrelated_profile_saves_keep_the_cache(self):
+        user = self.fresh(self.premium)
+        user.bio = 'Hello'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['bio'])
+        self.assertIsNotNone(self.cached(self.premium))
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.entitlements import for_user
+from accounts.models import Notification, SubscriptionPlan, UserProfile, UserSubscription
+from accounts.notifications import get_unread_count
+
+from .helpers import make_user
+
+
+class ExpireSubscriptionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plan = SubscriptionPlan.objects.create(name='Gold', price=Decimal('2500.00'), duration_days=30)
+
+    def setUp(self):
+        cache.clear()
+        self.long_ago = timezone.now() - timedelta(days=60)
+
+    def subscriber(self, ends_in, premium_until=None):
+        """A premium user whose active subscription ends `ends_in` from now (negative: already over)."""
+        end = timezone.now() + ends_in
+        user = make_user(is_premium=True, premium_expiry_date=premium_until or end)
+        subscription = UserSubscription.objects.create(user=user, plan=self.plan, is_active=True, end_date=timezone.now() + timedelta(days=1))
+        # save() deactivates subscriptions that are already over, so set the end date directly
+        UserSubscription.objects.filter(pk=subscription.pk).update(end_date=end)
+        UserProfile.objects.filter(pk=user.pk).update(updated_at=self.long_ago)
+        return user
+
+    def run_command(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('expire_subscriptions', *args, stdout=out)
+        return out.getvalue()
+
+    def premium_ids(self):
+        return set(UserProfile.objects.filter(is_premium=True).values_list('pk', flat=True))
+
+    def test_every_chunk_is_processed(self):
+        for count, chunk_size in ((5, 2), (4, 2), (3, 3), (2, 1)):
+            with self.subTest(count=count, chunk_size=chunk_size):
+                users = [self.subscriber(-timedelta(hours=1)) for _ in range(count)]
+                output = self.run_command('--chunk-size', str(chunk_size))
+                self.assertIn(f'Deactivated {count} subscription(s)', output)
+                self.assertFalse(UserSubscription.objects.filter(user__in=users, is_active=True).exists())
+                self.assertFalse(self.premium_ids() & {user.pk for user in users})
+
+    def test_premium_flag_and_updated_at_are_set_in_the_bulk_update(self):
+        user = self.subscriber(-timedelta(hours=1))
+        self.run_command()
+        user.refresh_from_db()
+        self.assertFalse(user.is_premium)
+        self.assertGreater(user.updated_at, self.long_ago) # Moves the profile's ETag
+        subscription = UserSubscription.objects.get(user=user)
+        self.assertFalse(subscription.is_active)
+
+    def test_current_subscriptions_and_longer_premium_are_kept(self):
+        current = self.subscriber(timedelta(days=10))
+        granted_longer = self.subscriber(-timedelta(hours=1), premium_until=timezone.now() + timedelta(days=5))
+        self.run_command()
+        self.assertEqual(self.premium_ids(), {current.pk, granted_longer.pk})
+        self.assertFalse(UserSubscription.objects.get(user=granted_longer).is_active)
+        self.assertEqual(UserProfile.objects.get(pk=current.pk).updated_at, self.long_ago)
+
+    def test_premium_without_a_subscription_expires_by_its_own_date(self):
+        by_hand = make_user(is_premium=True, premium_expiry_date=timezone.now() - timedelta(minutes=1))
+        output = self.run_command('--chunk-size', '1')
+        self.assertIn('cleared premium on 1 profile(s)', output)
+        self.assertNotIn(by_hand.pk, self.premium_ids())
+
+    def test_cached_entitlements_are_dropped(self):
+        user = self.subscriber(timedelta(days=1))
+        self.assertTrue(for_user(user).is_premium) # Cached while current
+        UserSubscription.objects.filter(user=user).update(end_date=timezone.now() - timedelta(minutes=1))
+        UserProfile.objects.filter(pk=user.pk).update(premium_expiry_date=timezone.now() + timedelta(days=1)) # Cached entry still looks current
+        self.run_command()
+        self.assertIsNone(for_user(UserProfile.objects.get(pk=user.pk)).plan_name) # Re-resolved: no active subscription
+
+    def test_reminders_are_sent_once_per_subscription(self):
+        soon = [self.subscriber(timedelta(days=2)) for _ in range(3)]
+        later = self.subscriber(timedelta(days=5))
+        self.assertIn('sent 3 reminder(s)', self.run_command('--chunk-size', '2'))
+        self.assertIn('sent 0 reminder(s)', self.run_command('--chunk-size', '2')) # Rerun: nothing new
+        reminded = Notification.objects.filter(notification_type='subscription_reminder').values_list('recipient_id', flat=True)
+        self.assertEqual(sorted(reminded), sorted(user.pk for user in soon))
+        self.assertNotIn(later.pk, reminded)
+        self.assertIn('sent 1 reminder(s)', self.run_command('--remind-days', '6'))
+
+    def test_reminder_drops_the_cached_unread_count(self):
+        user = self.subscriber(timedelta(days=2))
+        self.assertEqual(get_unread_count(user.pk), 0)
+        self.run_command()
+        self.assertEqual(get_unread_count(user.pk), 1)
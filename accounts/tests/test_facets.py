@@ -0,0 +1,99 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import facets
+from accounts.models import years_before
+
+from .helpers import make_user
+
+
+def counts(options):
+    return {option['value']: option['count'] for option in options if option['count']}
+
+
+class FoldTests(SimpleTestCase):
+    def row(self, n, gender='F', looking_for='DATING', age_bucket='25-34', location='Lagos', **flags):
+        return {'gender': gender, 'looking_for': looking_for, 'age_bucket': age_bucket, 'location': location, 'n': n, **flags}
+
+    def test_without_filters_every_row_counts_everywhere(self):
+        folded = facets.fold([self.row(2), self.row(3, gender='M', location=' lagos'), self.row(1, location=None)])
+        self.assertEqual(folded['total'], 6)
+        self.assertEqual(counts(folded['gender']), {'F': 3, 'M': 3})
+        self.assertEqual(folded['location'], [{'value': 'Lagos', 'label': 'Lagos', 'count': 5}]) # Blank locations aren't an option
+        self.assertEqual(len(folded['age_bucket']), len(facets.AGE_BUCKETS)) # Every bucket listed, empty ones with 0
+
+    def test_each_facet_ignores_only_its_own_filter(self):
+        folded = facets.fold([
+            self.row(4, passes_gender=True, passes_location=True),
+            self.row(2, gender='M', passes_gender=False, passes_location=True),
+            self.row(1, location='Abuja', passes_gender=True, passes_location=False),
+            self.row(8, gender='M', location='Abuja', passes_gender=False, passes_location=False),
+        ])
+        self.assertEqual(folded['total'], 4)
+        self.assertEqual(counts(folded['gender']), {'F': 4, 'M': 2}) # Rows in the chosen location
+        self.assertEqual({o['value']: o['count'] for o in folded['location']}, {'Lagos': 4, 'Abuja': 1}) # Rows of the sought gender
+        self.assertEqual(counts(folded['age_bucket']), {'25-34': 4})
+
+    def test_only_the_top_locations_are_listed(self):
+        rows = [self.row(n, location=f'City {n:02}') for n in range(1, facets.TOP_LOCATIONS + 3)]
+        locations = [option['value'] for option in facets.fold(rows)['location']]
+        self.assertEqual(len(locations), facets.TOP_LOCATIONS)
+        self.assertEqual(locations[0], f'City {facets.TOP_LOCATIONS + 2:02}')
+
+
+class FacetsKeyTests(SimpleTestCase):
+    filters = {'min_age': 20, 'max_age': 30, 'location': 'lagos', 'attributes': {'religion': ['ISLAM']}}
+
+    def test_same_signature_same_key(self):
+        reordered = dict(reversed(list(self.filters.items())))
+        self.assertEqual(facets.facets_key('DATING', 'F', self.filters), facets.facets_key('DATING', 'F', reordered))
+
+    def test_preferences_filters_and_date_change_the_key(self):
+        key = facets.facets_key('DATING', 'F', self.filters)
+        self.assertNotEqual(key, facets.facets_key('DATING', 'M', self.filters))
+        self.assertNotEqual(key, facets.facets_key('HOOKUP', 'F', self.filters))
+        self.assertNotEqual(key, facets.facets_key('DATING', 'F', {**self.filters, 'max_age': 31}))
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2099, 1, 1)): # Age buckets move at midnight
+            self.assertNotEqual(key, facets.facets_key('DATING', 'F', self.filters))
+
+
+class FacetsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        thirty, sixty = years_before(today, 30), years_before(today, 60)
+        cls.viewer = make_user(gender='M', seeking='F', looking_for='DATING', location='Kano', date_of_birth=thirty)
+        make_user(gender='F', looking_for='DATING', location='Lagos', date_of_birth=thirty)
+        make_user(gender='F', looking_for='DATING', location='lagos', date_of_birth=sixty)
+        make_user(gender='M', looking_for='DATING', location='Lagos', date_of_birth=thirty)
+        make_user(gender='F', looking_for='HOOKUP', location='Lagos', date_of_birth=thirty)
+        make_user(gender='F', looking_for='DATING', location='Abuja', date_of_birth=thirty)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.viewer)
+        self.async_client.cookies = self.client.cookies
+
+    async def get_facets(self, **params):
+        response = await self.async_client.get(reverse('accounts:browse_facets'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_each_facet_is_counted_without_its_own_filter(self):
+        folded = await self.get_facets(location='Lagos', min_age=18, max_age=40)
+        self.assertEqual(folded['total'], 1) # What browse shows: a woman looking for dating in Lagos aged 18-40
+        self.assertEqual(counts(folded['gender']), {'F': 1, 'M': 1})
+        self.assertEqual(counts(folded['looking_for']), {'DATING': 1, 'HOOKUP': 1})
+        self.assertEqual(counts(folded['age_bucket']), {'25-34': 1, '55+': 1})
+        self.assertEqual({o['value']: o['count'] for o in folded['location']}, {'Lagos': 1, 'Abuja': 1})
+
+    async def test_unfiltered_counts(self):
+        folded = await self.get_facets()
+        self.assertEqual(folded['total'], 3)
+        self.assertEqual({o['value']: o['count'] for o in folded['location']}, {'Lagos': 2, 'Abuja': 1})
+        self.assertEqual(counts(folded['gender']), {'F': 3, 'M': 2}) # The viewer is an M looking for dating too
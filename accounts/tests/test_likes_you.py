@@ -0,0 +1,100 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Like
+
+from .helpers import make_user, plain_static
+
+
+class LikesYouTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user(is_premium=True, premium_expiry_date=timezone.now() + timedelta(days=30))
+        cls.free_viewer = make_user()
+        now = timezone.now()
+        cls.admirers = [make_user(username=f'admirer{n}') for n in range(7)]
+        for n, admirer in enumerate(cls.admirers):
+            like = Like.objects.create(liker=admirer, liked_user=cls.viewer)
+            # Pairs share a timestamp, so the cursor has to break ties on the id
+            Like.objects.filter(pk=like.pk).update(timestamp=now - timedelta(minutes=n // 2))
+            Like.objects.create(liker=admirer, liked_user=cls.free_viewer)
+        cls.match = make_user(username='match')
+        Like.objects.create(liker=cls.match, liked_user=cls.viewer)
+        Like.objects.create(liker=cls.viewer, liked_user=cls.match)
+        cls.expected = [
+            like.liker.username for like in
+            Like.objects.filter(liked_user=cls.viewer).exclude(liker=cls.match).select_related('liker').order_by('-timestamp', '-pk')
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+
+class LikesYouFeedTests(LikesYouTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.viewer)
+        self.async_client.cookies = self.client.cookies
+
+    async def page(self, **params):
+        response = await self.async_client.get(reverse('accounts:likes_you_feed'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_cursor_walks_every_admirer_once_newest_first(self):
+        seen, cursor = [], None
+        for _ in range(10):
+            page = await self.page(limit=2, **({'cursor': cursor} if cursor else {}))
+            seen += [admirer['username'] for admirer in page['admirers']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    async def test_mutual_likes_are_left_out(self):
+        page = await self.page(limit=50)
+        self.assertNotIn('match', [admirer['username'] for admirer in page['admirers']])
+        self.assertIsNone(page['next_cursor'])
+
+    async def test_malformed_cursor_starts_from_the_top(self):
+        page = await self.page(limit=2, cursor='not-a-cursor')
+        self.assertEqual([admirer['username'] for admirer in page['admirers']], self.expected[:2])
+
+    def test_free_users_get_the_upgrade_prompt(self):
+        self.client.force_login(self.free_viewer)
+        response = self.client.get(reverse('accounts:likes_you_feed'))
+        self.assertEqual(response.status_code, 403)
+        data = response.json()
+        self.assertEqual(data['likes_received_count'], len(self.admirers))
+        self.assertEqual(data['upgrade_url'], reverse('accounts:choose_plan'))
+        self.assertNotIn('admirers', data)
+
+
+@plain_static
+class LikesYouPageTests(LikesYouTestCase):
+    def test_premium_page_lists_admirers_and_links_the_next_page(self):
+        self.client.force_login(self.viewer)
+        seen, params = [], {}
+        with mock.patch('accounts.views.LIKES_YOU_PAGE_SIZE', 3):
+            for _ in range(5):
+                response = self.client.get(reverse('accounts:likes_you'), params)
+                self.assertFalse(response.context['locked'])
+                seen += [admirer['username'] for admirer in response.context['admirers']]
+                if not response.context['next_cursor']:
+                    break
+                self.assertContains(response, f"?cursor={response.context['next_cursor']}")
+                params = {'cursor': response.context['next_cursor']}
+        self.assertEqual(seen, self.expected)
+
+    def test_free_page_is_locked_without_names(self):
+        self.client.force_login(self.free_viewer)
+        response = self.client.get(reverse('accounts:likes_you'))
+        self.assertTrue(response.context['locked'])
+        self.assertNotIn('admirers', response.context)
+        for admirer in self.admirers:
+            self.assertNotContains(response, admirer.username)
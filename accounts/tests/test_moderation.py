@@ -0,0 +1,153 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from accounts import moderation
+from accounts.models import Like, Notification, NotificationActor, ProfileImage, UserProfile
+from accounts.notifications import get_unread_count
+from accounts.views import _toggle_like
+
+from .helpers import make_user
+
+
+@override_settings(MODERATION_CHUNK_SIZE=2)
+class ModerationJobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def job(self, action, users):
+        return moderation.start_job(action, [user.pk for user in users])
+
+    def run_job(self, job):
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation.run_job(job.pk)
+        job.refresh_from_db()
+        return job
+
+    def user_with_files(self, **fields):
+        user = make_user(**fields)
+        picture = default_storage.save(f'profile_pictures/user_{user.pk}/photo.jpg', ContentFile(b'jpg'))
+        gallery = default_storage.save(f'profile_pictures/user_{user.pk}/gallery/1.jpg', ContentFile(b'jpg'))
+        UserProfile.objects.filter(pk=user.pk).update(profile_picture=picture)
+        ProfileImage.objects.create(user_profile=user, image=gallery)
+        return user, [picture, gallery]
+
+    def test_ban_runs_in_chunks(self):
+        users = [make_user() for _ in range(5)]
+        job = self.run_job(self.job('ban', users))
+        self.assertEqual((job.status, job.processed, job.total), ('done', 5, 5))
+        self.assertFalse(UserProfile.objects.filter(pk__in=[user.pk for user in users], is_active=True).exists())
+
+    def test_delete_recounts_the_other_side_and_removes_files_after_commit(self):
+        spammers = [self.user_with_files() for _ in range(3)]
+        victim = make_user()
+        for spammer, _ in spammers:
+            _toggle_like(spammer, victim)
+        _toggle_like(victim, spammers[0][0]) # A match, which ends with the deletion
+        victim.refresh_from_db()
+        self.assertEqual((victim.likes_received_count, victim.matches_count), (3, 1))
+
+        job = self.job('delete', [spammer for spammer, _ in spammers])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            moderation.run_job(job.pk)
+        files = [name for _, names in spammers for name in names]
+        self.assertTrue(all(default_storage.exists(name) for name in files)) # Not before the chunk commits
+        for callback in callbacks:
+            callback()
+        self.assertFalse(any(default_storage.exists(name) for name in files))
+
+        self.assertFalse(UserProfile.objects.filter(pk__in=[spammer.pk for spammer, _ in spammers]).exists())
+        self.assertFalse(Like.objects.exists())
+        victim.refresh_from_db()
+        self.assertEqual((victim.likes_received_count, victim.likes_given_count, victim.matches_count), (0, 0, 0))
+
+    def test_purge_images_keeps_the_accounts(self):
+        user, files = self.user_with_files()
+        job = self.run_job(self.job('purge_images', [user]))
+        self.assertEqual(job.status, 'done')
+        user.refresh_from_db()
+        self.assertFalse(user.profile_picture)
+        self.assertEqual(user.gallery_images_count, 0)
+        self.assertFalse(ProfileImage.objects.filter(user_profile=user).exists())
+        self.assertFalse(any(default_storage.exists(name) for name in files))
+
+    def test_interrupted_job_resumes_after_the_last_finished_chunk(self):
+        users = [make_user() for _ in range(5)]
+        job = self.job('ban', users)
+        calls = []
+
+        def flaky(user_ids):
+            calls.append(list(user_ids))
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            moderation.ban_users(user_ids)
+
+        with mock.patch.dict(moderation.HANDLERS, ban=flaky), self.assertRaises(RuntimeError):
+            moderation.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('failed', 2))
+        self.assertIn('went away', job.error)
+
+        with mock.patch.dict(moderation.HANDLERS, ban=flaky):
+            job = self.run_job(job)
+        self.assertEqual((job.status, job.processed), ('done', 5))
+        self.assertEqual(calls[2:], [job.target_ids[2:4], job.target_ids[4:]]) # The first chunk isn't redone
+        self.assertEqual(UserProfile.objects.filter(pk__in=job.target_ids, is_active=True).count(), 0)
+
+    def test_finished_job_is_not_rerun(self):
+        job = self.run_job(self.job('ban', [make_user()]))
+        handler = mock.Mock()
+        with mock.patch.dict(moderation.HANDLERS, ban=handler):
+            moderation.run_job(job.pk)
+        handler.assert_not_called()
+
+
+class DeletedLikerNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = make_user()
+        cls.alice = make_user(username='alice')
+        cls.bob = make_user(username='bob')
+        cls.carol = make_user(username='carol')
+
+    def setUp(self):
+        cache.clear()
+        for liker in (self.alice, self.bob, self.carol):
+            with self.captureOnCommitCallbacks(execute=True):
+                _toggle_like(liker, self.recipient)
+
+    def delete(self, *users):
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation.delete_users([user.pk for user in users])
+
+    def test_coalesced_message_stops_naming_a_deleted_liker(self):
+        [notification] = Notification.objects.filter(recipient=self.recipient)
+        self.assertEqual(notification.message, 'carol and 2 others liked your profile!')
+        self.delete(self.carol)
+        notification.refresh_from_db()
+        self.assertEqual(notification.message, 'bob and 1 other liked your profile!')
+        self.assertEqual((notification.sender, notification.actor_count), (self.bob, 2))
+        self.delete(self.alice)
+        notification.refresh_from_db()
+        self.assertEqual(notification.message, 'bob liked your profile!')
+
+    def test_notification_without_likers_left_is_removed(self):
+        self.assertEqual(get_unread_count(self.recipient.pk), 1)
+        self.delete(self.alice, self.bob, self.carol)
+        self.assertFalse(Notification.objects.filter(recipient=self.recipient).exists())
+        self.assertFalse(NotificationActor.objects.exists())
+        self.assertEqual(get_unread_count(self.recipient.pk), 0)
+
+    def test_deleted_recipient_takes_their_notifications(self):
+        self.delete(self.recipient)
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(NotificationActor.objects.exists())
@@ -0,0 +1,247 @@
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Notification, NotificationActor
+from accounts.notifications import (
+    LIKE_COALESCE_WINDOW,
+    adjust_unread_count,
+    create_notification,
+    get_unread_count,
+    mark_read,
+    push_notifications,
+    unread_count_key,
+    user_group_name,
+)
+from accounts.views import _toggle_like
+
+from .helpers import make_user
+
+
+class PushTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = make_user()
+        cls.alice = make_user(username='alice')
+        cls.bob = make_user(username='bob')
+
+    def setUp(self):
+        cache.clear() # Unread counters are cached per user id
+
+    async def test_coalesced_like_push_carries_the_unread_count(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(user_group_name(self.recipient.pk), channel)
+        for liker in (self.alice, self.bob):
+            *_, payloads = await sync_to_async(_toggle_like)(liker, self.recipient)
+            await push_notifications(payloads)
+            message = await layer.receive(channel)
+            self.assertEqual(message['unread_count'], 1) # Bob's like updates Alice's unread row: still one
+        self.assertEqual(message['notification']['message'], 'bob and 1 other liked your profile!')
+
+    def test_like_under_wsgi_is_pushed_before_the_loop_closes(self):
+        # The sync test client is a WSGI handler: like_view runs in async_to_sync, whose loop ends with the request.
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(user_group_name(self.recipient.pk), channel)
+        self.client.force_login(self.alice)
+        with mock.patch('accounts.tasks.enqueue'):
+            response = self.client.post(reverse('accounts:like_user', args=[self.recipient.username]))
+        self.assertEqual(response.status_code, 200)
+        message = async_to_sync(asyncio.wait_for)(layer.receive(channel), 1)
+        self.assertEqual(message['notification']['sender'], 'alice')
+
+    async def test_like_under_asgi_is_pushed_after_the_response(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(user_group_name(self.recipient.pk), channel)
+        await sync_to_async(self.client.force_login)(self.alice)
+        self.async_client.cookies = self.client.cookies
+        with mock.patch('accounts.tasks.enqueue'):
+            response = await self.async_client.post(reverse('accounts:like_user', args=[self.recipient.username]))
+        self.assertEqual(response.status_code, 200)
+        message = await asyncio.wait_for(layer.receive(channel), 1) # The task runs on this test's loop
+        self.assertEqual(message['notification']['sender'], 'alice')
+
+
+class LikeNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = make_user()
+        cls.alice = make_user(username='alice')
+        cls.bob = make_user(username='bob')
+
+    def setUp(self):
+        cache.clear()
+
+    def like(self, liker):
+        """Toggles a like as like_view does, running the on-commit counter updates. Returns the pushed payloads."""
+        with self.captureOnCommitCallbacks(execute=True):
+            *_, payloads = _toggle_like(liker, self.recipient)
+        return payloads
+
+    def like_notifications(self):
+        return list(Notification.objects.filter(recipient=self.recipient, notification_type='like'))
+
+    def test_first_like_notifies(self):
+        self.assertEqual(get_unread_count(self.recipient.pk), 0) # Caches the counter
+        payloads = self.like(self.alice)
+        self.assertEqual([payload['message'] for payload in payloads], ['alice liked your profile!'])
+        self.assertEqual(get_unread_count(self.recipient.pk), 1)
+
+    def test_likes_within_the_window_fold_into_one_unread_row(self):
+        self.assertEqual(get_unread_count(self.recipient.pk), 0)
+        self.like(self.alice)
+        self.like(self.bob)
+        [notification] = self.like_notifications()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.sender, self.bob)
+        self.assertEqual(notification.message, 'bob and 1 other liked your profile!')
+        self.assertEqual(get_unread_count(self.recipient.pk), 1) # The cached counter wasn't bumped twice
+
+    def test_relike_within_the_window_does_not_notify_again(self):
+        self.like(self.alice)
+        self.like(self.alice) # Unlike
+        self.assertEqual(self.like(self.alice), []) # Like again: nothing pushed
+        [notification] = self.like_notifications()
+        self.assertEqual(notification.actor_count, 1)
+        self.assertEqual(NotificationActor.objects.filter(recipient=self.recipient, actor=self.alice).count(), 1)
+
+    def test_relike_after_the_window_notifies_again(self):
+        self.like(self.alice)
+        self.like(self.alice)
+        past = timezone.now() - LIKE_COALESCE_WINDOW - timedelta(minutes=1)
+        NotificationActor.objects.update(created_at=past)
+        Notification.objects.update(created_at=past)
+        self.assertEqual(len(self.like(self.alice)), 1)
+        self.assertEqual(len(self.like_notifications()), 2) # The old row is outside the window: a new one starts
+
+    def test_like_after_the_row_was_read_starts_a_new_row(self):
+        self.like(self.alice)
+        mark_read(self.recipient.pk)
+        self.like(self.bob)
+        self.assertEqual(sorted(n.message for n in self.like_notifications()), ['alice liked your profile!', 'bob liked your profile!'])
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = make_user()
+
+    def setUp(self):
+        cache.clear()
+
+    def notify(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                create_notification(self.recipient, 'system', 'Hello')
+
+    def test_miss_recounts_from_the_table(self):
+        self.notify(2) # Nothing cached yet: the bumps are dropped
+        self.assertIsNone(cache.get(unread_count_key(self.recipient.pk)))
+        self.assertEqual(get_unread_count(self.recipient.pk), 2)
+        self.assertEqual(cache.get(unread_count_key(self.recipient.pk)), 2)
+
+    def test_create_and_mark_read_adjust_the_cached_counter(self):
+        self.assertEqual(get_unread_count(self.recipient.pk), 0)
+        self.notify(3)
+        self.assertEqual(get_unread_count(self.recipient.pk), 3)
+        ids = list(Notification.objects.values_list('pk', flat=True)[:2])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(self.recipient.pk, ids), 2)
+        with self.assertNumQueries(1): # The cache lookup only: no COUNT(*)
+            self.assertEqual(get_unread_count(self.recipient.pk), 1)
+
+    def test_decrement_below_zero_drops_the_counter(self):
+        Notification.objects.create(recipient=self.recipient, notification_type='system', message='Hello')
+        Notification.objects.create(recipient=self.recipient, notification_type='system', message='Hello')
+        cache.set(unread_count_key(self.recipient.pk), 1) # Drifted: the table has two
+        adjust_unread_count(self.recipient.pk, -3)
+        self.assertIsNone(cache.get(unread_count_key(self.recipient.pk)))
+        self.assertEqual(get_unread_count(self.recipient.pk), 2)
+
+    def test_adjusting_a_missing_counter_leaves_it_missing(self):
+        adjust_unread_count(self.recipient.pk, 1)
+        adjust_unread_count(self.recipient.pk, -1)
+        self.assertIsNone(cache.get(unread_count_key(self.recipient.pk)))
+
+
+class InboxViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.other = make_user()
+        now = timezone.now()
+        cls.notifications = []
+        for i in range(5):
+            notification = Notification.objects.create(recipient=cls.user, notification_type='system', message=f'n{i}')
+            cls.notifications.append(notification)
+        # Two rows share a timestamp, so paging has to break the tie on id
+        Notification.objects.filter(pk__in=[n.pk for n in cls.notifications[:2]]).update(created_at=now - timedelta(hours=1))
+        for i, notification in enumerate(cls.notifications[2:]):
+            Notification.objects.filter(pk=notification.pk).update(created_at=now - timedelta(minutes=i))
+        Notification.objects.create(recipient=cls.other, notification_type='system', message='not yours')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.async_client.cookies = self.client.cookies
+
+    async def get_inbox(self, **params):
+        response = await self.async_client.get(reverse('accounts:notifications_inbox'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_cursor_pages_through_every_row_once_newest_first(self):
+        expected = [n.message for n in await sync_to_async(list)(
+            Notification.objects.filter(recipient=self.user).order_by('-created_at', '-id')
+        )]
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            page = await self.get_inbox(**params)
+            seen += [n['message'] for n in page['notifications']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 5)
+
+    async def test_unread_filter_and_count(self):
+        await Notification.objects.filter(pk=self.notifications[0].pk).aupdate(is_read=True)
+        page = await self.get_inbox(unread='1')
+        self.assertEqual(len(page['notifications']), 4)
+        self.assertEqual(page['unread_count'], 4)
+
+    def test_mark_read_by_ids_and_all(self):
+        # Sync client, so the view's on-commit counter updates run in this thread's test transaction
+        url = reverse('accounts:notifications_mark_read')
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(get_unread_count(self.user.pk), 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'ids': [self.notifications[0].pk, self.notifications[1].pk]})
+        self.assertEqual(response.json()['marked_read'], 2)
+        self.assertEqual(get_unread_count(self.user.pk), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'all': '1'})
+        self.assertEqual(response.json()['marked_read'], 3)
+        self.assertEqual(get_unread_count(self.user.pk), 0)
+        self.assertTrue(Notification.objects.filter(recipient=self.other, is_read=False).exists())
+
+    async def test_mark_read_needs_ids_or_all(self):
+        response = await self.async_client.post(reverse('accounts:notifications_mark_read'), {'ids': ['x']})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_login_required(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(reverse('accounts:notifications_inbox'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,182 @@
+import json
+import zlib
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts import payments, paystack_stub
+from accounts.models import Notification, PaymentGatewayPayload, PaymentTransaction, PaystackWebhookEvent, SubscriptionPlan, UserSubscription
+
+from .helpers import make_user
+
+
+class PaymentTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plan = SubscriptionPlan.objects.create(name='Gold', price=Decimal('2500.00'), duration_days=30)
+        cls.user = make_user()
+
+    def setUp(self):
+        self.payment = PaymentTransaction.objects.create(
+            user=self.user, plan=self.plan, amount=self.plan.price, reference=f'LOVENY-{self._testMethodName}',
+        )
+
+    def gateway_data(self, status, **data):
+        return {'reference': self.payment.reference, 'status': status, 'amount': 250000, **data}
+
+    def refresh(self):
+        self.payment.refresh_from_db()
+        self.user.refresh_from_db()
+
+
+class ApplyGatewayResultTests(PaymentTestCase):
+    def test_success_paid_in_full_activates(self):
+        status = payments.apply_gateway_result(self.payment, self.gateway_data('success'))
+        self.refresh()
+        self.assertEqual(status, 'success')
+        self.assertEqual(self.payment.status, 'success')
+        self.assertTrue(self.user.is_premium)
+        self.assertTrue(UserSubscription.objects.get(user=self.user).is_active)
+
+    def test_success_for_the_wrong_amount_stays_pending(self):
+        with self.assertLogs('accounts.payments', 'WARNING'):
+            status = payments.apply_gateway_result(self.payment, self.gateway_data('success', amount=100))
+        self.refresh()
+        self.assertEqual(status, 'pending')
+        self.assertEqual(self.payment.status, 'pending')
+        self.assertFalse(self.user.is_premium)
+
+    def test_failed_and_abandoned_fail(self):
+        for gateway_status in payments.FAILED_STATUSES:
+            with self.subTest(gateway_status=gateway_status):
+                PaymentTransaction.objects.filter(pk=self.payment.pk).update(status='pending')
+                status = payments.apply_gateway_result(self.payment, self.gateway_data(gateway_status))
+                self.refresh()
+                self.assertEqual(status, gateway_status)
+                self.assertEqual(self.payment.status, gateway_status)
+
+    def test_statuses_that_are_not_final_leave_the_payment_pending(self):
+        for gateway_status in ('ongoing', 'pending', 'queued', 'processing', None):
+            with self.subTest(gateway_status=gateway_status):
+                status = payments.apply_gateway_result(self.payment, self.gateway_data(gateway_status))
+                self.refresh()
+                self.assertEqual(status, 'pending')
+                self.assertEqual(self.payment.status, 'pending')
+
+    def test_pending_payment_can_still_succeed_later(self):
+        payments.apply_gateway_result(self.payment, self.gateway_data('ongoing'))
+        status = payments.apply_gateway_result(self.payment, self.gateway_data('success'))
+        self.refresh()
+        self.assertEqual(status, 'success')
+        self.assertTrue(self.user.is_premium)
+
+    def test_failure_never_overwrites_success(self):
+        payments.apply_gateway_result(self.payment, self.gateway_data('success'))
+        payments.apply_gateway_result(self.payment, self.gateway_data('failed'))
+        self.refresh()
+        self.assertEqual(self.payment.status, 'success')
+
+
+class GatewayPayloadTests(PaymentTestCase):
+    data = {'reference': 'R', 'status': 'success', 'amount': 250000, 'paid_at': '2026-10-19T12:00:00Z', 'log': {'history': [1, 2]}}
+
+    def reload(self):
+        return PaymentTransaction.objects.get(pk=self.payment.pk)
+
+    def test_payload_round_trips_through_zlib(self):
+        self.payment.archive_gateway_response(self.data)
+        payload = PaymentGatewayPayload.objects.get(pk=self.payment.pk)
+        self.assertEqual(payload.encoding, 'zlib')
+        self.assertEqual(json.loads(zlib.decompress(bytes(payload.data))), self.data)
+        self.assertEqual(self.reload().gateway_response, self.data)
+
+    @override_settings(GATEWAY_PAYLOAD_COMPRESSION=False)
+    def test_uncompressed_payload_round_trips(self):
+        self.payment.archive_gateway_response(self.data)
+        self.assertEqual(PaymentGatewayPayload.objects.get(pk=self.payment.pk).encoding, 'json')
+        self.assertEqual(self.reload().gateway_response, self.data)
+
+    def test_archiving_again_replaces_the_payload(self):
+        self.payment.archive_gateway_response(self.data)
+        self.payment.archive_gateway_response({'status': 'failed'})
+        self.assertEqual(PaymentGatewayPayload.objects.count(), 1)
+        self.assertEqual(self.reload().gateway_response, {'status': 'failed'})
+
+    def test_missing_payload_is_none(self):
+        self.assertIsNone(self.reload().gateway_response)
+
+
+@override_settings(PAYSTACK_SECRET_KEY='sk_test_webhooks')
+class WebhookTests(PaymentTestCase):
+    def event_body(self, event, status):
+        return json.dumps({'event': event, 'data': self.gateway_data(status)}).encode()
+
+    def post(self, body, signature):
+        headers = {'HTTP_X_PAYSTACK_SIGNATURE': signature} if signature is not None else {}
+        with mock.patch('accounts.tasks.enqueue') as enqueue:
+            response = self.client.post(reverse('accounts:paystack_webhook'), body, content_type='application/json', **headers)
+        return response, enqueue
+
+    def deliver(self, event, status):
+        """Posts a correctly signed event and applies it as the background pool would. Returns the inbox row."""
+        body = self.event_body(event, status)
+        response, enqueue = self.post(body, paystack_stub.sign(body, settings.PAYSTACK_SECRET_KEY))
+        self.assertEqual(response.status_code, 200)
+        func, event_id = enqueue.call_args.args
+        self.assertIs(func, payments.process_webhook_event)
+        func(event_id)
+        return PaystackWebhookEvent.objects.get(pk=event_id)
+
+    def test_signature_is_checked(self):
+        body = self.event_body('charge.success', 'success')
+        good = paystack_stub.sign(body, settings.PAYSTACK_SECRET_KEY)
+        self.assertTrue(payments.verify_webhook_signature(body, good))
+        self.assertFalse(payments.verify_webhook_signature(body + b' ', good)) # Tampered body
+        self.assertFalse(payments.verify_webhook_signature(body, paystack_stub.sign(body, 'sk_test_other')))
+        self.assertFalse(payments.verify_webhook_signature(body, ''))
+        with override_settings(PAYSTACK_SECRET_KEY=None):
+            self.assertFalse(payments.verify_webhook_signature(body, good))
+
+    def test_unsigned_or_badly_signed_events_are_rejected(self):
+        body = self.event_body('charge.success', 'success')
+        for signature in (None, 'not-a-signature', paystack_stub.sign(body, 'sk_test_other')):
+            with self.subTest(signature=signature):
+                response, enqueue = self.post(body, signature)
+                self.assertEqual(response.status_code, 401)
+                enqueue.assert_not_called()
+        self.assertFalse(PaystackWebhookEvent.objects.exists())
+        self.refresh()
+        self.assertEqual(self.payment.status, 'pending')
+
+    def test_replayed_event_is_applied_once(self):
+        first = self.deliver('charge.success', 'success')
+        end_date = UserSubscription.objects.get(user=self.user).end_date
+        second = self.deliver('charge.success', 'success') # Paystack retries until it gets a 2xx
+        payments.process_webhook_event(first.pk) # And a row can be picked up twice
+        self.refresh()
+        self.assertEqual(self.payment.status, 'success')
+        self.assertEqual(UserSubscription.objects.get(user=self.user).end_date, end_date) # Not extended again
+        self.assertEqual(Notification.objects.filter(recipient=self.user, notification_type='subscription').count(), 1)
+        self.assertTrue(first.processed_at and second.processed_at)
+
+    def test_charge_failed_after_success_keeps_the_success(self):
+        self.deliver('charge.success', 'success')
+        event = self.deliver('charge.failed', 'failed')
+        self.refresh()
+        self.assertEqual(self.payment.status, 'success')
+        self.assertTrue(self.user.is_premium)
+        self.assertEqual(event.error, '')
+
+    def test_charge_failed_fails_a_pending_payment(self):
+        self.deliver('charge.failed', 'ongoing') # A failure event is final whatever its data says
+        self.refresh()
+        self.assertEqual(self.payment.status, 'failed')
+
+    def test_unknown_reference_is_recorded(self):
+        body = json.dumps({'event': 'charge.success', 'data': {'reference': 'nope', 'status': 'success'}}).encode()
+        response, enqueue = self.post(body, paystack_stub.sign(body, settings.PAYSTACK_SECRET_KEY))
+        payments.process_webhook_event(enqueue.call_args.args[1])
+        self.assertEqual(PaystackWebhookEvent.objects.get().error, 'Unknown reference')
@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Like, UserProfile
+from loveny_project import replicas
+
+from .helpers import make_user
+
+
+# SimpleTestCase: TestCase wraps every test in atomic(), which alone sends reads to the primary.
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.router.replicas = ['replica1']
+
+    def routed(self, **flags):
+        state = replicas.RoutingState()
+        for name, value in flags.items():
+            setattr(state, name, value)
+        token = replicas._state.set(state)
+        self.addCleanup(replicas._state.reset, token)
+        return state
+
+    def test_replica_reads_view_reads_from_the_replica(self):
+        self.routed(use_replica=True)
+        self.assertEqual(self.router.db_for_read(UserProfile), 'replica1')
+
+    def test_reads_stay_on_the_primary_while_pinned(self):
+        self.routed(use_replica=True, pinned=True)
+        self.assertEqual(self.router.db_for_read(UserProfile), 'default')
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        state = self.routed(use_replica=True)
+        self.assertEqual(self.router.db_for_write(Like), 'default')
+        self.assertTrue(state.wrote)
+        self.assertEqual(self.router.db_for_read(UserProfile), 'default')
+
+    def test_writes_always_go_to_the_primary(self):
+        for flags in ({}, {'use_replica': True}, {'pinned': True}):
+            with self.subTest(**flags):
+                self.routed(**flags)
+                self.assertEqual(self.router.db_for_write(UserProfile), 'default')
+        replicas._state.set(None)
+        self.assertEqual(self.router.db_for_write(UserProfile), 'default') # Outside a request
+
+    def test_primary_only_apps_neither_use_a_replica_nor_pin(self):
+        state = self.routed(use_replica=True)
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.router.db_for_write(Session)
+        self.assertFalse(state.wrote)
+
+    def test_reads_outside_a_marked_view_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(UserProfile), 'default') # No request
+        self.routed()
+        self.assertEqual(self.router.db_for_read(UserProfile), 'default')
+
+
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.router.replicas = ['replica1']
+        self.reads = []
+
+    @replicas.replica_reads
+    def view(self, request):
+        self.reads.append(self.router.db_for_read(UserProfile))
+        if request.method == 'POST':
+            self.router.db_for_write(Like)
+        return HttpResponse()
+
+    def call(self, request):
+        def get_response(request):
+            middleware.process_view(request, self.view, (), {})
+            return self.view(request)
+        middleware = replicas.ReplicaPinMiddleware(get_response)
+        return middleware(request)
+
+    def test_write_sets_the_pin_cookie(self):
+        response = self.call(RequestFactory().post('/'))
+        cookie = response.cookies[replicas.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], replicas.REPLICA_PIN_SECONDS)
+        self.assertTrue(cookie['httponly'])
+        self.assertEqual(self.reads, ['default']) # POST: never a replica
+
+    def test_read_only_request_is_not_pinned(self):
+        response = self.call(RequestFactory().get('/'))
+        self.assertNotIn(replicas.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(self.reads, ['replica1'])
+
+    def test_pinned_user_reads_from_the_primary(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[replicas.REPLICA_PIN_COOKIE] = '1'
+        self.call(request)
+        self.assertEqual(self.reads, ['default'])
+        self.assertIsNone(replicas._state.get()) # Reset when the request ends
+
+
+# The router is installed only when replicas are configured; without any it still tracks writes.
+@override_settings(DATABASE_ROUTERS=['loveny_project.replicas.ReplicaRouter'])
+class PinCookieTests(TestCase):
+    def test_like_pins_the_user_to_the_primary(self):
+        viewer, other = make_user(), make_user()
+        self.client.force_login(viewer)
+        with mock.patch('accounts.tasks.enqueue'):
+            response = self.client.post(reverse('accounts:like_user', args=[other.username]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(replicas.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_browsing_does_not_pin(self):
+        self.client.force_login(make_user())
+        response = self.client.get(reverse('accounts:browse_profiles_feed'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(replicas.REPLICA_PIN_COOKIE, response.cookies)
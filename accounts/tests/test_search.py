@@ -0,0 +1,40 @@
+from django.test import TestCase
+
+from accounts import search
+from accounts.models import UserProfile
+from accounts.views import _browse_queryset
+
+from .helpers import make_user, profile_fields
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = make_user(looking_for='DATING', seeking='F', gender='M')
+        # More matches than SEARCH_CANDIDATES, nearly all of them ineligible (wrong gender),
+        # and ranked above the eligible ones (name matches outweigh bio matches).
+        UserProfile.objects.bulk_create([
+            UserProfile(**profile_fields(first_name='Lagoon', gender='M'))
+            for _ in range(search.SEARCH_CANDIDATES + 100)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(**profile_fields(bio='Lives by the lagoon', gender='F'))
+            for _ in range(30)
+        ])
+        search.rebuild_index() # bulk_create skips the post_save receivers
+
+    def test_eligible_matches_beyond_the_top_candidates_are_found(self):
+        queryset = _browse_queryset(self.viewer)
+        profiles = search.search(queryset, 'lagoon', limit=100)
+        self.assertEqual(len(profiles), 30)
+        self.assertTrue(all(profile.gender == 'F' for profile in profiles))
+
+    def test_offsets_page_through_eligible_matches(self):
+        queryset = _browse_queryset(self.viewer)
+        pages = [search.search(queryset, 'lagoon', limit=10, offset=offset) for offset in (0, 10, 20, 30)]
+        self.assertEqual([len(page) for page in pages], [10, 10, 10, 0])
+        ids = [profile.pk for page in pages for profile in page]
+        self.assertEqual(len(set(ids)), 30)
+
+    def test_filters_that_match_nothing(self):
+        self.assertEqual(search.search(UserProfile.objects.none(), 'lagoon', limit=10), [])
@@ -31,9 +31,17 @@ urlpatterns = [
     # Core App Functionality
     path('', views.homepage_view, name='home'), # This is the homepage for the 'accounts' app
     path('browse/', views.browse_profiles_view, name='browse_profiles'), # Main browsing view
+    path('browse/feed/', views.browse_profiles_feed, name='browse_profiles_feed'), # JSON feed for AJAX/mobile clients
+    path('browse/facets/', views.browse_facets_view, name='browse_facets'), # Filter option counts (JSON)
+    path('search/', views.search_profiles_view, name='search_profiles'), # Ranked full-text search (JSON)
     path('swipe/', views.swipe_profiles_view, name='swipe_profiles'), # Separate swipe view
     path('like/<str:username>/', views.like_view, name='like_user'),
     path('matches/', views.matches_view, name='matches_view'), # URL name for matches view
+    path('likes-you/', views.likes_you_view, name='likes_you'), # Premium: who liked me
+    path('likes-you/feed/', views.likes_you_feed, name='likes_you_feed'),
+    path('notifications/', views.notifications_inbox_view, name='notifications_inbox'),
+    path('notifications/mark-read/', views.notifications_mark_read_view, name='notifications_mark_read'),
+    path('notifications/poll/', views.notifications_poll_view, name='notifications_poll'),
 
     # Subscription Plans & Payments (as they were likely on June 29th)
     path('subscription-plans/', views.choose_plan_view, name='choose_plan'),
@@ -41,4 +49,8 @@ urlpatterns = [
     path('verify-payment/', views.verify_payment_view, name='verify_payment'),
     path('payment-success/', views.payment_success_view, name='payment_success'),
     path('payment-failed/', views.payment_failed_view, name='payment_failed'),
+    path('paystack/webhook/', views.paystack_webhook_view, name='paystack_webhook'),
+
+    # Staff reports
+    path('reports/analytics/', views.analytics_report_view, name='analytics_report'),
 ]
@@ -3,33 +3,51 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.views import LoginView, LogoutView
 from django.views.generic import CreateView
-from django.urls import reverse_lazy
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q
+from django.urls import reverse, reverse_lazy
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.db.models import Exists, OuterRef, Q
 from django.conf import settings
 import requests
 import json
 import os
 import errno # Import errno for checking OS errors
-from datetime import timedelta
+from datetime import date, timedelta
 from django.db import transaction
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.text import capfirst
+from django.utils.safestring import mark_safe
+from django.template.loader import get_template, render_to_string
+from django.middleware.csrf import get_token
+from django.core.handlers.asgi import ASGIRequest
 import secrets # For generating unique references
 import uuid # For generating unique transaction IDs for Paystack
 from decimal import Decimal # To handle monetary values precisely
+from asgiref.sync import sync_to_async
+from loveny_project.database import retry_on_locked
+from loveny_project.replicas import keep_routing, replica_reads
 
 
 # Import all models and forms
 from .forms import CustomUserCreationForm, UserProfileForm
 from .models import UserProfile, Like, SubscriptionPlan, UserSubscription, ProfileImage, PaymentTransaction, LOOKING_FOR_CHOICES, GENDER_CHOICES, SEEKING_CHOICES
 # Import the Notification model - CORRECTED THIS LINE
-from .models import Notification
+from .models import Notification, PaystackWebhookEvent, RollupWatermark
+from .models import ATTRIBUTE_FIELDS, ATTRIBUTE_FILTERS, age_range_q
+from .decorators import async_login_required
+from .entitlements import SEE_WHO_LIKED_YOU, WHATSAPP_CONTACT, aget_entitlements, get_entitlements
+from .notifications import (
+    aget_unread_count, create_notification, mark_read, notification_payload, push_in_background,
+    record_like_notification,
+)
+from .pagination import after_cursor, encode_cursor, page_size
+from . import analytics, conditional, facets, moderation, payments, paystack, search, tasks
 
 
 class CustomLoginView(LoginView):
@@ -61,20 +79,21 @@ def account_delete(request):
     """
     Handles the account deletion process.
     GET: Displays a confirmation page.
-    POST: Deletes the user account and logs out.
+    POST: Deactivates the account at once (hidden from everyone, can't log in), logs out,
+    and leaves the actual deletion to a background job.
     """
     if request.method == 'POST':
         user = request.user
         username = user.username # Store username for messages
 
-        try:
-            logout(request) # Log out the user first
-            user.delete() # Delete the user and cascading related objects (like UserProfile)
-            messages.success(request, f"Your account '{username}' has been successfully deleted. We're sad to see you go!")
-            return redirect('home') # Redirect to your home page or a goodbye page
-        except Exception as e:
-            messages.error(request, f"An error occurred while deleting your account: {e}")
-            return redirect('accounts:profile_edit') # Redirect back to profile edit or a relevant page
+        # Only the tombstone is written here; the likes, notifications, payments and images are
+        # purged by a background job (accounts/moderation.py) in short batches.
+        with transaction.atomic():
+            UserProfile.objects.filter(pk=user.pk).update(is_active=False, deleted_at=timezone.now(), updated_at=timezone.now())
+            moderation.start_job('delete', [user.pk])
+        logout(request)
+        messages.success(request, f"Your account '{username}' has been successfully deleted. We're sad to see you go!")
+        return redirect('home') # Redirect to your home page or a goodbye page
 
     # For GET request, display the confirmation page
     return render(request, 'accounts/confirm_delete.html')
@@ -84,16 +103,9 @@ def account_delete(request):
 def profile_view(request):
     """Displays the current logged-in user's profile."""
     user_profile = request.user
-    # Fetch user's subscription
-    user_subscription = None
-    try:
-        user_subscription = UserSubscription.objects.get(user=user_profile)
-    except UserSubscription.DoesNotExist:
-        pass # No subscription found for the user
-
+    # Plan, expiry and features come from the cached `entitlements` context variable.
     context = {
         'user_profile': user_profile,
-        'user_subscription': user_subscription, # Pass subscription to template
     }
     return render(request, 'accounts/profile.html', context)
 
@@ -263,14 +275,14 @@ def ajax_profile_save(request):
             MAX_GALLERY_IMAGES = 20
             # Re-fetch user_profile to get the latest count after deletions, etc.
             user_profile.refresh_from_db()
-            # Use direct query to get accurate count after database changes
-            current_gallery_images_count = ProfileImage.objects.filter(user_profile=user_profile).count()
+            # gallery_images_count is kept in step by accounts/counters.py, so no COUNT(*) here
+            current_gallery_images_count = user_profile.gallery_images_count
             next_order = current_gallery_images_count
 
             for key in request.FILES:
                 if key.startswith('gallery_image_'):
                     # Check current count *again* right before adding to prevent exceeding limit
-                    if ProfileImage.objects.filter(user_profile=user_profile).count() < MAX_GALLERY_IMAGES:
+                    if current_gallery_images_count < MAX_GALLERY_IMAGES:
                         image_file = request.FILES[key]
                         try:
                             ProfileImage.objects.create(
@@ -279,6 +291,7 @@ def ajax_profile_save(request):
                                 order=next_order
                             )
                             next_order += 1
+                            current_gallery_images_count += 1
                         except Exception as e:
                             print(f"Error saving new gallery image {key}: {e}")
                     else:
@@ -341,163 +354,418 @@ def homepage_view(request):
     return render(request, 'accounts/homepage.html')
 
 
-@login_required
-def browse_profiles_view(request):
-    """
-    Allows the current user to browse other user profiles.
-    Profiles are now categorized by their 'looking_for' type,
-    filtered by current user's preferences, age range, and location.
-    """
-    current_user = request.user
+# --- Browse / swipe helpers (shared by the sync page and the async JSON endpoints) ---
+
+SWIPE_DECK_SIZE = 50 # Cards sent to the swipe page in one go
+# Cards per streamed browse batch: a multiple of every grid column count (1-4), so batches fill whole rows.
+BROWSE_STREAM_BATCH = 24
+BROWSE_STREAM_MARKER = '<!-- browse:profiles -->'
 
-    # Start with base queryset: exclude self, no empty usernames
-    base_queryset = UserProfile.objects.exclude(id=current_user.id).exclude(Q(username__exact='') | Q(username__isnull=True))
 
-    # Apply 'looking_for' and 'seeking' preferences based on the strict rules
+def _parse_age(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _selected_attributes(query_dict):
+    """The advanced attribute filters of a request: {field: [values]} for each ATTRIBUTE_FILTERS field present (multi-select)."""
+    return {field: query_dict.getlist(field) for field in ATTRIBUTE_FIELDS if query_dict.getlist(field)}
+
+
+def _preference_filters(current_user):
+    """
+    The strict looking_for/seeking rules for `current_user` as (looking_for Q, gender Q).
+    The gender Q is None where no gender rule applies.
+    """
     current_user_looking_for = current_user.looking_for
     current_user_seeking_gender = current_user.seeking
 
     # Filter by `looking_for` preference (strict matching)
     if current_user_looking_for == 'DATING':
-        base_queryset = base_queryset.filter(looking_for='DATING')
+        looking_for_q = Q(looking_for='DATING')
     elif current_user_looking_for == 'HOOKUP':
-        base_queryset = base_queryset.filter(looking_for='HOOKUP')
+        looking_for_q = Q(looking_for='HOOKUP')
     elif current_user_looking_for == 'SEXCALL':
-        base_queryset = base_queryset.filter(looking_for='SEXCALL')
+        looking_for_q = Q(looking_for='SEXCALL')
     elif current_user_looking_for == 'SUGAR_DADDY':
-        base_queryset = base_queryset.filter(looking_for='SUGAR_MUMMY')
+        looking_for_q = Q(looking_for='SUGAR_MUMMY')
     elif current_user_looking_for == 'SUGAR_MUMMY':
-        base_queryset = base_queryset.filter(looking_for='SUGAR_DADDY')
+        looking_for_q = Q(looking_for='SUGAR_DADDY')
     else:
         # Default fallback if user's 'looking_for' is not set or invalid
         # Show all relevant `looking_for` types but without specific gender filtering yet
-        base_queryset = base_queryset.filter(looking_for__in=[choice[0] for choice in LOOKING_FOR_CHOICES])
-
+        looking_for_q = Q(looking_for__in=[choice[0] for choice in LOOKING_FOR_CHOICES])
 
     # Apply gender filtering based on current user's 'seeking' preference,
     # but only for DATING, HOOKUP, SEXCALL where direct gender seeking applies.
+    gender_q = None
     if current_user_seeking_gender in ['M', 'F', 'O']:
         if current_user_looking_for in ['DATING', 'HOOKUP', 'SEXCALL']:
-            base_queryset = base_queryset.filter(gender=current_user_seeking_gender)
+            gender_q = Q(gender=current_user_seeking_gender)
         # Gender filtering for Sugar Daddy/Mummy is handled implicitly by the 'looking_for' filter.
 
+    return looking_for_q, gender_q
 
-    # Apply age filters
-    min_age = request.GET.get('min_age')
-    max_age = request.GET.get('max_age')
-    location_filter = request.GET.get('location')
 
-    today = timezone.now().date()
+def _browse_queryset(current_user, min_age=None, max_age=None, location_filter=None, attributes=None):
+    """
+    Builds (but does not evaluate) the candidate queryset for `current_user`,
+    applying the strict looking_for/seeking rules plus the optional age, location and attribute filters.
+    """
+    # Start with the visible profiles (active, non-staff, with a username, picture and date of birth), minus self.
+    # Banned and deleted (tombstoned) accounts never show up; the partial indexes only hold these rows.
+    base_queryset = UserProfile.visible.exclude(id=current_user.id)
 
-    if min_age:
-        try:
-            min_birth_date = today - timedelta(days=int(min_age) * 365.25)
-            base_queryset = base_queryset.filter(date_of_birth__lte=min_birth_date)
-        except ValueError:
-            pass
+    looking_for_q, gender_q = _preference_filters(current_user)
+    base_queryset = base_queryset.filter(looking_for_q)
+    if gender_q is not None:
+        base_queryset = base_queryset.filter(gender_q)
 
-    if max_age:
-        try:
-            max_birth_date = today - timedelta(days=(int(max_age) + 1) * 365.25)
-            base_queryset = base_queryset.filter(date_of_birth__gte=max_birth_date)
-        except ValueError:
-            pass
+    # Exact birthday boundaries, served by the date_of_birth index; invalid ages are ignored.
+    base_queryset = base_queryset.age_between(_parse_age(min_age), _parse_age(max_age))
 
     if location_filter:
         base_queryset = base_queryset.filter(location__iexact=location_filter)
 
-    # Prepare categorized data
-    categorized_profiles_data = {}
+    if attributes:
+        # Bitwise tests on attribute_bits: one per attribute, however many values are selected.
+        base_queryset = base_queryset.with_attributes(attributes)
+
+    return base_queryset.with_age() # Cards read the DB-computed age
+
+
+def _attribute_filter_options(selected):
+    """The advanced filter checkboxes for the browse form, with the current selection ticked."""
+    return [
+        {
+            'field': field,
+            'label': capfirst(UserProfile._meta.get_field(field).verbose_name),
+            'choices': [(str(value), label, str(value) in selected.get(field, [])) for value, label in choices],
+        }
+        for field, choices in ATTRIBUTE_FILTERS
+    ]
+
+
+def _browse_display_categories(looking_for):
+    """Which looking_for categories get a heading, based on the current user's looking_for."""
+    if looking_for == 'DATING':
+        return [('DATING', 'Dating')]
+    elif looking_for == 'HOOKUP':
+        return [('HOOKUP', 'Hookup')]
+    elif looking_for == 'SEXCALL':
+        return [('SEXCALL', 'Sex Call')]
+    elif looking_for == 'SUGAR_DADDY':
+        return [('SUGAR_MUMMY', 'Sugar Mummy')] # Display "Sugar Mummy" category for a Sugar Daddy
+    elif looking_for == 'SUGAR_MUMMY':
+        return [('SUGAR_DADDY', 'Sugar Daddy')] # Display "Sugar Daddy" category for a Sugar Mummy
+    # Fallback: if user's looking_for is not set, show all original categories for general Browse
+    return LOOKING_FOR_CHOICES
+
+
+def _whatsapp_link(request, current_user, profile):
+    """Pre-filled wa.me link from current_user to profile, or None if profile has no phone number."""
+    if not profile.phone_number:
+        return None
+    user_profile_url = request.build_absolute_uri(reverse_lazy('accounts:view_user_profile', kwargs={'username': current_user.username}))
+    clean_phone_number = profile.phone_number.replace(' ', '').replace('-', '')
+    pre_filled_message = f"Hi {profile.first_name}! I found your profile on LOVENY. Here's my profile: {user_profile_url}"
+    return f"https://wa.me/{clean_phone_number}?text={requests.utils.quote(pre_filled_message)}"
+
+
+def _profile_card(request, current_user, profile, gallery_urls, has_liked, is_matched, can_contact):
+    """
+    Serializes one candidate for the browse/swipe cards. Pure function: all DB lookups
+    (likes, gallery images) are done in bulk by the caller.
+    """
+    # Get all profile images for this user
+    all_profile_images_urls = []
+    if profile.profile_picture and profile.profile_picture.name != settings.DEFAULT_PROFILE_PICTURE_PATH:
+        all_profile_images_urls.append(profile.profile_picture.url)
+    all_profile_images_urls.extend(gallery_urls)
+
+    # If no images, ensure default avatar is explicitly added
+    if not all_profile_images_urls:
+        all_profile_images_urls.append(settings.STATIC_URL + settings.DEFAULT_PROFILE_PICTURE_PATH)
+
+    # Generate WhatsApp link for this profile if matched and the viewer's plan includes contact
+    whatsapp_link_for_profile = None
+    if is_matched and can_contact:
+        whatsapp_link_for_profile = _whatsapp_link(request, current_user, profile)
+
+    return {
+        'username': profile.username,
+        'first_name': profile.first_name,
+        'bio': profile.bio,
+        'gender': profile.gender,
+        'gender_display': profile.get_gender_display(),
+        'seeking': profile.seeking,
+        'seeking_display': profile.get_seeking_display(),
+        'location': profile.location,
+        'full_name': profile.get_full_name,
+        'age': profile.get_age,
+        'main_profile_picture': profile.profile_picture.url if profile.profile_picture else settings.STATIC_URL + settings.DEFAULT_PROFILE_PICTURE_PATH,
+        'profile_pictures': all_profile_images_urls, # Pass all image URLs for cycler
+        'is_premium': profile.is_premium,
+        'last_login': profile.last_login.isoformat() if profile.last_login else None,
+        'has_liked': has_liked,
+        'is_matched': is_matched,
+        'whatsapp_link': whatsapp_link_for_profile, # Pass WhatsApp link
+        'profile_picture_name': profile.profile_picture.name if profile.profile_picture else '',
+        'looking_for_display': profile.get_looking_for_display(),
+    }
 
-    # Define which categories to display headings for, based on current user's looking_for
-    display_categories = []
-    if current_user_looking_for == 'DATING':
-        display_categories = [('DATING', 'Dating')]
-    elif current_user_looking_for == 'HOOKUP':
-        display_categories = [('HOOKUP', 'Hookup')]
-    elif current_user_looking_for == 'SEXCALL':
-        display_categories = [('SEXCALL', 'Sex Call')]
-    elif current_user_looking_for == 'SUGAR_DADDY':
-        display_categories = [('SUGAR_MUMMY', 'Sugar Mummy')] # Display "Sugar Mummy" category for a Sugar Daddy
-    elif current_user_looking_for == 'SUGAR_MUMMY':
-        display_categories = [('SUGAR_DADDY', 'Sugar Daddy')] # Display "Sugar Daddy" category for a Sugar Mummy
-    else:
-        # Fallback: if user's looking_for is not set, show all original categories for general Browse
-        display_categories = LOOKING_FOR_CHOICES
 
-    for choice_value, choice_display in display_categories:
-        # Filter the already filtered base_queryset by the current looking_for type from the loop
-        profiles_in_category = base_queryset.filter(looking_for=choice_value).order_by('-last_login')
-
-        profiles_list = []
-        for profile in profiles_in_category:
-            if not profile.username:
-                continue
-
-            has_liked = Like.objects.filter(liker=current_user, liked_user=profile).exists()
-            is_matched = Like.objects.filter(
-                Q(liker=current_user, liked_user=profile) & Q(liker=profile, liked_user=current_user)
-            ).exists()
-
-            # Get all profile images for this user
-            all_profile_images_urls = []
-            if profile.profile_picture and profile.profile_picture.name != settings.DEFAULT_PROFILE_PICTURE_PATH:
-                all_profile_images_urls.append(profile.profile_picture.url)
-
-            # Add additional gallery images
-            for img in ProfileImage.objects.filter(user_profile=profile).order_by('order', 'pk'):
-                if img.image:
-                    all_profile_images_urls.append(img.image.url)
-
-            # If no images, ensure default avatar is explicitly added
-            if not all_profile_images_urls:
-                all_profile_images_urls.append(settings.STATIC_URL + settings.DEFAULT_PROFILE_PICTURE_PATH)
-
-            # Generate WhatsApp link for this profile if matched and premium
-            whatsapp_link_for_profile = None
-            if is_matched and current_user.is_premium and profile.phone_number:
-                user_profile_url = request.build_absolute_uri(reverse_lazy('accounts:view_user_profile', kwargs={'username': current_user.username}))
-                clean_phone_number = profile.phone_number.replace(' ', '').replace('-', '')
-                pre_filled_message = f"Hi {profile.first_name}! I found your profile on LOVENY. Here's my profile: {user_profile_url}"
-                whatsapp_link_for_profile = f"https://wa.me/{clean_phone_number}?text={requests.utils.quote(pre_filled_message)}"
-
-            profiles_list.append({
-                'username': profile.username,
-                'first_name': profile.first_name,
-                'bio': profile.bio,
-                'gender': profile.gender,
-                'gender_display': profile.get_gender_display(),
-                'seeking': profile.seeking,
-                'seeking_display': profile.get_seeking_display(),
-                'location': profile.location,
-                'full_name': profile.get_full_name,
-                'age': profile.get_age,
-                'main_profile_picture': profile.profile_picture.url if profile.profile_picture else settings.STATIC_URL + settings.DEFAULT_PROFILE_PICTURE_PATH,
-                'profile_pictures': all_profile_images_urls, # Pass all image URLs for cycler
-                'is_premium': profile.is_premium,
-                'last_login': profile.last_login.isoformat() if profile.last_login else None,
-                'has_liked': has_liked,
-                'is_matched': is_matched,
-                'whatsapp_link': whatsapp_link_for_profile, # Pass WhatsApp link
-                'profile_picture_name': profile.profile_picture.name if profile.profile_picture else '',
-                'looking_for_display': profile.get_looking_for_display(),
-            })
+def _build_profile_cards(request, current_user, profiles):
+    """Sync: turns a list of profiles into card dicts with three bulk queries instead of three per profile."""
+    can_contact = get_entitlements(request).has(WHATSAPP_CONTACT)
+    ids = [profile.id for profile in profiles]
+    liked_ids = set(Like.objects.filter(liker=current_user, liked_user_id__in=ids).values_list('liked_user_id', flat=True))
+    liked_me_ids = set(Like.objects.filter(liked_user=current_user, liker_id__in=ids).values_list('liker_id', flat=True))
+    gallery = {}
+    for user_id, image in ProfileImage.objects.filter(user_profile_id__in=ids).order_by('order', 'pk').values_list('user_profile_id', 'image'):
+        if image:
+            gallery.setdefault(user_id, []).append(default_storage.url(image))
+
+    return [
+        _profile_card(request, current_user, profile, gallery.get(profile.id, []),
+                      profile.id in liked_ids, profile.id in liked_ids and profile.id in liked_me_ids, can_contact)
+        for profile in profiles
+    ]
+
+
+async def _abuild_profile_cards(request, current_user, profiles):
+    """Async twin of _build_profile_cards, using the async ORM."""
+    can_contact = (await aget_entitlements(request)).has(WHATSAPP_CONTACT)
+    ids = [profile.id for profile in profiles]
+    liked_ids = {pk async for pk in Like.objects.filter(liker=current_user, liked_user_id__in=ids).values_list('liked_user_id', flat=True)}
+    liked_me_ids = {pk async for pk in Like.objects.filter(liked_user=current_user, liker_id__in=ids).values_list('liker_id', flat=True)}
+    gallery = {}
+    async for user_id, image in ProfileImage.objects.filter(user_profile_id__in=ids).order_by('order', 'pk').values_list('user_profile_id', 'image'):
+        if image:
+            gallery.setdefault(user_id, []).append(default_storage.url(image))
+
+    return [
+        _profile_card(request, current_user, profile, gallery.get(profile.id, []),
+                      profile.id in liked_ids, profile.id in liked_ids and profile.id in liked_me_ids, can_contact)
+        for profile in profiles
+    ]
+
+
+def _stream_browse_page(request, context, base_queryset):
+    """
+    Streaming browse page. The shell (base.html, header, filters) is rendered here and sent
+    at once. Each category then follows in batches of BROWSE_STREAM_BATCH cards, rendered as
+    their rows arrive from a chunked (on PostgreSQL, server-side) cursor. The browser paints
+    and starts loading images before the last card is generated.
+    """
+    shell = render_to_string('accounts/browse_profiles.html', {**context, 'stream_marker': mark_safe(BROWSE_STREAM_MARKER)}, request)
+    head, tail = shell.split(BROWSE_STREAM_MARKER)
+    # Batches render without context processors (so no DB work), with the token fetched now:
+    # a CSRF cookie can only be set before the headers go out.
+    batch_context = {'csrf_token': get_token(request)}
+    current_user = request.user
+    categories = _browse_display_categories(current_user.looking_for)
+    cards_template = get_template('accounts/includes/browse_cards.html')
+
+    async def render_batch(profiles, heading):
+        cards = await _abuild_profile_cards(request, current_user, profiles)
+        return cards_template.render({**batch_context, 'profiles': cards, 'heading': heading})
+
+    async def page():
+        yield head
+        shown = False
+        for choice_value, choice_display in categories:
+            heading, batch = choice_display, []
+            candidates = base_queryset.filter(looking_for=choice_value).order_by('-last_login')
+            async for profile in candidates.aiterator(chunk_size=BROWSE_STREAM_BATCH):
+                batch.append(profile)
+                if len(batch) == BROWSE_STREAM_BATCH:
+                    yield await render_batch(batch, heading)
+                    heading, batch, shown = None, [], True
+            if batch:
+                yield await render_batch(batch, heading)
+                shown = True
+        if not shown:
+            yield render_to_string('accounts/includes/browse_empty.html')
+        yield tail
+
+    return StreamingHttpResponse(keep_routing(page())) # Card queries keep the view's replica routing
+
+
+@replica_reads
+@login_required
+def browse_profiles_view(request):
+    """
+    Allows the current user to browse other user profiles.
+    Profiles are now categorized by their 'looking_for' type,
+    filtered by current user's preferences, age range, and location.
+    """
+    current_user = request.user
 
-        # Only add the category to context if it has profiles
-        if profiles_list:
-            categorized_profiles_data[choice_display] = profiles_list
+    min_age = request.GET.get('min_age')
+    max_age = request.GET.get('max_age')
+    location_filter = request.GET.get('location')
+    attributes = _selected_attributes(request.GET)
+    base_queryset = _browse_queryset(current_user, min_age, max_age, location_filter, attributes)
+
+    # One aggregate over the candidates decides whether the client's copy is still current.
+    etag = conditional.page_etag(request, conditional.candidates_version(base_queryset))
+    response = conditional.not_modified(request, etag)
+    if response:
+        return response
 
     context = {
-        'categorized_profiles_data': categorized_profiles_data, # New context variable
         'user_profile': current_user,
         'min_age': min_age,
         'max_age': max_age,
         'location_filter': location_filter,
+        'attribute_filters': _attribute_filter_options(attributes),
         'LOOKING_FOR_CHOICES': LOOKING_FOR_CHOICES, # Pass choices for filter dropdowns
     }
-    return render(request, 'accounts/browse_profiles.html', context)
+    # Under WSGI an async stream is buffered whole anyway, so only ASGI requests are streamed.
+    if settings.BROWSE_STREAMING and isinstance(request, ASGIRequest):
+        return conditional.with_validators(_stream_browse_page(request, context, base_queryset), etag)
+
+    # Prepare categorized data
+    categorized_profiles_data = {}
+    for choice_value, choice_display in _browse_display_categories(current_user.looking_for):
+        # Filter the already filtered base_queryset by the current looking_for type from the loop
+        profiles_in_category = list(base_queryset.filter(looking_for=choice_value).order_by('-last_login'))
+        profiles_list = _build_profile_cards(request, current_user, profiles_in_category)
+
+        # Only add the category to context if it has profiles
+        if profiles_list:
+            categorized_profiles_data[choice_display] = profiles_list
+
+    context['categorized_profiles_data'] = categorized_profiles_data
+    return conditional.with_validators(render(request, 'accounts/browse_profiles.html', context), etag)
+
+
+@replica_reads
+@async_login_required
+async def browse_profiles_feed(request):
+    """
+    JSON version of the browse page for the mobile/AJAX clients.
+    Same filters and categories as browse_profiles_view, served from the async ORM.
+    """
+    current_user = request.user
+    base_queryset = _browse_queryset(
+        current_user,
+        request.GET.get('min_age'),
+        request.GET.get('max_age'),
+        request.GET.get('location'),
+        _selected_attributes(request.GET),
+    )
+
+    etag = await conditional.afeed_etag(request, await conditional.acandidates_version(base_queryset))
+    response = conditional.not_modified(request, etag, page=False)
+    if response:
+        return response
+
+    categories = []
+    for choice_value, choice_display in _browse_display_categories(current_user.looking_for):
+        profiles = [profile async for profile in base_queryset.filter(looking_for=choice_value).order_by('-last_login')]
+        if profiles:
+            categories.append({
+                'looking_for': choice_value,
+                'label': choice_display,
+                'profiles': await _abuild_profile_cards(request, current_user, profiles),
+            })
+
+    return conditional.with_validators(JsonResponse({'status': 'ok', 'categories': categories}), etag)
+
+
+@replica_reads
+@async_login_required
+async def browse_facets_view(request):
+    """
+    Counts per gender, looking_for, age bucket and top location for the browse candidates
+    under the request's filters (same parameters as browse), so the filter UI can show how
+    many profiles each option would return. Each facet is counted without its own filter:
+    the gender facet ignores the viewer's seeking, the location facet the chosen location.
+    One grouped query, cached per filter signature.
+    """
+    current_user = request.user
+    min_age, max_age = _parse_age(request.GET.get('min_age')), _parse_age(request.GET.get('max_age'))
+    location_filter = request.GET.get('location') or None
+    attributes = _selected_attributes(request.GET)
+
+    looking_for_q, gender_q = _preference_filters(current_user)
+    conditions = {
+        'gender': gender_q,
+        'looking_for': looking_for_q,
+        'age_bucket': age_range_q(min_age, max_age),
+        'location': Q(location__iexact=location_filter) if location_filter else None,
+    }
+    base_queryset = UserProfile.visible.with_attributes(attributes) # Applies to every facet
+    key = facets.facets_key(current_user.looking_for, current_user.seeking, {
+        'min_age': min_age, 'max_age': max_age, 'location': location_filter and location_filter.lower(),
+        'attributes': {field: sorted(values) for field, values in attributes.items()},
+    })
+    return JsonResponse({'status': 'ok', **await facets.aget_facets(base_queryset, conditions, key)})
 
 
+@replica_reads
+@async_login_required
+async def search_profiles_view(request):
+    """
+    Ranked keyword search (?q=) over username, first name, location and bio, limited to the
+    profiles browse would show: same looking_for/seeking rules and the same optional filters.
+    Paged with ?limit= and ?offset= over the ranked matches.
+    """
+    current_user = request.user
+    query = request.GET.get('q', '').strip()
+    limit = page_size(request.GET.get('limit'))
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+    except ValueError:
+        offset = 0
+
+    base_queryset = _browse_queryset(
+        current_user,
+        request.GET.get('min_age'),
+        request.GET.get('max_age'),
+        request.GET.get('location'),
+        _selected_attributes(request.GET),
+    )
+    profiles = await sync_to_async(search.search)(base_queryset, query, limit + 1, offset) # One extra to detect a next page
+    next_offset = offset + limit if len(profiles) > limit else None
+
+    return JsonResponse({
+        'status': 'ok',
+        'query': query,
+        'profiles': await _abuild_profile_cards(request, current_user, profiles[:limit]),
+        'next_offset': next_offset,
+    })
+
+
+@replica_reads
+@async_login_required
+async def swipe_profiles_view(request):
+    """
+    Tinder-style deck: one card at a time, driven by swipe_profiles.html.
+    Profiles the user has already liked are left out of the deck.
+    """
+    current_user = request.user
+    deck_queryset = (
+        _browse_queryset(current_user)
+        .exclude(likes_received__liker=current_user)
+        .order_by('-last_login')[:SWIPE_DECK_SIZE]
+    )
+    profiles = [profile async for profile in deck_queryset]
+    cards = await _abuild_profile_cards(request, current_user, profiles)
+
+    context = {
+        'profiles_json': json.dumps(cards),
+        'user_profile': current_user,
+    }
+    # base.html reads per-user state (e.g. the unread badge) that may hit the DB, so render off the event loop.
+    return await sync_to_async(render)(request, 'accounts/swipe_profiles.html', context)
+
+
+@replica_reads
 @login_required
 def view_other_profile(request, username):
     """
@@ -506,24 +774,23 @@ def view_other_profile(request, username):
     Now also passes all profile images for the gallery, excluding the main one.
     """
     current_user = request.user
-    profile = get_object_or_404(UserProfile, username=username)
+    profile = get_object_or_404(UserProfile, username=username, is_active=True)
 
     if profile == current_user:
         return redirect('accounts:profile')
 
+    # Revalidation: 304 unless the profile, its gallery, the viewer's likes or their page chrome changed.
+    etag = conditional.page_etag(request, profile.pk, profile.updated_at)
+    response = conditional.not_modified(request, etag)
+    if response:
+        return response
+
     has_liked = Like.objects.filter(liker=current_user, liked_user=profile).exists()
-    is_matched = Like.objects.filter(
-        Q(liker=current_user, liked_user=profile) & Q(liker=profile, liked_user=current_user)
-    ).exists()
+    is_matched = has_liked and Like.objects.filter(liker=profile, liked_user=current_user).exists()
 
     whatsapp_link = None
-    if current_user.is_premium and profile.phone_number:
-        user_profile_url = request.build_absolute_uri(reverse_lazy('accounts:view_user_profile', kwargs={'username': current_user.username}))
-        clean_phone_number = profile.phone_number.replace(' ', '').replace('-', '')
-        pre_filled_message = f"Hi {profile.first_name}! I found your profile on LOVENY. Here's my profile: {user_profile_url}"
-        whatsapp_link = f"https://wa.me/{clean_phone_number}?text={requests.utils.quote(pre_filled_message)}"
-    elif not current_user.is_premium:
-        pass
+    if get_entitlements(request).has(WHATSAPP_CONTACT):
+        whatsapp_link = _whatsapp_link(request, current_user, profile)
 
     # --- Start Revised Logic for Gallery Images ---
     gallery_images = []
@@ -548,93 +815,448 @@ def view_other_profile(request, username):
         'whatsapp_link': whatsapp_link,
         'all_profile_images': gallery_images, # Passed to template
     }
-    return render(request, 'accounts/other_profile_detail.html', context)
+    return conditional.with_validators(render(request, 'accounts/other_profile_detail.html', context), etag)
 
 
-@login_required
-def like_view(request, username):
+
+
+@retry_on_locked
+def _toggle_like(liker, liked_user):
+    """
+    Sync part of like_view: flips the like and writes the notifications in one transaction.
+    Returns (action_performed, has_liked, is_matched, notification_payloads).
+    """
+    notifications = []
+    # Use a transaction to ensure atomicity for like creation/deletion and notification creation
+    with transaction.atomic():
+        # One DELETE instead of EXISTS + DELETE; the counters are adjusted by accounts/counters.py.
+        deleted, _ = Like.objects.filter(liker=liker, liked_user=liked_user).delete()
+        if deleted:
+            return 'unliked', False, False, []
+
+        Like.objects.create(liker=liker, liked_user=liked_user)
+
+        # Notify the liked user. Likes are folded into one "X and N others" row per window,
+        # and a repeat like from the same user (like/unlike/like) doesn't notify again.
+        like_notification = record_like_notification(liked_user, liker)
+        if like_notification:
+            notifications.append(like_notification)
+
+        # Check for mutual like (match) *after* the new like is created
+        is_matched = Like.objects.filter(liker=liked_user, liked_user=liker).exists()
+        if is_matched:
+            # A match occurred! Notify both sides.
+            notifications.append(create_notification(
+                recipient=liker,
+                sender=liked_user,
+                notification_type='match',
+                message=f"You have a new match with {liked_user.username}!"
+            ))
+            notifications.append(create_notification(
+                recipient=liked_user,
+                sender=liker,
+                notification_type='match',
+                message=f"You have a new match with {liker.username}!"
+            ))
+    return 'liked', True, is_matched, [notification_payload(n) for n in notifications]
+
+
+@async_login_required
+async def like_view(request, username):
     """Handles the 'like' and 'unlike' actions."""
-    if request.method == 'POST':
-        liker = request.user
-        liked_user = get_object_or_404(UserProfile, username=username)
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'POST required.'}, status=405)
 
-        if liker == liked_user:
-            return JsonResponse({'status': 'error', 'message': 'Cannot like your own profile.'})
+    liker = request.user
+    try:
+        liked_user = await UserProfile.objects.aget(username=username, is_active=True)
+    except UserProfile.DoesNotExist:
+        raise Http404("No such user.")
 
-        like_instance_query = Like.objects.filter(liker=liker, liked_user=liked_user)
-        
-        action_performed = 'none' # Track if like/unlike happened
+    if liker == liked_user:
+        return JsonResponse({'status': 'error', 'message': 'Cannot like your own profile.'})
 
-        # Use a transaction to ensure atomicity for like creation/deletion and notification creation
-        with transaction.atomic():
-            if like_instance_query.exists():
-                like_instance_query.delete()
-                action_performed = 'unliked'
-                # Optional: Delete corresponding 'LIKE' notification if unliked
-                # Notification.objects.filter(
-                #    recipient=liked_user,
-                #    sender=liker,
-                #    notification_type='like', # Changed from NotificationType.LIKE
-                #    is_read=False # Only delete if not already read
-                # ).delete()
-            else:
-                Like.objects.create(liker=liker, liked_user=liked_user)
-                action_performed = 'liked'
-
-                # Create a notification for the liked user
-                Notification.objects.create(
-                    recipient=liked_user,
-                    sender=liker,
-                    notification_type='like', # Changed from NotificationType.LIKE
-                    message=f"{liker.username} liked your profile!"
-                )
-                print(f"Notification created: {liker.username} liked {liked_user.username}")
-
-
-                # Check for mutual like (match) *after* the new like is created
-                if Like.objects.filter(liker=liked_user, liked_user=liker).exists():
-                    # A match occurred!
-                    print(f"MATCH! {liker.username} and {liked_user.username}")
-                    # Create a notification for the current user (liker) about the match
-                    Notification.objects.create(
-                        recipient=liker,
-                        sender=liked_user,
-                        notification_type='match', # Changed from NotificationType.MATCH
-                        message=f"You have a new match with {liked_user.username}!"
-                    )
-                    # Create a notification for the liked user about the match
-                    Notification.objects.create(
-                        recipient=liked_user,
-                        sender=liker,
-                        notification_type='match', # Changed from NotificationType.MATCH
-                        message=f"You have a new match with {liker.username}!"
-                    )
-
-
-        # Recalculate has_liked and is_matched based on current state
-        has_liked_after_action = Like.objects.filter(liker=liker, liked_user=liked_user).exists()
-        is_matched_after_action = (
-            Like.objects.filter(liker=liker, liked_user=liked_user).exists() and
-            Like.objects.filter(liker=liked_user, liked_user=liker).exists()
+    # transaction.atomic() is sync-only, so the write path runs in the shared sync thread.
+    action_performed, has_liked_after_action, is_matched_after_action, payloads = await sync_to_async(_toggle_like)(liker, liked_user)
+
+    # The transaction has committed by now; fan out over WebSockets without holding up the response.
+    await push_in_background(request, payloads)
+
+    # Prepare WhatsApp link (only if matched and target has phone number)
+    whatsapp_link = None
+    # Only generate whatsapp_link if a match occurred AND the liker's plan includes contact
+    if is_matched_after_action and (await aget_entitlements(request)).has(WHATSAPP_CONTACT):
+        whatsapp_link = _whatsapp_link(request, liker, liked_user)
+
+    # Always return JSON response for AJAX requests
+    return JsonResponse({
+        'status': 'ok',
+        'message': 'Like status updated',
+        'action': action_performed, # 'liked' or 'unliked'
+        'username': liked_user.username,
+        'has_liked': has_liked_after_action,
+        'is_matched': is_matched_after_action,
+        'whatsapp_link': whatsapp_link, # Will be null if not matched or not premium
+    })
+
+
+@replica_reads
+@login_required
+def matches_view(request):
+    """Lists every user with a mutual like with the current user."""
+    current_user = request.user
+    matched_profiles_qs = UserProfile.objects.filter(
+        likes_received__liker=current_user,
+        likes_given__liked_user=current_user,
+        is_active=True,
+    ).order_by('-last_login')
+
+    matched_profiles = []
+    for profile in matched_profiles_qs:
+        matched_profiles.append({
+            'username': profile.username,
+            'first_name': profile.first_name or profile.username,
+            'location': profile.location,
+            'age': profile.get_age,
+            'profile_picture_url': profile.profile_picture.url if profile.profile_picture else '',
+        })
+
+    return render(request, 'accounts/matches.html', {'matched_profiles': matched_profiles})
+
+
+LIKES_YOU_PAGE_SIZE = 24
+
+
+def _likes_you_queryset(current_user):
+    """
+    Likes the user received from people they haven't liked back (which also rules out
+    matches), newest first. The scan runs on like_received_idx (liked_user, timestamp, liker).
+    The liked-back check is one probe of the (liker, liked_user) unique index per row.
+    """
+    liked_back = Like.objects.filter(liker=current_user, liked_user=OuterRef('liker_id'))
+    return (
+        Like.objects.filter(liked_user=current_user, liker__is_active=True)
+        .filter(~Exists(liked_back))
+        .select_related('liker')
+        .only(
+            'id', 'timestamp', 'liker__username', 'liker__first_name', 'liker__location',
+            'liker__date_of_birth', 'liker__profile_picture',
         )
+        .order_by('-timestamp', '-pk')
+    )
+
+
+def _admirer_json(like):
+    liker = like.liker
+    return {
+        'username': liker.username,
+        'first_name': liker.first_name or liker.username,
+        'location': liker.location,
+        'age': liker.get_age,
+        'profile_picture_url': liker.profile_picture.url if liker.profile_picture else '',
+        'liked_at': like.timestamp.isoformat(),
+    }
+
 
-        # Prepare WhatsApp link (only if matched and target has phone number)
-        whatsapp_link = None
-        # Only generate whatsapp_link if the current user (liker) is premium AND a match occurred
-        if is_matched_after_action and liker.is_premium and liked_user.phone_number:
-            # Construct a URL for the current user's profile to send in WhatsApp message
-            current_user_profile_url = request.build_absolute_uri(reverse_lazy('accounts:view_user_profile', kwargs={'username': liker.username}))
-            clean_phone_number = liked_user.phone_number.replace(' ', '').replace('-', '')
-            pre_filled_message = f"Hi {liked_user.first_name}! I found your profile on LOVENY. Here's my profile: {current_user_profile_url}"
-            whatsapp_link = f"https://wa.me/{clean_phone_number}?text={requests.utils.quote(pre_filled_message)}"
+def _likes_you_page(likes, limit):
+    """Splits a limit+1 slice into (page, next_cursor)."""
+    next_cursor = None
+    if len(likes) > limit:
+        likes = likes[:limit]
+        next_cursor = encode_cursor(likes[-1].timestamp, likes[-1].pk)
+    return likes, next_cursor
 
 
-        # Always return JSON response for AJAX requests
+@replica_reads
+@login_required
+def likes_you_view(request):
+    """Premium: everyone who liked the current user and is still waiting for a like back."""
+    current_user = request.user
+    context = {
+        'likes_received_count': current_user.likes_received_count,
+        'locked': not get_entitlements(request).has(SEE_WHO_LIKED_YOU),
+    }
+    if not context['locked']:
+        cursor = request.GET.get('cursor')
+        likes = list(after_cursor(_likes_you_queryset(current_user), cursor, 'timestamp')[:LIKES_YOU_PAGE_SIZE + 1])
+        likes, context['next_cursor'] = _likes_you_page(likes, LIKES_YOU_PAGE_SIZE)
+        context['admirers'] = [_admirer_json(like) for like in likes]
+        context['is_first_page'] = not cursor
+    return render(request, 'accounts/likes_you.html', context)
+
+
+@replica_reads
+@async_login_required
+async def likes_you_feed(request):
+    """JSON twin of likes_you_view: ?cursor=&limit=, keyset-paginated on the like timestamp."""
+    current_user = request.user
+    if not (await aget_entitlements(request)).has(SEE_WHO_LIKED_YOU):
         return JsonResponse({
-            'status': 'ok',
-            'message': 'Like status updated',
-            'action': action_performed, # 'liked' or 'unliked'
-            'has_liked': has_liked_after_action,
-            'is_matched': is_matched_after_action,
-            'whatsapp_link': whatsapp_link, # Will be null if not matched or not premium
-        })
\ No newline at end of file
+            'status': 'error',
+            'message': 'Upgrade to premium to see who liked you.',
+            'likes_received_count': current_user.likes_received_count,
+            'upgrade_url': reverse('accounts:choose_plan'),
+        }, status=403)
+
+    limit = page_size(request.GET.get('limit'))
+    queryset = after_cursor(_likes_you_queryset(current_user), request.GET.get('cursor'), 'timestamp')
+    likes = [like async for like in queryset[:limit + 1]]
+    likes, next_cursor = _likes_you_page(likes, limit)
+    return JsonResponse({
+        'status': 'ok',
+        'admirers': [_admirer_json(like) for like in likes],
+        'next_cursor': next_cursor,
+    })
+
+
+def _notification_json(notification):
+    return {
+        'id': notification.id,
+        'type': notification.notification_type,
+        'message': notification.message,
+        'link': notification.link,
+        'sender': notification.sender.username if notification.sender else None,
+        'actor_count': notification.actor_count,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+@async_login_required
+async def notifications_poll_view(request):
+    """
+    Cheap polling endpoint for clients: returns notifications newer than `?since=<id>`
+    plus the current unread count.
+    """
+    current_user = request.user
+    try:
+        since_id = int(request.GET.get('since', 0))
+    except ValueError:
+        since_id = 0
+
+    notifications_qs = Notification.objects.filter(recipient=current_user, id__gt=since_id).select_related('sender').order_by('-id')[:20]
+    notifications = [_notification_json(notification) async for notification in notifications_qs]
+    unread_count = await aget_unread_count(current_user.id)
+
+    return JsonResponse({
+        'status': 'ok',
+        'notifications': notifications,
+        'unread_count': unread_count,
+        'latest_id': notifications[0]['id'] if notifications else since_id,
+    })
+
+
+@async_login_required
+async def notifications_inbox_view(request):
+    """
+    Inbox API, newest first, with cursor pagination.
+    GET params: cursor (from the previous page's next_cursor), limit (max 50), unread=1.
+    """
+    current_user = request.user
+    limit = page_size(request.GET.get('limit'))
+
+    queryset = Notification.objects.filter(recipient=current_user)
+    if request.GET.get('unread') == '1':
+        queryset = queryset.filter(is_read=False)
+    queryset = after_cursor(queryset, request.GET.get('cursor'), 'created_at')
+    queryset = queryset.select_related('sender').order_by('-created_at', '-id')[:limit + 1] # One extra row tells us if there's a next page
+
+    notifications = [notification async for notification in queryset]
+    has_more = len(notifications) > limit
+    notifications = notifications[:limit]
+    next_cursor = encode_cursor(notifications[-1].created_at, notifications[-1].id) if has_more else None
+
+    return JsonResponse({
+        'status': 'ok',
+        'notifications': [_notification_json(notification) for notification in notifications],
+        'next_cursor': next_cursor,
+        'unread_count': await aget_unread_count(current_user.id),
+    })
+
+
+@async_login_required
+async def notifications_mark_read_view(request):
+    """
+    POST `all=1` to mark every notification read, or one or more `ids` to mark just those.
+    Either way it is a single UPDATE.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'POST required.'}, status=405)
+
+    current_user = request.user
+    if request.POST.get('all') == '1':
+        ids = None
+    else:
+        ids = [int(x) for x in request.POST.getlist('ids') if x.isdigit()]
+        if not ids:
+            return JsonResponse({'status': 'error', 'message': 'Pass all=1 or at least one id.'}, status=400)
+
+    updated = await sync_to_async(mark_read)(current_user.id, ids)
+    return JsonResponse({
+        'status': 'ok',
+        'marked_read': updated,
+        'unread_count': await aget_unread_count(current_user.id),
+    })
+
+
+# --- Subscription Plans & Payments ---
+
+@login_required
+def choose_plan_view(request):
+    """Lists the active subscription plans."""
+    plans = SubscriptionPlan.objects.filter(is_active=True).order_by('price')
+    return render(request, 'accounts/subscription_plans.html', {'plans': plans})
+
+
+@async_login_required
+async def initiate_payment_view(request, plan_id):
+    """
+    Creates a pending PaymentTransaction and sends the user to Paystack's checkout page.
+    The gateway call is awaited, so a slow Paystack doesn't pin a worker thread.
+    """
+    current_user = request.user
+    try:
+        plan = await SubscriptionPlan.objects.aget(id=plan_id, is_active=True)
+    except SubscriptionPlan.DoesNotExist:
+        raise Http404("No such plan.")
+
+    reference = f"LOVENY-{uuid.uuid4().hex}"
+    payment = await PaymentTransaction.objects.acreate(
+        user=current_user,
+        plan=plan,
+        amount=plan.price,
+        reference=reference,
+    )
+
+    try:
+        checkout = await paystack.initialize_transaction(
+            email=current_user.email,
+            amount_kobo=int(plan.price * Decimal('100')), # Paystack expects the lowest currency unit
+            reference=reference,
+            callback_url=request.build_absolute_uri(reverse('accounts:verify_payment')),
+        )
+    except paystack.PaystackError as e:
+        await sync_to_async(payments.mark_payment)(payment.pk, 'failed', {'error': str(e)})
+        messages.error(request, "We couldn't start your payment. Please try again.")
+        return redirect('accounts:payment_failed')
+
+    return redirect(checkout['authorization_url'])
+
+
+@async_login_required
+async def verify_payment_view(request):
+    """Paystack redirects here after checkout; confirms the charge and activates the plan."""
+    reference = request.GET.get('reference') or request.GET.get('trxref')
+    if not reference:
+        return redirect('accounts:payment_failed')
+
+    try:
+        payment = await PaymentTransaction.objects.select_related('plan', 'user').aget(reference=reference, user=request.user)
+    except PaymentTransaction.DoesNotExist:
+        raise Http404("Unknown payment reference.")
+
+    if payment.status == 'success':
+        return redirect('accounts:payment_success')
+
+    try:
+        gateway_data = await paystack.verify_transaction(reference)
+    except paystack.PaystackError as e:
+        messages.error(request, f"We couldn't confirm your payment yet: {e}")
+        return redirect('accounts:payment_failed')
+
+    # The webhook may be applying the same result concurrently; apply_gateway_result is idempotent.
+    status = await sync_to_async(payments.apply_gateway_result)(payment, gateway_data)
+    if status == 'success':
+        return redirect('accounts:payment_success')
+    if status == 'pending':
+        # Not settled yet (e.g. a bank transfer); the webhook activates the plan when it is.
+        messages.info(request, "Your payment is still being processed. Your plan will be activated as soon as Paystack confirms it.")
+        return redirect('accounts:profile')
+    return redirect('accounts:payment_failed')
+
+
+async def paystack_webhook_view(request):
+    """
+    Paystack event callback. Verifies the signature, appends the event to the inbox and
+    acknowledges straight away; the event is applied on the background pool, so Paystack
+    never waits on our database work.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Method not allowed.'}, status=405)
+
+    body = request.body
+    if not payments.verify_webhook_signature(body, request.headers.get('X-Paystack-Signature')):
+        return JsonResponse({'status': 'error', 'message': 'Invalid signature.'}, status=401)
+    try:
+        event = json.loads(body)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON.'}, status=400)
+
+    data = event.get('data') if isinstance(event.get('data'), dict) else {}
+    inbox_row = await PaystackWebhookEvent.objects.acreate(
+        event=str(event.get('event', ''))[:50],
+        reference=str(data.get('reference') or '')[:100],
+        payload=event,
+    )
+    # Autocommit: the row is committed by now. If this process dies first, `manage.py process_webhook_events` picks it up.
+    tasks.enqueue(payments.process_webhook_event, inbox_row.pk)
+    return JsonResponse({'status': 'ok'})
+
+
+# Signed by Paystack instead of carrying a CSRF token. Set directly: on Django 4.2 the
+# @csrf_exempt decorator wraps the view in a sync function and breaks async views.
+paystack_webhook_view.csrf_exempt = True
+
+
+@login_required
+def payment_success_view(request):
+    return render(request, 'accounts/payment_success.html')
+
+
+@login_required
+def payment_failed_view(request):
+    return render(request, 'accounts/payment_failed.html')
+
+
+@staff_member_required
+def analytics_report_view(request):
+    """
+    Staff report page over the analytics rollups (see accounts/analytics.py).
+    With ?format=csv|jsonl the report is streamed as a download instead of previewed.
+    """
+    form = {
+        'report': request.GET.get('report') if request.GET.get('report') in analytics.REPORTS else 'revenue',
+        'period': request.GET.get('period') if request.GET.get('period') in analytics.PERIODS else 'day',
+    }
+    today = timezone.localdate()
+    try:
+        until = date.fromisoformat(request.GET['until']) if request.GET.get('until') else today
+        since = date.fromisoformat(request.GET['since']) if request.GET.get('since') else until - timedelta(days=30)
+    except ValueError:
+        messages.error(request, "Dates must be in YYYY-MM-DD format.")
+        until, since = today, today - timedelta(days=30)
+    form.update(since=since, until=until)
+
+    output_format = request.GET.get('format')
+    if output_format in analytics.FORMATS:
+        content_type = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+        # ASGI buffers a sync iterator whole (and warns), WSGI an async one.
+        iter_report = analytics.aiter_report if isinstance(request, ASGIRequest) else analytics.iter_report
+        response = StreamingHttpResponse(
+            iter_report(form['report'], since, until, form['period'], output_format),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{form["report"]}-{since}-{until}.{output_format}"'
+        return response
+
+    build, fields = analytics.REPORTS[form['report']]
+    context = {
+        'form': form,
+        'reports': list(analytics.REPORTS),
+        'periods': analytics.PERIODS,
+        'fields': fields,
+        'rows': [[row[field] for field in fields] for row in build(since, until, form['period'])[:200]], # Preview only
+        'watermarks': RollupWatermark.objects.order_by('name'),
+        'query': request.GET.urlencode(),
+    }
+    return render(request, 'accounts/analytics_report.html', context)
@@ -0,0 +1,33 @@
+"""
+ASGI config for loveny_project project.
+
+Serve with daphne (pinned in requirements.txt):
+
+    daphne -b 0.0.0.0 -p 8000 loveny_project.asgi:application
+
+Running under ASGI lets the async views in accounts/views.py (likes, swipe deck,
+notification polling, browse feed, payments) hold many concurrent clients per worker,
+and serves the notification WebSocket (accounts/routing.py) from the same process.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'loveny_project.settings')
+
+# Initialise Django before importing anything that touches models.
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+
+from accounts.routing import websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -0,0 +1,47 @@
+"""
+Response compression for pages and JSON.
+
+Django's GZipMiddleware (with its BREACH mitigation), limited to HTML and JSON bodies of at
+least COMPRESS_MIN_SIZE bytes. Static files don't come through here: StaticFilesMiddleware
+(loveny_project/staticfiles.py) sends their precompressed variants. Images and other
+already-compressed types are left alone.
+"""
+
+from gzip import GzipFile
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.text import StreamingBuffer, _get_random_filename
+
+COMPRESSIBLE_TYPES = {'text/html', 'application/json'}
+
+
+async def acompress_sequence(sequence, *, max_random_bytes=None):
+    """
+    Async twin of django.utils.text.compress_sequence: one gzip stream for the whole body
+    (Django 4.2 gzips each async chunk separately), flushed after every chunk so a streamed
+    page reaches the browser as it is produced.
+    """
+    buf = StreamingBuffer()
+    filename = _get_random_filename(max_random_bytes) if max_random_bytes else None
+    with GzipFile(filename=filename, mode='wb', compresslevel=6, fileobj=buf, mtime=0) as zfile:
+        yield buf.read()
+        async for item in sequence:
+            zfile.write(item)
+            zfile.flush()
+            yield buf.read()
+    yield buf.read()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESS_MIN_SIZE:
+            return response
+        original = response.streaming_content if response.streaming and response.is_async else None
+        response = super().process_response(request, response)
+        if original is not None and response.get('Content-Encoding') == 'gzip':
+            response.streaming_content = acompress_sequence(original, max_random_bytes=self.max_random_bytes)
+        return response
@@ -0,0 +1,96 @@
+"""
+Database connection tuning, applied from settings.py.
+
+SQLite (the default): every new connection switches to WAL, so readers no longer block
+on a writer and the writer doesn't block readers. It also gets synchronous=NORMAL (safe
+with WAL, far fewer fsyncs), a busy timeout (wait for the write lock instead of failing
+at once) and a bigger page cache. Writes are still serialized. A writer that gives up
+with "database is locked" is retried by @retry_on_locked.
+
+Server databases (PostgreSQL/MySQL): persistent connections with health checks, so a
+connection dropped by the server is replaced instead of failing the next request. For an
+external pooler such as PgBouncer in transaction mode, set DATABASE_POOLER=pgbouncer.
+Django then opens and closes a connection per request and skips server-side cursors,
+leaving the pooling to PgBouncer.
+
+`python manage.py db_benchmark` measures concurrent readers and writers with the
+current settings. It writes to the database, so it refuses anything that doesn't look
+like a scratch copy unless given --allow-live.
+"""
+
+import functools
+import logging
+import os
+import random
+import time
+
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)) # Per connection
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))
+
+LOCKED_RETRIES = int(os.getenv('DB_LOCKED_RETRIES', 5))
+LOCKED_BACKOFF = 0.05 # Seconds before the first retry; doubles each time, with jitter
+
+
+def tune(config):
+    """Adjusts a DATABASES entry (as built by dj_database_url) for its engine. Returns it."""
+    options = config.setdefault('OPTIONS', {})
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        # Python's sqlite3 `timeout` is SQLite's busy handler: how long to wait for a lock.
+        options.setdefault('timeout', SQLITE_BUSY_TIMEOUT_MS / 1000)
+    else:
+        config['CONN_HEALTH_CHECKS'] = True
+        if os.getenv('DATABASE_POOLER') == 'pgbouncer':
+            config['CONN_MAX_AGE'] = 0
+            config['DISABLE_SERVER_SIDE_CURSORS'] = True # Named cursors don't survive transaction pooling
+        if config['ENGINE'] == 'django.db.backends.postgresql':
+            options.setdefault('connect_timeout', int(os.getenv('DATABASE_CONNECT_TIMEOUT', 5)))
+    return config
+
+
+def _configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL') # Persistent: stored in the database file
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}') # Negative = KiB, not pages
+        cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+
+
+connection_created.connect(_configure_sqlite, dispatch_uid='loveny_configure_sqlite')
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and 'database is locked' in str(exc)
+
+
+def retry_on_locked(func):
+    """
+    Retries `func` with exponential backoff when SQLite reports "database is locked" (a
+    writer waited out the busy timeout). Wrap whole units of work, i.e. functions that
+    own their transaction. Inside an outer atomic block the call isn't retried, because
+    the outer transaction has already failed and only its owner can start over.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+        delay = LOCKED_BACKOFF
+        for attempt in range(LOCKED_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_locked_error(e) or attempt == LOCKED_RETRIES:
+                    raise
+                logger.warning("%s: database is locked, retry %s/%s", func.__qualname__, attempt + 1, LOCKED_RETRIES)
+                time.sleep(delay * (1 + random.random()))
+                delay *= 2
+    return wrapper
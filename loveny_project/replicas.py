@@ -0,0 +1,165 @@
+"""
+Read replicas with read-your-writes stickiness.
+
+Replicas are listed in DATABASE_REPLICA_URLS (comma separated, same format as
+DATABASE_URL) and become the aliases replica1, replica2, ... in settings.DATABASES.
+With none configured the router isn't installed and everything uses `default`.
+
+Only views marked with @replica_reads send their reads to a replica, and only for
+GET/HEAD requests. Everything else, and every write, goes to the primary. Within such a
+request, reads go back to the primary once the request has written anything or opened a
+transaction.
+
+A request that writes to the primary (a like, a profile save, a login) sets a short-lived
+cookie. While the cookie is present the user's requests read from the primary, so a
+lagging replica never shows them stale state about their own changes.
+
+Local testing with two SQLite files:
+
+    DATABASE_URL=sqlite:///primary.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+    python manage.py migrate
+    python manage.py sync_sqlite_replica   # re-run it to simulate replication catching up
+"""
+
+import os
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_PIN_COOKIE = 'db_pin'
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+# Always read from the primary, and writing them doesn't pin the user: a session is
+# read on every request (a login must be visible at once) and saved on most of them, and
+# the database cache (app label django_cache) holds counters a lagging replica would undo.
+PRIMARY_ONLY_APPS = {'sessions', 'django_cache'}
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def replica_aliases(databases):
+    return [alias for alias in databases if alias != DEFAULT_DB_ALIAS]
+
+
+class RoutingState:
+    """Per-request routing flags, shared by the router and the middleware."""
+
+    __slots__ = ('pinned', 'use_replica', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned # The user wrote recently: read from the primary
+        self.use_replica = False # Set by process_view for @replica_reads views
+        self.wrote = False # This request wrote to the primary
+
+
+# The state object is mutated, never replaced, so changes made in sync_to_async worker threads are seen by the request.
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_reads(view_func):
+    """Marks a view whose GET/HEAD reads may be served by a replica."""
+    view_func.replica_reads = True
+    return view_func
+
+
+def keep_routing(stream):
+    """
+    Wraps the async iterator of a streaming response so each step runs with the current
+    request's routing state. The middleware resets the state when the view returns,
+    which is before a StreamingHttpResponse produces its content.
+    """
+    state = _state.get()
+
+    async def wrapper():
+        iterator = aiter(stream)
+        while True:
+            token = _state.set(state) # Set and reset within one step: the consumer's context is left as it was
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                _state.reset(token)
+            yield item
+
+    return wrapper()
+
+
+class ReplicaRouter:
+    """Sends reads of @replica_reads views to a random replica; everything else to `default`."""
+
+    def __init__(self):
+        from django.conf import settings
+        self.replicas = replica_aliases(settings.DATABASES)
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            not self.replicas
+            or state is None
+            or not state.use_replica
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or state.pinned
+            or state.wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block # Read inside a write transaction: must see its rows
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True # Lets `migrate --database replicaN` build a replica's schema for local testing
+
+
+class ReplicaPinMiddleware:
+    """Sets up the routing state for each request and pins recent writers to the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=REPLICA_PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=REPLICA_PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is not None and request.method in SAFE_METHODS and getattr(view_func, 'replica_reads', False):
+            state.use_replica = True
+        return None
+
+    def pin(self, state, response):
+        if state.wrote:
+            # The cookie's only effect is reading from the primary, so there is nothing to sign.
+            response.set_cookie(REPLICA_PIN_COOKIE, '1', max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
@@ -7,6 +7,8 @@ import dotenv
 
 dotenv.load_dotenv()
 
+from loveny_project import database, replicas # After load_dotenv: they read their knobs from the environment
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'django-insecure-k%x5v6&x!j1a0m@+&k(m&z)r8v$4s#a8a-0@k%m3r@3y3z0g3v')
@@ -14,24 +16,29 @@ DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 
 INSTALLED_APPS = [
+    'daphne', # Must come before staticfiles so `runserver` serves the ASGI app
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'channels',
     'accounts',
     'widget_tweaks',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'loveny_project.staticfiles.StaticFilesMiddleware', # Hashed, precompressed assets from STATIC_ROOT
+    'loveny_project.compression.CompressionMiddleware', # gzip for HTML/JSON above COMPRESS_MIN_SIZE
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'loveny_project.replicas.ReplicaPinMiddleware', # Read-your-writes stickiness for replica reads
 ]
 
 ROOT_URLCONF = 'loveny_project.urls'
@@ -47,20 +54,62 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.notifications',
+                'accounts.context_processors.entitlements',
+                'accounts.context_processors.static_assets',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'loveny_project.wsgi.application'
+ASGI_APPLICATION = 'loveny_project.asgi.application'
+
+# Channel layer for realtime notifications (accounts/consumers.py).
+# The in-memory layer is fine for tests and a single daphne process. For several nodes point
+# CHANNEL_LAYER_BACKEND at a shared backend (e.g. channels_redis.core.RedisChannelLayer)
+# and list its servers in CHANNEL_LAYER_HOSTS (comma separated).
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': os.getenv('CHANNEL_LAYER_BACKEND', 'channels.layers.InMemoryChannelLayer'),
+    }
+}
+if os.getenv('CHANNEL_LAYER_HOSTS'):
+    CHANNEL_LAYERS['default']['CONFIG'] = {'hosts': os.getenv('CHANNEL_LAYER_HOSTS').split(',')}
+
+# Cache for unread counters, entitlements and facet counts. Every process (web workers and
+# management commands such as expire_subscriptions) must see the same cache, so the default is
+# the database cache; migration 0024 creates its table. For several nodes point CACHE_BACKEND
+# at django.core.cache.backends.redis.RedisCache and CACHE_LOCATION at redis://host:6379/1:
+# its incr/decr are atomic, the database cache's are read-then-write.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
+    }
+}
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.db.DatabaseCache':
+    # The default of 300 entries would evict per-user counters constantly
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000))}
 
+# Per-engine tuning (SQLite WAL + busy timeout, health-checked persistent connections) lives in database.py.
 DATABASES = {
-    'default': dj_database_url.config(
+    'default': database.tune(dj_database_url.config(
         default=os.getenv('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
-        conn_max_age=600
-    )
+        conn_max_age=int(os.getenv('CONN_MAX_AGE', 600))
+    ))
 }
 
+# Optional read replicas (see replicas.py): DATABASE_REPLICA_URLS=postgres://...,postgres://...
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = database.tune(dj_database_url.parse(
+        url.strip(),
+        conn_max_age=int(os.getenv('CONN_MAX_AGE', 600))
+    ))
+    DATABASES[f'replica{index}']['TEST'] = {'MIRROR': 'default'} # Tests see one database
+if replicas.replica_aliases(DATABASES):
+    DATABASE_ROUTERS = ['loveny_project.replicas.ReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -89,6 +138,24 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Content-hashed names plus .gz/.br variants at collectstatic (see loveny_project/staticfiles.py)
+    'staticfiles': {'BACKEND': 'loveny_project.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# Stream the browse page (shell first, then cards in batches) instead of rendering it whole.
+# Applies to ASGI requests (daphne); WSGI requests always get the single render.
+BROWSE_STREAMING = os.getenv('BROWSE_STREAMING', 'True') == 'True'
+
+# Smallest HTML/JSON response worth gzipping (loveny_project/compression.py), in bytes.
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+# base.html links the compiled, purged stylesheet (static/css/output.css; rebuild it with
+# `npm run build` after changing template classes). True switches to the Tailwind Play CDN
+# script, which compiles in the browser: handy while editing templates, never for production.
+TAILWIND_PLAY_CDN = os.getenv('TAILWIND_PLAY_CDN', 'False') == 'True'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -105,6 +172,22 @@ LOGIN_URL = 'accounts:login' # Explicitly define LOGIN_URL for Django's built-in
 # Paystack Settings
 PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY')
+# Set to the local stub (e.g. http://127.0.0.1:8765, see `manage.py paystack_stub`) to test payments offline.
+PAYSTACK_BASE_URL = os.getenv('PAYSTACK_BASE_URL', 'https://api.paystack.co').rstrip('/')
+PAYSTACK_CONNECT_TIMEOUT = float(os.getenv('PAYSTACK_CONNECT_TIMEOUT', 3.05)) # Seconds to establish the connection
+PAYSTACK_READ_TIMEOUT = float(os.getenv('PAYSTACK_READ_TIMEOUT', 10)) # Seconds to wait for each response chunk
+PAYSTACK_MAX_RETRIES = int(os.getenv('PAYSTACK_MAX_RETRIES', 2))
+PAYSTACK_BREAKER_THRESHOLD = int(os.getenv('PAYSTACK_BREAKER_THRESHOLD', 5)) # Consecutive failures before failing fast
+PAYSTACK_BREAKER_RESET_TIMEOUT = float(os.getenv('PAYSTACK_BREAKER_RESET_TIMEOUT', 30)) # Seconds before a trial call
+
+# Threads per worker process for in-process background jobs (accounts/tasks.py), e.g. webhook processing.
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', 4))
+
+# Targets per transaction for bulk moderation jobs (accounts/moderation.py).
+MODERATION_CHUNK_SIZE = int(os.getenv('MODERATION_CHUNK_SIZE', 100))
+
+# Store archived gateway responses (PaymentGatewayPayload) zlib-compressed. Existing rows keep their encoding.
+GATEWAY_PAYLOAD_COMPRESSION = os.getenv('GATEWAY_PAYLOAD_COMPRESSION', 'True') == 'True'
 
 # --- Email Settings ---
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend') # Default to console for safety
@@ -0,0 +1,178 @@
+"""
+Static files: fingerprinted, precompressed and served by the app itself.
+
+`collectstatic` (CompressedManifestStaticFilesStorage) copies every asset to STATIC_ROOT
+under a content-hashed name (css/output.3f2a9c1b.css), rewrites the references between
+them, and writes a gzip (.gz) and, with the optional `brotli` package, a brotli (.br)
+variant of every text asset. Templates get the hashed names through {% static %} when
+DEBUG is off. A reference to a file that isn't in the manifest then raises ValueError and
+fails the page, so every path given to {% static %} must exist under static/
+(accounts/tests/test_static.py renders each template against a collected manifest).
+
+StaticFilesMiddleware serves STATIC_ROOT without a separate web server. It picks the
+smallest variant the client's Accept-Encoding allows. Hashed names never change content,
+so they are sent as immutable and cached for a year. Anything else (an unhashed name
+requested from JavaScript, say) gets a short max-age and Last-Modified.
+
+Deploying:
+
+    npm run build                      # purged, minified Tailwind build into static/css/output.css
+    python manage.py collectstatic --noinput
+"""
+
+import gzip
+import mimetypes
+import os
+from email.utils import formatdate
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_http_date_safe
+
+try:
+    import brotli
+except ImportError: # Optional: without it only gzip variants are written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.otf', '.eot'}
+MIN_COMPRESS_SIZE = 256 # Bytes; smaller files gain nothing once the headers are counted
+MIN_SAVING = 0.05 # Keep a variant only if it is at least 5% smaller
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+UNHASHED_MAX_AGE = 60
+
+ENCODING_SUFFIXES = [('br', '.br'), ('gzip', '.gz')] # Preference order
+
+
+def compress(data):
+    """{suffix: bytes} of the worthwhile compressed variants of `data`."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)} # mtime=0: identical output on every build
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) <= len(data) * (1 - MIN_SAVING)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files.values()) | set(self.hashed_files) # Unhashed copies are served too
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+                continue
+            with self.open(name) as f:
+                data = f.read()
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, body in compress(data).items():
+                with open(self.path(name + suffix), 'wb') as f:
+                    f.write(body)
+
+
+class StaticFile:
+    """One asset in STATIC_ROOT and its precompressed variants."""
+
+    __slots__ = ('path', 'size', 'mtime', 'content_type', 'variants', 'immutable')
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.variants = [ # (encoding, path, size), smallest first
+            (encoding, path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODING_SUFFIXES if os.path.isfile(path + suffix)
+        ]
+        self.variants.sort(key=lambda variant: variant[2])
+        self.immutable = immutable
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Serves STATIC_ROOT (as built by collectstatic) with content negotiation and long-lived caching."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.prefix = urlparse(settings.STATIC_URL).path
+        self.files = self.scan(settings.STATIC_ROOT) # Read once: STATIC_ROOT only changes with a deploy (and a restart)
+
+    def scan(self, root):
+        if not root or not os.path.isdir(root):
+            return {}
+        hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values()) # Empty without a manifest
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                files[name] = StaticFile(path, immutable=name in hashed)
+        return files
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        """The response for a static file request, or None to pass the request on."""
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        static_file = self.files.get(request.path[len(self.prefix):])
+        if static_file is None:
+            return None
+
+        # Hashed files are never revalidated; for the rest, answer If-Modified-Since.
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if not static_file.immutable and since is not None and int(static_file.mtime) <= since:
+            response = HttpResponseNotModified()
+        else:
+            accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+            encoding, path, size = next(
+                (variant for variant in static_file.variants if variant[0] in accepted),
+                (None, static_file.path, static_file.size),
+            )
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=static_file.content_type)
+            else:
+                response = FileResponse(
+                    open(path, 'rb'), content_type=static_file.content_type, filename=os.path.basename(static_file.path),
+                )
+            response['Content-Length'] = size
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = formatdate(static_file.mtime, usegmt=True)
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if static_file.immutable else f'public, max-age={UNHASHED_MAX_AGE}'
+        return response